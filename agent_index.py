@@ -0,0 +1,205 @@
+# This module keeps a local SQLite index of Eyes Agents so scripts do not download the whole fleet on every run.
+# It shows how to:
+#  - Store agents keyed by id, with local lookups by lowercased name and by MAC address
+#  - Refresh incrementally: read agents sorted by lastTestSeen (newest first) and stop at the last one already seen,
+#    picking up never-tested agents too
+#  - Fall back to a full download when the index is empty or older than AGENT_INDEX_MAX_AGE
+#  - Keep the index current after a PATCH so the next run sees the change without a download
+
+# Example usage:
+#   with AgentIndex("agents.db") as index:
+#       index.refresh()
+#       agent = index.get("laptop-john")
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from api_client import get_session, api_url
+from pagination import iter_pages, iter_results_parallel
+
+# Optional path of the index file; scripts download every agent when it is not set
+AGENT_INDEX_FILE = os.getenv("AGENT_INDEX_FILE")
+# Seconds after which a full download replaces the incremental refresh,
+# so deleted and renamed agents are picked up (default one day)
+AGENT_INDEX_MAX_AGE = float(os.getenv("AGENT_INDEX_MAX_AGE", str(24 * 3600)))
+# Timestamp field the incremental refresh sorts on
+AGENT_INDEX_SORT_FIELD = os.getenv("AGENT_INDEX_SORT_FIELD", "lastTestSeen")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    mac TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agents_name ON agents (name);
+CREATE INDEX IF NOT EXISTS agents_mac ON agents (mac);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# Lowercases a MAC address and drops separators, so "00:11:22:AA:BB:CC" and "0011.22aa.bbcc" match
+def normalize_mac(mac):
+    if not mac:
+        return None
+    return "".join(c for c in str(mac).lower() if c not in ":-.")
+
+
+class AgentIndex:
+    def __init__(self, path=AGENT_INDEX_FILE, sort_field=AGENT_INDEX_SORT_FIELD, max_age=AGENT_INDEX_MAX_AGE):
+        self.path = path
+        self.sort_field = sort_field
+        self.max_age = max_age
+        # Worker threads update the index after each PATCH; sqlite3 connections
+        # are not thread-safe on their own, so every use goes through the lock
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.executescript(_SCHEMA)
+
+    # Returns the agent with this name (case-insensitive), or None.
+    # Matches the dict.get interface used for agents_dict lookups.
+    def get(self, name, default=None):
+        return self._one("SELECT data FROM agents WHERE name = ?", (name or "").lower()) or default
+
+    def get_by_id(self, agent_id):
+        return self._one("SELECT data FROM agents WHERE id = ?", str(agent_id))
+
+    def get_by_mac(self, mac):
+        return self._one("SELECT data FROM agents WHERE mac = ?", normalize_mac(mac))
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    def _one(self, query, value):
+        with self.lock:
+            row = self.db.execute(query, (value,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Inserts or replaces agents in one transaction
+    def upsert(self, agents):
+        with self.lock, self.db:
+            return self._write(agents)
+
+    # Caller holds the lock and the transaction
+    def _write(self, agents):
+        rows = [
+            (str(a["id"]), (a.get("name") or "").lower(),
+             normalize_mac(a.get("macAddress") or a.get("mac")), json.dumps(a))
+            for a in agents
+        ]
+        self.db.executemany("INSERT OR REPLACE INTO agents (id, name, mac, data) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # Applies fields just sent in a PATCH to the stored agent
+    def update_fields(self, agent_id, fields):
+        agent = self.get_by_id(agent_id)
+        if agent:
+            self.upsert([{**agent, **fields}])
+
+    def _meta(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, values):
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                [(key, json.dumps(value)) for key, value in values.items()])
+
+    # Brings the index up to date and returns it.
+    # A full download runs when the index is empty, too old, or full=True;
+    # otherwise only agents with a newer sort_field value than the last refresh are read.
+    def refresh(self, headers=None, session=None, full=False):
+        session = session or get_session()
+        last_full = self._meta("last_full")
+
+        if full or not last_full or time.time() - last_full > self.max_age or not len(self):
+            self._full_refresh(headers, session)
+        else:
+            self._incremental_refresh(headers, session)
+        return self
+
+    def _full_refresh(self, headers, session):
+        agents = list(iter_results_parallel(api_url("/eyes/agents"), headers=headers, session=session))
+        # One transaction, so a crash never leaves an empty index behind
+        with self.lock, self.db:
+            # Agents that disappeared from the API are removed too
+            self.db.execute("DELETE FROM agents")
+            self._write(agents)
+        self._set_meta({"last_full": time.time(), "watermark": _newest(agents, self.sort_field)})
+        logging.info(f"Agent index {self.path}: downloaded {len(agents)} agents")
+
+    def _incremental_refresh(self, headers, session):
+        watermark = self._meta("watermark")
+        params = {"sort": self.sort_field, "order": "desc"}
+        changed = []
+        total = None
+
+        pages = iter_pages(api_url("/eyes/agents"), headers=headers, params=params, session=session)
+        try:
+            for data in pages:
+                if total is None:
+                    total = (data.get("pagination") or {}).get("total")
+                results = data.get("results", [])
+                changed.extend(a for a in results if _is_newer(a.get(self.sort_field), watermark))
+                # Agents that were never tested have no sort value; keep the ones not indexed yet
+                changed.extend(a for a in results
+                               if a.get(self.sort_field) is None and self.get_by_id(a["id"]) is None)
+                # Sorted newest first: once a page holds an agent already seen, we are done
+                if any(a.get(self.sort_field) is not None and not _is_newer(a.get(self.sort_field), watermark)
+                       for a in results):
+                    break
+        finally:
+            pages.close()
+
+        self.upsert(changed)
+        # Agents without a sort value may come after the ones already seen. If the API
+        # counts more agents than the index holds, some are missing: download them all.
+        if total is not None and total > len(self):
+            logging.info(f"Agent index {self.path}: {total - len(self)} agents missing; running a full refresh")
+            self._full_refresh(headers, session)
+            return
+        newest = _newest(changed, self.sort_field)
+        if newest is not None:
+            self._set_meta({"watermark": newest})
+        logging.info(f"Agent index {self.path}: {len(changed)} agents changed since the last refresh")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# True if value is set and later than the watermark (ISO timestamps and epoch numbers both compare in order)
+def _is_newer(value, watermark):
+    if value is None:
+        return False
+    if watermark is None:
+        return True
+    try:
+        return value > watermark
+    except TypeError:
+        return str(value) > str(watermark)
+
+
+# Newest sort_field value among agents, or None
+def _newest(agents, field):
+    newest = None
+    for agent in agents:
+        if _is_newer(agent.get(field), newest):
+            newest = agent.get(field)
+    return newest
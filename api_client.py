@@ -0,0 +1,84 @@
+# This module provides a shared HTTP session for the example scripts.
+# It shows how to:
+#  - Reuse TCP+TLS connections with a keep-alive requests.Session
+#  - Size the connection pool with the HTTP_POOL_SIZE environment variable
+#  - Attach the bearer token from get_token() to every request automatically
+
+# Example usage:
+#   from api_client import get_session, api_url
+#   session = get_session()
+#   response = session.get(api_url("/eyes/agents"))
+
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from auth_utils import get_token
+
+# Define API host from environment
+API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
+
+# Number of keep-alive connections kept open per host.
+# Raise this when running many worker threads against the API.
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# The shared session and the lock that guards its creation
+_session = None
+_session_lock = threading.Lock()
+
+
+# Adds "Authorization: Bearer <token>" to outgoing requests.
+# Requests that already carry an Authorization header are left untouched,
+# so helpers that pass their own token keep working unchanged.
+class BearerAuth(requests.auth.AuthBase):
+    def __call__(self, request):
+        if "Authorization" not in request.headers:
+            token, _ = get_token()
+            if token:
+                request.headers["Authorization"] = f"Bearer {token}"
+        return request
+
+
+# Builds a new session with a connection pool of the given size.
+def create_session(pool_size=POOL_SIZE):
+    session = requests.Session()
+
+    # One adapter per scheme; pool_maxsize is how many connections
+    # to the same host are kept alive for reuse between requests
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # Inject the bearer token on every request
+    session.auth = BearerAuth()
+
+    logging.debug(f"Created HTTP session with pool size {pool_size}")
+    return session
+
+
+# Returns the process-wide shared session, creating it on first use.
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+# Builds a full API URL from a path such as "/eyes/agents".
+def api_url(path):
+    return f"https://{API_HOST}/{path.lstrip('/')}"
+
+
+# Reads a numeric header such as x-ratelimit-remaining, returning None if it is missing or malformed.
+def header_number(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,221 @@
+# This module provides an asyncio client for the example scripts.
+# It shows how to:
+#  - Request and refresh the bearer token without blocking the event loop
+#  - Keep many requests in flight over one aiohttp connection pool
+#  - Stay inside the rate limit budget with handle_rate_limits_async
+#  - Run the common fetch and update helpers as coroutines
+
+# Requires aiohttp:
+#   pip install aiohttp
+
+# Example usage:
+#   async with create_async_session() as session:
+#       agents = await fetch_agents(session)
+#       await asyncio.gather(*(license_agent(session, a["id"]) for a in agents))
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import weakref
+import aiohttp
+
+import auth_utils
+from api_client import POOL_SIZE, api_url
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'examples', 'rate_limiting')))
+from rate_limit import handle_rate_limits_async
+
+# Only one coroutine per event loop may request a new token at a time
+_token_locks = weakref.WeakKeyDictionary()
+
+# The running background refresh, if any
+_refresh_task = None
+
+
+# Returns the token lock for the running event loop
+def _token_lock():
+    loop = asyncio.get_running_loop()
+    if loop not in _token_locks:
+        _token_locks[loop] = asyncio.Lock()
+    return _token_locks[loop]
+
+
+# True while a background refresh is running on this event loop
+def _refresh_running():
+    return (_refresh_task is not None and not _refresh_task.done()
+            and _refresh_task.get_loop() is asyncio.get_running_loop())
+
+
+# A fully read response with the same attributes the sync helpers use
+class AsyncResponse:
+    def __init__(self, status, headers, text):
+        self.status_code = status
+        self.ok = status < 400
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text) if self.text else {}
+
+
+# Builds an aiohttp session that keeps up to `limit` connections open.
+def create_async_session(limit=POOL_SIZE):
+    connector = aiohttp.TCPConnector(limit=limit)
+    return aiohttp.ClientSession(connector=connector)
+
+
+# Async version of auth_utils.get_token().
+# Shares token_info with the sync code, so a token from either side is reused.
+async def get_token_async(session):
+    global _refresh_task
+    info = auth_utils.token_info
+    current_time = time.time()
+
+    # Token still valid: reuse it, refreshing in the background when close to expiry
+    if info["access_token"] and current_time < info["expires_at"]:
+        if current_time >= info["refresh_at"] and not _refresh_running():
+            _refresh_task = asyncio.ensure_future(_background_refresh(session))
+        return info["access_token"], info["expires_at"]
+
+    # No valid token: the first coroutine requests one, the others wait for it
+    async with _token_lock():
+        if info["access_token"] and time.time() < info["expires_at"]:
+            return info["access_token"], info["expires_at"]
+        return await _request_token_async(session)
+
+
+# Requests a new token ahead of expiry while callers keep the current one.
+async def _background_refresh(session):
+    try:
+        async with _token_lock():
+            if time.time() < auth_utils.token_info["refresh_at"]:
+                return
+            logging.info("Token close to expiry, refreshing in background")
+            await _request_token_async(session)
+    except Exception as e:
+        logging.error(f"Background token refresh failed: {e}")
+
+
+# Sends the client_credentials request. Callers must hold the token lock.
+async def _request_token_async(session):
+    # The cache file is guarded by a blocking file lock, so use a worker thread
+    if auth_utils.TOKEN_CACHE_FILE:
+        def refresh():
+            with auth_utils._token_lock:
+                return auth_utils._refresh_token()
+        return await asyncio.to_thread(refresh)
+
+    logging.info("Requesting new token...")
+    current_time = time.time()
+    payload = {
+        "grant_type": "client_credentials",
+        "client_id": auth_utils.client_id,
+        "client_secret": auth_utils.client_secret
+    }
+    async with session.post(auth_utils.token_url, data=payload) as response:
+        if response.status == 200:
+            return auth_utils._store_token(await response.json(), current_time)
+
+        logging.error("Failed to retrieve token")
+        logging.debug(f"Status code: {response.status}")
+        logging.debug(f"Response body: {await response.text()}")
+        return None, None
+
+
+# Sends one request with the bearer token and reads the whole body.
+async def request(session, method, url, **kwargs):
+    headers = dict(kwargs.pop("headers", None) or {})
+    if "Authorization" not in headers:
+        token, _ = await get_token_async(session)
+        headers["Authorization"] = f"Bearer {token}"
+
+    async with session.request(method, url, headers=headers, **kwargs) as response:
+        text = await response.text()
+        return AsyncResponse(response.status, response.headers, text)
+
+
+# Async version of fetch_agents in csv_licensing.py and csv_nickname.py.
+# Page 1 gives the page count; pages 2..N are then requested concurrently.
+# Returns [] if any page fails, so a large fleet is never silently cut short.
+async def fetch_agents(session):
+    url = api_url("/eyes/agents")
+
+    async def fetch_page(page):
+        async def api_call():
+            return await request(session, "GET", url, params={"page": page})
+
+        data = await handle_rate_limits_async(api_call)
+        if data is None:
+            raise aiohttp.ClientError(f"Failed to fetch page {page} of {url}")
+        return data
+
+    try:
+        first = await fetch_page(1)
+        pages = (first.get("pagination") or {}).get("pages") or 1
+        rest = await asyncio.gather(*(fetch_page(page) for page in range(2, pages + 1)))
+        return [agent for data in (first, *rest) for agent in data.get("results", [])]
+    except Exception as e:
+        logging.error(f"Failed to fetch agents: {e}")
+        return []
+
+
+# Async version of fetch_time_series in last_monitored_devices.py.
+async def fetch_time_series(session, device_id, from_time, to_time, metrics,
+                            time_bucket="10_MIN", aggregate_functions=("AVG",),
+                            group_by="deviceId"):
+    url = api_url(f"/time-series/agents/numeric/{group_by}")
+    params = {
+        "from": from_time,
+        "to": to_time,
+        "timeBucket": time_bucket,
+        "aggregateFunctions": ",".join(aggregate_functions),
+        "metrics": ",".join(metrics),
+        "deviceId": device_id,
+    }
+
+    async def api_call():
+        return await request(session, "GET", url, params=params)
+
+    try:
+        data = await handle_rate_limits_async(api_call)
+        return (data or {}).get("results", [])
+    except Exception as e:
+        logging.error(f"Failed to fetch time series for device {device_id}: {e}")
+        return []
+
+
+# Async version of license_agent in csv_licensing.py.
+# Returns True if the agent was licensed.
+async def license_agent(session, agent_id):
+    url = api_url(f"/eyes/agents/{agent_id}")
+
+    async def api_call():
+        return await request(session, "PATCH", url, json={"isLicensed": True})
+
+    try:
+        if await handle_rate_limits_async(api_call) is not None:
+            logging.info(f"Licensed agent {agent_id} successfully")
+            return True
+    except Exception as e:
+        logging.error(f"Failed to license agent {agent_id}: {e}")
+    return False
+
+
+# Async version of update_nickname in csv_nickname.py.
+# Returns True if the nickname was updated.
+async def update_nickname(session, agent_id, nickname):
+    url = api_url(f"/eyes/agents/{agent_id}")
+
+    async def api_call():
+        return await request(session, "PATCH", url, json={"nickname": nickname})
+
+    try:
+        if await handle_rate_limits_async(api_call) is not None:
+            logging.info(f"Updated agent {agent_id} nickname -> {nickname}")
+            return True
+    except Exception as e:
+        logging.error(f"Failed to update nickname for agent {agent_id}: {e}")
+    return False
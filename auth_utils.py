@@ -4,12 +4,20 @@
 #  - Request a bearer token from the authentication server
 #  - Store the token and its expiration time in memory
 #  - Reuse the token for future API calls until it expires
+#  - Refresh the token in the background shortly before it expires
+#  - Let only one thread request a new token while the others wait for it
+#  - Optionally share the token between processes through a locked cache file
 
 import os
+import json
 import time
+import hashlib
 import logging
+import threading
 import requests
 
+from file_lock import locked
+
 # Configure logging for the script
 logging.basicConfig(
 
@@ -42,23 +50,138 @@ token_url = f"https://{API_HOST}/oauth2/token"
 if not token_url:
     raise EnvironmentError("token_url must be set in environment variables.")
 
-# This stores the token and its expiration in the token_info dictionary
+# Refresh the token this many seconds before it expires.
+# Callers keep using the current token while the refresh runs.
+REFRESH_SKEW = float(os.getenv("TOKEN_REFRESH_SKEW", "60"))
+
+# Optional path of a file that caches tokens between runs and processes.
+# Leave unset to keep the token in memory only.
+TOKEN_CACHE_FILE = os.getenv("TOKEN_CACHE_FILE")
+
+# This stores the token, its expiration and when to start refreshing it
 token_info = {
     "access_token": None,
-    "expires_at": 0
+    "expires_at": 0,
+    "refresh_at": 0
 }
 
+# Only the thread holding this lock may request a new token
+_token_lock = threading.Lock()
+
+# Held while a background refresh is running so only one is started
+_refresh_lock = threading.Lock()
+
 # Retrieve an access token using client_credentials.
 # If a valid token is already cached, reuse it.
 def get_token():
     # Gets the current time. This is used to check if token is still valid
     current_time = time.time()
 
-    # Checks if the token is not expired. If it is, it prints a message and reuse it
+    # Checks if the token is not expired. If it is still valid, reuse it
     if token_info["access_token"] and current_time < token_info["expires_at"]:
-        logging.info("Reusing cached token")
+        # Close to expiry: start a refresh but keep serving the current token
+        if current_time >= token_info["refresh_at"]:
+            _start_background_refresh()
+        logging.debug("Reusing cached token")
         return token_info["access_token"], token_info["expires_at"]
 
+    # No valid token: the first thread requests one, the others wait for it
+    with _token_lock:
+        # Another thread may have stored a fresh token while we waited
+        if token_info["access_token"] and time.time() < token_info["expires_at"]:
+            logging.debug("Reusing token refreshed by another thread")
+            return token_info["access_token"], token_info["expires_at"]
+        return _refresh_token()
+
+# Starts a single background refresh unless one is already running.
+def _start_background_refresh():
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    thread = threading.Thread(target=_background_refresh, daemon=True)
+    thread.start()
+
+# Requests a new token ahead of expiry. Runs on a background thread.
+def _background_refresh():
+    try:
+        with _token_lock:
+            # Skip if a caller already replaced the token
+            if time.time() < token_info["refresh_at"]:
+                return
+            logging.info("Token close to expiry, refreshing in background")
+            _refresh_token()
+    except Exception as e:
+        # The current token stays in use; the next call will try again
+        logging.error(f"Background token refresh failed: {e}")
+    finally:
+        _refresh_lock.release()
+
+# Gets a new token, going through the cache file when one is configured.
+# Callers must hold _token_lock.
+def _refresh_token():
+    if not TOKEN_CACHE_FILE:
+        return _request_token()
+
+    # The file lock makes other processes wait while one of them refreshes
+    with locked(TOKEN_CACHE_FILE + ".lock"):
+        # Another process may already have stored a token that is still fresh
+        cached = _read_cached_token()
+        if cached and time.time() < cached["refresh_at"]:
+            logging.info("Reusing token from cache file")
+            token_info.update(cached)
+            return cached["access_token"], cached["expires_at"]
+
+        access_token, expires_at = _request_token()
+        if access_token:
+            _write_cached_token()
+        return access_token, expires_at
+
+# Tokens are cached per API key and host so several keys can share one file.
+# The key is hashed so the client_id does not appear in the file.
+def _cache_key():
+    return hashlib.sha256(f"{client_id}@{API_HOST}".encode("utf-8")).hexdigest()
+
+# Reads the cache file. Returns {} if it is missing or unreadable.
+def _read_cache_file():
+    try:
+        with open(TOKEN_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Returns the cached token entry for this API key and host, or None.
+def _read_cached_token():
+    entry = _read_cache_file().get(_cache_key())
+    if not entry or not entry.get("access_token"):
+        return None
+    return {
+        "access_token": entry["access_token"],
+        "expires_at": entry["expires_at"],
+        "refresh_at": entry["refresh_at"]
+    }
+
+# Writes the token in token_info to the cache file.
+# Callers must hold the cache file lock.
+def _write_cached_token():
+    # Drop expired entries so the file does not grow forever
+    now = time.time()
+    cache = {key: entry for key, entry in _read_cache_file().items()
+             if entry.get("expires_at", 0) > now}
+    cache[_cache_key()] = dict(token_info)
+
+    # Write to a temporary file readable only by this user, then swap it in,
+    # so readers never see a half-written file
+    tmp_path = f"{TOKEN_CACHE_FILE}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, TOKEN_CACHE_FILE)
+    logging.debug(f"Token written to cache file {TOKEN_CACHE_FILE}")
+
+# Sends the client_credentials request and stores the new token.
+# Callers must hold _token_lock.
+def _request_token():
+    current_time = time.time()
+
     # If theres no valid token, it'll print to get a new one
     logging.info("Requesting new token...")
 
@@ -79,18 +202,7 @@ def get_token():
 
     # if the request succeeded, it extracts the token and how long its valid
     if response.status_code == 200:
-        data = response.json()
-        access_token = data["access_token"]
-        expires_in = data["expires_in"]
-        expires_at = current_time + expires_in
-
-        # Save token and expiry in the token_info dictionary
-        token_info["access_token"] = access_token
-        token_info["expires_at"] = current_time + expires_in
-
-        # prints the confirmation and return the token
-        logging.info("Token received and stored in memory")
-        return access_token, expires_at
+        return _store_token(response.json(), current_time)
     
     # if request failed, it'll print an error 
     else:
@@ -99,6 +211,23 @@ def get_token():
         logging.debug(f"Response body: {response.text}")
         return None, None
 
+# Saves a token response in the token_info dictionary.
+# current_time is when the token was requested.
+def _store_token(data, current_time):
+    access_token = data["access_token"]
+    expires_in = data["expires_in"]
+    expires_at = current_time + expires_in
+
+    # Save token and expiry in the token_info dictionary.
+    # Short-lived tokens are refreshed halfway through their lifetime at the latest.
+    token_info["access_token"] = access_token
+    token_info["expires_at"] = expires_at
+    token_info["refresh_at"] = expires_at - min(REFRESH_SKEW, expires_in / 2)
+
+    # prints the confirmation and return the token
+    logging.info("Token received and stored in memory")
+    return access_token, expires_at
+
 # Main program entry point.
 # Gets an access token and makes a follow-up API call.
 def main():
@@ -0,0 +1,95 @@
+# This script benchmarks the sequential licensing loop against the asyncio client.
+# It shows how to:
+#  - Send the same PATCH requests one at a time through handle_rate_limits
+#  - Send them concurrently through async_client.license_agent
+#  - Compare throughput against a local stub server with artificial latency
+
+# Requires aiohttp:
+#   pip install aiohttp
+
+# Example usage:
+#   python benchmarks/bench_async.py
+#   python benchmarks/bench_async.py 1000 200
+
+import os
+import sys
+import time
+import asyncio
+import logging
+
+# auth_utils needs credentials at import time; the stub server ignores them
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("API_SECRET", "benchmark")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'examples', 'rate_limiting')))
+import auth_utils
+import async_client
+from api_client import create_session
+from rate_limit import handle_rate_limits
+from mock_server import MockServer
+
+# Simulated network round trip of the API
+LATENCY = 0.02
+
+# A budget large enough that only latency limits throughput
+RATE_HEADERS = {
+    "x-ratelimit-remaining": 10000,
+    "x-ratelimit-burst-capacity": 10000,
+    "x-ratelimit-replenish-rate": 10000,
+    "x-ratelimit-requested-tokens": 1,
+}
+
+
+def route(method, path, body):
+    return 200, RATE_HEADERS, {"isLicensed": True}
+
+
+def run_sequential(server, count):
+    session = create_session()
+    start = time.perf_counter()
+    for i in range(count):
+        url = f"{server.url}/eyes/agents/{i}"
+        handle_rate_limits(lambda: session.patch(url, json={"isLicensed": True}))
+    session.close()
+    return time.perf_counter() - start
+
+
+async def run_async(server, count, concurrency):
+    async_client.api_url = lambda path: f"{server.url}/{path.lstrip('/')}"
+    limit = asyncio.Semaphore(concurrency)
+
+    async def license_one(session, agent_id):
+        async with limit:
+            return await async_client.license_agent(session, agent_id)
+
+    start = time.perf_counter()
+    async with async_client.create_async_session(limit=concurrency) as session:
+        results = await asyncio.gather(*(license_one(session, i) for i in range(count)))
+    assert all(results)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    # Keep per-request log lines out of the timing
+    logging.disable(logging.INFO)
+
+    # A long-lived fake token so no token request is made
+    auth_utils.token_info.update(access_token="benchmark", expires_at=time.time() + 3600,
+                                 refresh_at=time.time() + 3600)
+
+    with MockServer(route=route, latency=LATENCY) as server:
+        sequential = run_sequential(server, count)
+        print(f"sequential     {count} requests in {sequential:.2f}s  ({count / sequential:.0f} req/s)")
+
+        concurrent = asyncio.run(run_async(server, count, concurrency))
+        print(f"asyncio x{concurrency:<5} {count} requests in {concurrent:.2f}s  ({count / concurrent:.0f} req/s)")
+
+        print(f"speedup        {sequential / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
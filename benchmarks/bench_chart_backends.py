@@ -0,0 +1,74 @@
+# This script compares the chart backends used by the SLA report.
+# It shows how to:
+#  - Time a fresh interpreter's import and first chart, where matplotlib pays for loading itself
+#  - Time each backend per chart over synthetic 10_MIN series of several lengths
+#  - Compare output size per chart, raw and as it would be embedded inline in the HTML report
+
+# Example usage:
+#   python benchmarks/bench_chart_backends.py
+#   python benchmarks/bench_chart_backends.py --charts 100 48 1008
+
+import os
+import sys
+import time
+import math
+import base64
+import argparse
+import subprocess
+
+TIME_SERIES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'examples', 'time_series'))
+sys.path.append(TIME_SERIES_DIR)
+from chart_render import render_chart
+
+BUCKET = 10 * 60 * 1000
+BACKENDS = ["matplotlib", "svg"]
+
+
+def make_series(points, seed=0):
+    end = int(time.time() * 1000) // BUCKET * BUCKET
+    return [{"ts": end - (points - i) * BUCKET, "avg": 0.75 + 0.2 * math.sin((i + seed) / 5)} for i in range(points)]
+
+
+# Seconds for a new Python process to import the renderer and draw one chart
+def cold_start(backend):
+    code = (f"import sys; sys.path.append({TIME_SERIES_DIR!r}); import chart_render; "
+            f"chart_render.render_chart([{{'ts': 0, 'avg': 0.5}}, {{'ts': 600000, 'avg': 0.9}}], 'COVERAGE', {backend!r})")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+# Inline size: PNG is base64-encoded in the report, SVG is written as markup
+def inline_size(image):
+    return len(image) if image.startswith(b"<svg") else len(base64.b64encode(image))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("points", nargs="*", type=int)
+    parser.add_argument("--charts", type=int, default=30)
+    args = parser.parse_args()
+    lengths = args.points or [48, 144, 1008]
+
+    print(f"{'backend':<11} {'cold start':>10}")
+    for backend in BACKENDS:
+        print(f"{backend:<11} {cold_start(backend):>9.2f}s")
+
+    # Warm up both backends in this process
+    for backend in BACKENDS:
+        render_chart(make_series(10), "COVERAGE", backend)
+
+    print(f"\n{'points':>6} {'backend':<11} {'ms/chart':>9} {'bytes':>8} {'inline':>8}")
+    for points in lengths:
+        series = [make_series(points, seed) for seed in range(args.charts)]
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            images = [render_chart(s, "COVERAGE", backend) for s in series]
+            elapsed = time.perf_counter() - start
+            raw = sum(len(image) for image in images) / len(images)
+            inline = sum(inline_size(image) for image in images) / len(images)
+            print(f"{points:>6} {backend:<11} {elapsed * 1000 / len(images):>9.2f} {raw:>8.0f} {inline:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# This script benchmarks SLA chart rendering with different numbers of worker processes.
+# It shows how to:
+#  - Build synthetic 10_MIN time series for many devices and metrics
+#  - Render every (device, metric) chart with iter_rendered at each worker count
+#  - Report charts per second, speedup over one process, and scaling efficiency per core
+
+# Example usage:
+#   python benchmarks/bench_charts.py
+#   python benchmarks/bench_charts.py --devices 100 1 2 4 8
+
+import os
+import sys
+import time
+import math
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'examples', 'time_series')))
+from chart_render import iter_rendered
+
+BUCKET = 10 * 60 * 1000
+METRICS = ["APPLICATION_CONNECTIVITY", "NETWORK_CONNECTIVITY", "ROAMING", "COVERAGE", "CONGESTION", "INTERFERENCE"]
+
+
+# One job per (device, metric), each with eight hours of 10_MIN points
+def make_jobs(devices, points=48):
+    end = int(time.time() * 1000) // BUCKET * BUCKET
+    for device in range(devices):
+        for n, metric in enumerate(METRICS):
+            yield (f"device-{device}", metric, [
+                {"ts": end - (points - i) * BUCKET, "avg": 0.75 + 0.2 * math.sin((i + device + n) / 5)}
+                for i in range(points)
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("workers", nargs="*", type=int)
+    parser.add_argument("--devices", type=int, default=20)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.workers or sorted({1, 2, 4, cores} & set(range(1, cores + 1))) or [1]
+    total = args.devices * len(METRICS)
+    print(f"{total} charts ({args.devices} devices x {len(METRICS)} metrics), {cores} cores")
+
+    # Load matplotlib once so the first run does not carry the import
+    list(iter_rendered(make_jobs(1), workers=1))
+
+    print(f"{'workers':>7} {'seconds':>8} {'charts/s':>9} {'speedup':>8} {'efficiency':>11}")
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        rendered = sum(1 for _, _, png in iter_rendered(make_jobs(args.devices), workers=workers) if png)
+        elapsed = time.perf_counter() - start
+        assert rendered == total, f"rendered {rendered} of {total} charts"
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {total / elapsed:>9.1f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
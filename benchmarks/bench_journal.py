@@ -0,0 +1,103 @@
+# This script measures what the checkpoint journal costs a bulk job.
+# It shows how to:
+#  - Run the same bulk PATCH job against a local stub server with and without a journal
+#  - Compare batched fsync (the default) with an fsync after every row
+#  - Report the throughput lost to checkpointing as a percentage (best of several interleaved rounds)
+#  - Time Journal.record on its own, since its cost is small next to HTTP noise
+
+# Example usage:
+#   python benchmarks/bench_journal.py
+#   python benchmarks/bench_journal.py 5000 5
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+# auth_utils needs credentials at import time; the stub server ignores them
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("API_SECRET", "benchmark")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api_client import get_session
+from bulk import run_bulk
+from concurrency import AdaptiveConcurrency
+from journal import Journal
+from mock_server import MockServer
+
+# Requests carry their own header so no token is ever requested
+HEADERS = {"Authorization": "Bearer benchmark"}
+
+
+# Returns the throughput of one bulk run in requests per second
+def run(server, count, journal_kwargs=None):
+    session = get_session()
+    jobs = [{"row": n, "agent_id": f"agent-{n}"} for n in range(count)]
+
+    def patch(job):
+        resp = session.patch(f"{server.url}/eyes/agents/{job['agent_id']}",
+                             headers=HEADERS, json={"nickname": "bench"})
+        return resp.ok
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(os.path.join(tmp, "bench.journal"), **journal_kwargs) if journal_kwargs is not None else None
+        # A fixed window keeps the runs comparable
+        controller = AdaptiveConcurrency(initial=8, minimum=8, maximum=8)
+        start = time.perf_counter()
+        succeeded, failed = run_bulk(jobs, patch, controller=controller, journal=journal)
+        if journal:
+            journal.close()
+        elapsed = time.perf_counter() - start
+
+    if failed:
+        raise RuntimeError(f"{failed} requests failed")
+    return count / elapsed
+
+
+# Returns the average cost of Journal.record in seconds, fsync included
+def time_record(count, journal_kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(os.path.join(tmp, "bench.journal"), **journal_kwargs)
+        start = time.perf_counter()
+        for n in range(count):
+            journal.record(n, True, "updated")
+        journal.close()
+        return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    # Keep the progress and summary lines out of the table
+    logging.getLogger().setLevel(logging.WARNING)
+
+    variants = [
+        ("no journal", None),
+        ("journal (batched)", {}),
+        ("journal (fsync/row)", {"sync_every": 1}),
+    ]
+    best = {label: 0.0 for label, _ in variants}
+
+    with MockServer(latency=0.002) as server:
+        # Warm up the connection pool
+        run(server, 200)
+
+        # Interleave the variants so drift on the machine hits all of them alike
+        for _ in range(rounds):
+            for label, journal_kwargs in variants:
+                best[label] = max(best[label], run(server, count, journal_kwargs))
+
+    baseline = best["no journal"]
+    for label, journal_kwargs in variants:
+        overhead = 100 * (1 - best[label] / baseline)
+        line = f"{label:<22} {best[label]:>6.0f} req/s  measured overhead={overhead:+.1f}%"
+        if journal_kwargs is not None:
+            # Share of each request's time spent writing its checkpoint
+            cost = time_record(count, journal_kwargs)
+            line += f"  record={cost * 1e6:.1f}us/row (~{100 * cost * baseline:.2f}% of throughput)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
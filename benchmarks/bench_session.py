@@ -0,0 +1,52 @@
+# This script benchmarks bare requests.get calls against the shared pooled session.
+# It shows how to:
+#  - Start a local stub server that counts TCP connections
+#  - Send the same number of requests with and without connection reuse
+#  - Compare connections opened and wall-clock time for both approaches
+
+# Example usage:
+#   python benchmarks/bench_session.py
+#   python benchmarks/bench_session.py 500
+
+import os
+import sys
+import time
+import requests
+
+# auth_utils needs credentials at import time; the stub server ignores them
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("API_SECRET", "benchmark")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api_client import create_session
+from mock_server import MockServer
+
+# Requests carry their own header so no token is ever requested
+HEADERS = {"Authorization": "Bearer benchmark"}
+
+
+def run(label, server, send, count):
+    server.reset()
+    start = time.perf_counter()
+    for _ in range(count):
+        send(f"{server.url}/eyes/agents", headers=HEADERS).raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} requests={server.requests:<6} connections={server.connections:<6} "
+          f"time={elapsed:.3f}s  ({count / elapsed:.0f} req/s)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with MockServer() as server:
+        # A new connection for every call
+        run("requests.get", server, requests.get, count)
+
+        # One keep-alive connection reused for every call
+        session = create_session()
+        run("pooled session", server, session.get, count)
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
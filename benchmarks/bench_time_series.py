@@ -0,0 +1,97 @@
+# This script benchmarks one-request time-series queries against the chunked fetch planner.
+# It shows how to:
+#  - Serve synthetic 10_MIN time series from a local stub whose response time grows with the number of buckets
+#  - Fetch windows from one day to one month with a single request and with bucket-aligned chunks
+#  - Check that both approaches return the same points and compare wall-clock time
+
+# Example usage:
+#   python benchmarks/bench_time_series.py
+#   python benchmarks/bench_time_series.py 1 7 30 90
+
+import os
+import sys
+import time
+import logging
+from urllib.parse import urlparse, parse_qs
+
+# auth_utils needs credentials at import time; the stub server ignores them
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("API_SECRET", "benchmark")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'examples', 'time_series')))
+from api_client import create_session
+from ts_fetch import fetch_chunked
+from mock_server import MockServer
+
+BUCKET = 10 * 60 * 1000
+DAY = 24 * 60 * 60 * 1000
+
+# Simulated server cost: a fixed round trip plus time per bucket aggregated
+BASE_LATENCY = 0.02
+PER_BUCKET = 0.0002
+
+# A budget large enough that only latency limits throughput
+RATE_HEADERS = {
+    "x-ratelimit-remaining": 10000,
+    "x-ratelimit-burst-capacity": 10000,
+    "x-ratelimit-replenish-rate": 10000,
+    "x-ratelimit-requested-tokens": 1,
+}
+
+HEADERS = {"Authorization": "Bearer benchmark"}
+
+
+# Answers /time-series/agents/numeric/deviceId with one point per bucket in [from, to)
+def route(method, path, body):
+    query = parse_qs(urlparse(path).query)
+    start, end = int(query["from"][0]), int(query["to"][0])
+    first = -(-start // BUCKET) * BUCKET
+    stamps = range(first, end, BUCKET)
+
+    time.sleep(BASE_LATENCY + PER_BUCKET * len(stamps))
+    return 200, RATE_HEADERS, {"results": [{
+        "deviceId": "device-1",
+        "metricAggregates": [{
+            "metric": "COVERAGE",
+            "timeSeries": [{"ts": ts, "avg": (ts // BUCKET % 100) / 100} for ts in stamps],
+        }],
+    }]}
+
+
+def timed(fetch):
+    start = time.perf_counter()
+    results = fetch()
+    return time.perf_counter() - start, results
+
+
+def main():
+    windows = [int(days) for days in sys.argv[1:]] or [1, 7, 30]
+    logging.getLogger().setLevel(logging.WARNING)
+    session = create_session()
+    params = {"timeBucket": "10_MIN", "metrics": "COVERAGE", "aggregateFunctions": "AVG"}
+
+    with MockServer(route) as server:
+        url = f"{server.url}/time-series/agents/numeric/deviceId"
+        # Align the end to a day so the windows are comparable
+        end = int(time.time() * 1000) // DAY * DAY
+
+        print(f"{'window':<8} {'buckets':>8} {'single':>9} {'chunked':>9} {'requests':>9} {'speedup':>8}")
+        for days in windows:
+            start = end - days * DAY
+            single_time, single = timed(lambda: fetch_chunked(
+                url, params, start, end, headers=HEADERS, session=session, chunk_buckets=10 ** 9))
+            server.reset()
+            chunked_time, chunked = timed(lambda: fetch_chunked(
+                url, params, start, end, headers=HEADERS, session=session))
+
+            points = single[0]["metricAggregates"][0]["timeSeries"]
+            assert points == chunked[0]["metricAggregates"][0]["timeSeries"], "chunked result differs"
+            print(f"{days:>3} days {len(points):>8} {single_time:>8.3f}s {chunked_time:>8.3f}s "
+                  f"{server.requests:>9} {single_time / chunked_time:>7.1f}x")
+
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# This module provides a local stub of the API for the benchmark scripts.
+# It shows how to:
+#  - Serve canned JSON responses from a background HTTP/1.1 server with keep-alive
+#  - Add artificial latency to every response to mimic a remote API
+#  - Count how many TCP connections clients open against the server
+
+# Example usage:
+#   with MockServer(latency=0.005) as server:
+#       requests.get(f"{server.url}/eyes/agents")
+#       print(server.connections, server.requests)
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately; without this, Nagle's
+    # algorithm delays every keep-alive response by a delayed-ACK timeout
+    disable_nagle_algorithm = True
+
+    # Called once per accepted TCP connection
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def _respond(self):
+        # Drain any request body so the connection can be reused
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        with self.server.stats_lock:
+            self.server.requests += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        status, headers, payload = self.server.route(self.command, self.path, body)
+        data = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+
+    # Keep benchmark output clean
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # Concurrent benchmarks open many connections at once; the default
+    # backlog of 5 drops the rest and stalls them on SYN retries
+    request_queue_size = 256
+    daemon_threads = True
+
+
+# Default route: 200 with an empty result list for every path
+def default_route(method, path, body):
+    return 200, {}, {"results": []}
+
+
+class MockServer:
+    def __init__(self, route=default_route, latency=0.0):
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.route = route
+        self.httpd.latency = latency
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.stats_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    # Clears the connection and request counters between benchmark runs
+    def reset(self):
+        with self.httpd.stats_lock:
+            self.httpd.connections = 0
+            self.httpd.requests = 0
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
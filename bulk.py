@@ -0,0 +1,237 @@
+# This module provides the building blocks for bulk jobs driven by a CSV file.
+# It shows how to:
+#  - Run one request per job through the adaptive, bounded worker pool
+#  - Record the outcome of every row in a results CSV file
+#  - Print a live progress line with throughput and estimated time remaining
+#  - Report job latency percentiles (p50/p90/p99) once the run is over
+#  - Checkpoint every outcome to a journal so a restarted job skips finished rows
+#  - Stream, validate and dedupe CSV rows so memory stays flat for multi-million-row files
+
+# Example usage:
+#   with ResultsWriter("results.csv", ["hostname", "agent_id", "outcome", "error"]) as results:
+#       run_bulk(jobs, lambda job: license_agent(token, job["agent_id"]), results)
+
+import sys
+import csv
+import time
+import logging
+import threading
+from array import array
+
+from concurrency import AdaptiveConcurrency, iter_adaptive
+
+
+# Thread-safe CSV writer for per-row outcomes.
+# Rows are flushed as they are written so the file is useful even if the job dies.
+class ResultsWriter:
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction="ignore")
+        self.writer.writeheader()
+        self.lock = threading.Lock()
+
+    def write(self, row):
+        with self.lock:
+            self.writer.writerow(row)
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Tracks finished jobs and prints "done/total, failures, rate, ETA" at most once per interval.
+# On a terminal the line is redrawn in place; otherwise it is logged.
+class ProgressReporter:
+    def __init__(self, total=None, interval=1.0, stream=None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.last_print = 0.0
+        # Seconds per job, stored compactly so millions of rows stay cheap
+        self.latencies = array("d")
+        self.lock = threading.Lock()
+
+    def update(self, succeeded, latency=None):
+        with self.lock:
+            self.done += 1
+            if not succeeded:
+                self.failed += 1
+            if latency is not None:
+                self.latencies.append(latency)
+            now = time.monotonic()
+            if now - self.last_print >= self.interval:
+                self.last_print = now
+                self._print(self.line())
+
+    # One expected job turned out to need no request (invalid, a duplicate, or already done)
+    def skip(self):
+        with self.lock:
+            if self.total:
+                self.total -= 1
+
+    # Builds the progress line, e.g. "1200/20000 done, 3 failed | 41.5 req/s | ETA 0:06:44"
+    def line(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.done / elapsed
+        text = f"{self.done}/{self.total}" if self.total else f"{self.done}"
+        text += f" done, {self.failed} failed | {rate:.1f} req/s"
+        if self.total and rate > 0:
+            remaining = int((self.total - self.done) / rate)
+            text += f" | ETA {remaining // 3600}:{remaining // 60 % 60:02d}:{remaining % 60:02d}"
+        return text
+
+    # Returns {percentile: seconds} using the nearest-rank method, or {} before any job finished
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        with self.lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return {}
+        return {p: ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in percentiles}
+
+    # Formats the percentiles, e.g. "p50 120ms, p90 340ms, p99 910ms"
+    def latency_line(self):
+        return ", ".join(f"p{p} {seconds * 1000:.0f}ms" for p, seconds in self.latency_percentiles().items())
+
+    def _print(self, text):
+        if self.stream.isatty():
+            print("\r" + text, end="", file=self.stream, flush=True)
+        else:
+            logging.info(text)
+
+    # Prints the final line
+    def finish(self):
+        with self.lock:
+            text = self.line()
+        if self.stream.isatty():
+            print("\r" + text, file=self.stream, flush=True)
+        else:
+            logging.info(text)
+
+
+# Lazily reads a CSV file object and yields one job per valid row.
+# parse(row_number, row) returns the job dict, or None to skip the row.
+# With key, one job is kept per key(job):
+#  - last=True keeps the last row for a key, so a later row overrides an earlier one. That takes
+#    a first pass over the file before the first job is yielded, so f must be seekable; only the
+#    keys and row numbers are held in memory, never the rows.
+#  - last=False keeps the first row and streams in a single pass, so the first job goes out
+#    right away. Use it when every row for a key asks for the same thing.
+# With progress, its total is set to the number of jobs: exactly after the first pass, or
+# estimated from a raw line count (much cheaper than parsing) and lowered for dropped rows.
+def iter_csv_jobs(f, parse, key=None, last=True, progress=None):
+    start = f.tell()
+    if not (key and last):
+        if progress:
+            progress.total = sum(1 for _ in f) - 1
+            f.seek(start)
+        seen = set()
+        for number, row in enumerate(csv.DictReader(f), start=1):
+            job = parse(number, row)
+            if job is not None and key:
+                job_key = key(job)
+                if job_key in seen:
+                    logging.warning(f"Skipping duplicate row {number}: {job_key}")
+                    job = None
+                else:
+                    seen.add(job_key)
+            if job is not None:
+                yield job
+            elif progress:
+                progress.skip()
+        return
+
+    last_rows = {}
+    for number, row in enumerate(csv.DictReader(f), start=1):
+        job = parse(number, row)
+        if job is None:
+            continue
+        job_key = key(job)
+        if job_key in last_rows:
+            logging.warning(f"Row {number} replaces duplicate row {last_rows[job_key]}: {job_key}")
+        last_rows[job_key] = number
+    keep = set(last_rows.values())
+    del last_rows
+    if progress:
+        progress.total = len(keep)
+
+    f.seek(start)
+    for number, row in enumerate(csv.DictReader(f), start=1):
+        if number in keep:
+            yield parse(number, row)
+
+
+# Drops the jobs the journal has as done, counting them off the progress total
+def _pending(jobs, journal, key, progress):
+    for job in jobs:
+        if journal.is_done(key(job)):
+            progress.skip()
+        else:
+            yield job
+
+
+# Runs func(job) for every job on the adaptive worker pool.
+# func returns True on success; False or an exception counts as a failure.
+# Each job dict is written to `results` with "outcome" and "error" added.
+# With a journal, jobs whose key(job) succeeded in an earlier run are skipped
+# and every new outcome is recorded under key(job).
+# Jobs may be a list or a lazy iterator; iterators are consumed as workers free up.
+# Pass a ProgressReporter as `progress` to read latency percentiles afterwards.
+# Returns (succeeded, failed) counts for the jobs run this time.
+def run_bulk(jobs, func, results=None, total=None, controller=None,
+             success="success", failure="failed", journal=None, key=None, progress=None):
+    progress = progress or ProgressReporter(total)
+    if journal:
+        key = key or (lambda job: job["row"])
+        if hasattr(jobs, "__len__"):
+            pending = [job for job in jobs if not journal.is_done(key(job))]
+            if len(pending) < len(jobs):
+                logging.info(f"Resuming from journal {journal.path}: "
+                             f"skipping {len(jobs) - len(pending)} completed rows")
+            jobs = pending
+        else:
+            jobs = _pending(jobs, journal, key, progress)
+
+    if total is None and hasattr(jobs, "__len__"):
+        total = len(jobs)
+    if progress.total is None:
+        progress.total = total
+    controller = controller or AdaptiveConcurrency()
+
+    def run_one(job):
+        error = ""
+        started = time.perf_counter()
+        try:
+            ok = bool(func(job))
+        except Exception as e:
+            ok = False
+            error = str(e)
+            logging.error(f"Job {job} failed: {e}")
+        latency = time.perf_counter() - started
+
+        outcome = success if ok else failure
+        if results:
+            results.write({**job, "outcome": outcome, "error": error})
+        if journal:
+            journal.record(key(job), ok, outcome, error)
+        progress.update(ok, latency)
+        return ok
+
+    succeeded = failed = 0
+    for ok in iter_adaptive(jobs, run_one, controller):
+        if ok:
+            succeeded += 1
+        else:
+            failed += 1
+    progress.finish()
+
+    return succeeded, failed
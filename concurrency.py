@@ -0,0 +1,177 @@
+# This module provides an adaptive concurrency controller for bulk jobs.
+# It shows how to:
+#  - Grow the number of in-flight requests while latency and the rate limit budget stay healthy
+#  - Cut it sharply on 429 responses or latency spikes (AIMD: additive increase, multiplicative decrease)
+#  - Feed the controller from every response of the shared session through a response hook
+#  - Report the current window and observed throughput as metrics
+
+# Example usage:
+#   controller = AdaptiveConcurrency()
+#   results = run_adaptive(agent_ids, lambda agent_id: license_agent(token, agent_id), controller)
+#   print(controller.metrics())
+
+import time
+import logging
+import threading
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import POOL_SIZE, get_session, header_number
+
+
+class AdaptiveConcurrency:
+    # initial/minimum/maximum: bounds for the number of requests in flight.
+    # The maximum defaults to the HTTP connection pool size.
+    # latency_factor: a response slower than this multiple of the baseline is a spike.
+    # remaining_floor: stop growing once less than this share of the budget is left.
+    # decrease: factor applied to the window on a 429 or latency spike.
+    # drift: weight of a spike in the latency baseline, so a lasting change in
+    # latency becomes the new normal instead of counting as a spike forever.
+    def __init__(self, initial=2, minimum=1, maximum=POOL_SIZE,
+                 latency_factor=3.0, remaining_floor=0.2, decrease=0.5, drift=0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = float(max(minimum, min(initial, maximum)))
+        self.latency_factor = latency_factor
+        self.remaining_floor = remaining_floor
+        self.decrease = decrease
+        self.drift = drift
+
+        self.in_flight = 0
+        self.completed = 0
+        self.throttled = 0
+        self.baseline_latency = None
+        self.last_decrease = 0.0
+        self.started = time.monotonic()
+
+        # Completion times used for the recent throughput figure
+        self.recent = deque()
+        self.cond = threading.Condition()
+
+    # Current number of requests allowed in flight
+    @property
+    def limit(self):
+        return max(self.minimum, int(self.window))
+
+    # Blocks until another request may start
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+
+    # Marks a request as finished
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    # Records one response and adjusts the window.
+    # remaining and capacity come from the x-ratelimit-* headers when present.
+    def observe(self, status_code, latency, remaining=None, capacity=None):
+        now = time.monotonic()
+        with self.cond:
+            self.completed += 1
+            self.recent.append(now)
+
+            spike = (self.baseline_latency is not None
+                     and latency > self.baseline_latency * self.latency_factor)
+
+            if status_code == 429 or spike:
+                if status_code == 429:
+                    self.throttled += 1
+                elif spike:
+                    # Move slowly toward the slower latency; if it lasts, it stops being a spike
+                    self.baseline_latency += self.drift * (latency - self.baseline_latency)
+                # Responses already in flight report the same problem; only
+                # cut once per round trip so the window does not collapse to 1
+                if now - self.last_decrease > (self.baseline_latency or latency):
+                    self.window = max(self.minimum, self.window * self.decrease)
+                    self.last_decrease = now
+                    logging.debug(f"Concurrency decreased to {self.limit} "
+                                  f"(status {status_code}, latency {latency:.3f}s)")
+            else:
+                # Track typical latency from healthy responses only
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+
+                # Grow by about one request per window of healthy responses,
+                # unless the rate limit budget is running low
+                budget_ok = (remaining is None or not capacity
+                             or remaining / capacity >= self.remaining_floor)
+                if budget_ok:
+                    self.window = min(self.maximum, self.window + 1 / self.window)
+
+            self.cond.notify_all()
+
+    # requests response hook: session.hooks["response"].append(controller.observe_response)
+    def observe_response(self, response, *args, **kwargs):
+        remaining = header_number(response.headers, "x-ratelimit-remaining")
+        capacity = header_number(response.headers, "x-ratelimit-burst-capacity")
+        self.observe(response.status_code, response.elapsed.total_seconds(), remaining, capacity)
+
+    # Attaches the controller to a session for the duration of a "with" block
+    @contextlib.contextmanager
+    def attached(self, session=None):
+        session = session or get_session()
+        session.hooks["response"].append(self.observe_response)
+        try:
+            yield self
+        finally:
+            session.hooks["response"].remove(self.observe_response)
+
+    # Current window and observed throughput
+    def metrics(self, period=10.0):
+        now = time.monotonic()
+        with self.cond:
+            while self.recent and now - self.recent[0] > period:
+                self.recent.popleft()
+            elapsed = max(now - self.started, 1e-9)
+            return {
+                "window": self.limit,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "throttled": self.throttled,
+                "baseline_latency": self.baseline_latency,
+                "throughput": self.completed / elapsed,
+                "recent_throughput": len(self.recent) / min(period, elapsed),
+            }
+
+
+# Runs func(item) for every item, letting the controller decide how many run at once.
+# Responses from the shared session feed the controller while the job runs.
+# Items are pulled lazily and results are yielded in the same order as items; at most
+# 2 * controller.maximum results wait for the caller, so memory stays flat for any input size.
+def iter_adaptive(items, func, controller=None, session=None):
+    controller = controller or AdaptiveConcurrency()
+    backlog = 2 * controller.maximum
+
+    def run_one(item):
+        try:
+            return func(item)
+        finally:
+            controller.release()
+
+    pending = deque()
+    with controller.attached(session), ThreadPoolExecutor(max_workers=controller.maximum) as pool:
+        for item in items:
+            # Hand finished results back in order, and wait for the oldest one
+            # if the caller has fallen too far behind
+            while pending and (pending[0].done() or len(pending) >= backlog):
+                yield pending.popleft().result()
+            controller.acquire()
+            pending.append(pool.submit(run_one, item))
+        while pending:
+            yield pending.popleft().result()
+
+    metrics = controller.metrics()
+    logging.info(f"Completed {metrics['completed']} requests at {metrics['throughput']:.1f} req/s "
+                 f"(final window {metrics['window']}, throttled {metrics['throttled']})")
+
+
+# Like iter_adaptive, but returns all results as a list.
+def run_adaptive(items, func, controller=None, session=None):
+    return list(iter_adaptive(items, func, controller, session))
@@ -1,6 +1,6 @@
 # This script demonstrates how to make an authenticated API call to fetch access points.
 # It shows how to:
-#  - Retrieve access points from the /access-points/agents endpoint
+#  - Retrieve access points from the /access-points/agents endpoint, following every page
 #  - Log details such as ID, name, controller, MAC address, and location ID
 
 import os
@@ -11,6 +11,8 @@ import sys
 # Add parent directory to path so we can import auth_utils
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from pagination import iter_results
 
 # Setup logging configuration
 logging.basicConfig(
@@ -21,6 +23,9 @@ logging.basicConfig(
 # Define API host from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def fetch_accesspoints(token):
     # Fetch access points from the API and log them.
 
@@ -36,13 +41,8 @@ def fetch_accesspoints(token):
     logging.info("Fetching access points from %s", url)
 
     try:
-        # Send GET request to the API
-        response = requests.get(url, headers=headers)
-        # Raise an error if the response status code is not 200
-        response.raise_for_status()
-
-        # Parse the JSON response into a dictionary
-        data = response.json()
+        # Send a GET request to the API for each page; errors are raised by the pager
+        data = {"results": list(iter_results(url, headers=headers, session=session))}
         logging.info("Access points fetched successfully.")
 
         # Log the access point details in a readable format
@@ -0,0 +1,203 @@
+# This module compares the desired state of Eyes Agents from a CSV file with their current state.
+# It shows how to:
+#  - Match CSV rows to agents by hostname
+#  - Keep only the fields whose current value differs from the desired value
+#  - Split rows into updates, unchanged agents and hostnames with no match
+#  - Log a dry-run summary so a rerun can be checked before any PATCH is sent
+#  - Stream the needed updates one row at a time for large CSV files
+#  - Look agents up in the local agent index (AGENT_INDEX_FILE) instead of downloading the fleet
+#  - Pick a matching strategy from the input size: filtered queries for a handful of
+#    hostnames, a full agent list scan when the input covers a large part of the fleet
+
+# Example usage:
+#   targets = [(1, "laptop-john", {"isLicensed": True})]
+#   plan = plan_agent_updates(targets, agents_dict)
+#   log_plan_summary(plan, dry_run=True)
+
+import os
+import logging
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_index import AGENT_INDEX_FILE, AgentIndex
+from api_client import POOL_SIZE, get_session, api_url
+from pagination import iter_pages
+
+# How many planned updates a dry run lists individually
+DRY_RUN_PREVIEW = 20
+
+# Inputs with at most this many hostnames are matched with filtered queries...
+AGENT_FILTER_MAX = int(os.getenv("AGENT_FILTER_MAX", "200"))
+# ...as long as they are no more than this share of the fleet
+AGENT_FILTER_RATIO = float(os.getenv("AGENT_FILTER_RATIO", "0.05"))
+# Query parameter that filters /eyes/agents by name, and how many names go in one request.
+# One name per request relies only on the plain name filter; raise the batch size only
+# for an API that accepts a comma-separated list of names.
+AGENT_FILTER_PARAM = os.getenv("AGENT_FILTER_PARAM", "name")
+AGENT_FILTER_BATCH = int(os.getenv("AGENT_FILTER_BATCH", "1"))
+
+
+# Raised when a filtered query returns the whole fleet, or nothing for several names
+class FilterNotApplied(Exception):
+    pass
+
+
+# Returns an object whose .get(lowercased hostname) returns the agent or None,
+# together with the targets to iterate (the start of the input may have been read ahead).
+#  - With AGENT_INDEX_FILE set, the local index is refreshed and queried; pass the lookup
+#    to close_lookup when done. If the refresh fails, the steps below are used instead.
+#  - A small input (few hostnames compared to the fleet) is matched with filtered queries.
+#  - Otherwise every agent is downloaded with fetch_agents(token).
+def agent_lookup(token, fetch_agents, targets):
+    headers = {"Authorization": f"Bearer {token}"}
+    if AGENT_INDEX_FILE:
+        index = AgentIndex(AGENT_INDEX_FILE)
+        try:
+            return index.refresh(headers=headers), targets
+        except Exception as e:
+            logging.error(f"Failed to refresh agent index {AGENT_INDEX_FILE}: {e}")
+            index.close()
+
+    # Read just far enough into the input to know whether it is small
+    head = list(itertools.islice(targets, AGENT_FILTER_MAX + 1))
+    targets = itertools.chain(head, targets)
+
+    if len(head) <= AGENT_FILTER_MAX:
+        hostnames = {target[1] for target in head}
+        fleet = fleet_size(headers)
+        if fleet and len(hostnames) <= fleet * AGENT_FILTER_RATIO:
+            logging.info(f"Looking up {len(hostnames)} hostnames with filtered queries ({fleet} agents in total)")
+            try:
+                return fetch_agents_by_name(hostnames, fleet, headers), targets
+            except FilterNotApplied:
+                logging.warning(f"/eyes/agents did not apply the '{AGENT_FILTER_PARAM}' filter as expected; "
+                                f"falling back to the full agent list")
+
+    return {(a.get("name") or "").lower(): a for a in fetch_agents(token)}, targets
+
+
+# Closes the lookup returned by agent_lookup if it holds a database connection
+def close_lookup(lookup):
+    if isinstance(lookup, AgentIndex):
+        lookup.close()
+
+
+# Returns the number of agents in the fleet from a one-record page, or None if it is unknown
+def fleet_size(headers=None, session=None):
+    session = session or get_session()
+    try:
+        pages = iter_pages(api_url("/eyes/agents"), headers=headers, per_page=1, session=session, prefetch=False)
+        data = next(pages)
+        pages.close()
+    except Exception as e:
+        logging.warning(f"Could not read the number of agents: {e}")
+        return None
+    return (data.get("pagination") or {}).get("total")
+
+
+# Queries /eyes/agents filtered by batches of hostnames and returns exact matches keyed by lowercased name.
+# Raises FilterNotApplied if a query returns the whole fleet, or if a batch of several
+# names returns no agents at all (the API may read the list as one literal name).
+def fetch_agents_by_name(hostnames, fleet, headers=None, session=None):
+    session = session or get_session()
+    names = sorted(hostnames)
+    batches = [names[i:i + AGENT_FILTER_BATCH] for i in range(0, len(names), AGENT_FILTER_BATCH)]
+
+    def fetch(batch):
+        params = {AGENT_FILTER_PARAM: ",".join(batch)}
+        agents = []
+        for data in iter_pages(api_url("/eyes/agents"), headers=headers, params=params, session=session):
+            # An unfiltered answer would mean paging through every agent for every batch
+            total = (data.get("pagination") or {}).get("total")
+            if total and total >= fleet > len(batch):
+                raise FilterNotApplied()
+            agents.extend(data.get("results", []))
+        # No record for a single name just means no such agent
+        if not agents and len(batch) > 1:
+            raise FilterNotApplied()
+        return agents
+
+    found = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(POOL_SIZE, len(batches)))) as pool:
+        for agents in pool.map(fetch, batches):
+            for agent in agents:
+                name = (agent.get("name") or "").lower()
+                # The filter may match loosely; keep exact hostname matches only
+                if name in hostnames:
+                    found[name] = agent
+    return found
+
+
+# Records a successful PATCH in the lookup so the local index stays current
+def apply_update(agents_dict, entry):
+    if isinstance(agents_dict, AgentIndex):
+        agents_dict.update_fields(entry["agent_id"], entry["fields"])
+    else:
+        agents_dict[entry["hostname"]] = {**agents_dict[entry["hostname"]], **entry["fields"]}
+
+
+# Returns the desired fields whose value differs from the agent's current value.
+def changed_fields(agent, desired):
+    return {field: value for field, value in desired.items() if agent.get(field) != value}
+
+
+# Returns ("update" | "unchanged" | "no_match", entry) for one target row.
+def classify_target(row, hostname, desired, agents_dict):
+    entry = {"row": row, "hostname": hostname, "agent_id": None, "fields": {}}
+
+    match = agents_dict.get(hostname)
+    if not match:
+        return "no_match", entry
+
+    entry["agent_id"] = match["id"]
+    entry["fields"] = changed_fields(match, desired)
+    return ("update" if entry["fields"] else "unchanged"), entry
+
+
+# Builds the list of mutations actually needed.
+# targets: iterable of (row_number, hostname, desired_fields); hostname is already lowercased.
+# agents_dict: current agents keyed by lowercased name.
+# Returns {"update": [...], "unchanged": [...], "no_match": [...]} where each entry is
+# {"row", "hostname", "agent_id", "fields"}.
+def plan_agent_updates(targets, agents_dict):
+    plan = {"update": [], "unchanged": [], "no_match": []}
+
+    for target in targets:
+        kind, entry = classify_target(*target, agents_dict)
+        plan[kind].append(entry)
+
+    return plan
+
+
+# Lazily yields the entries that need a PATCH, so targets can be streamed from a CSV file.
+# Unchanged and unmatched entries are passed to skipped(kind, entry) instead,
+# and every entry is counted in `counts` (a dict keyed like the plan).
+def iter_agent_updates(targets, agents_dict, counts, skipped=None):
+    for target in targets:
+        kind, entry = classify_target(*target, agents_dict)
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind == "update":
+            yield entry
+        elif skipped:
+            skipped(kind, entry)
+
+
+# Formats per-kind counts, e.g. "3 to update, 10 already up to date, 1 with no matching agent"
+def summary_line(counts):
+    return (f"{counts.get('update', 0)} to update, {counts.get('unchanged', 0)} already up to date, "
+            f"{counts.get('no_match', 0)} with no matching agent")
+
+
+# Logs how many rows need a PATCH, are already up to date, or have no matching agent.
+# In a dry run the first planned updates are listed too.
+def log_plan_summary(plan, dry_run=False):
+    logging.info(summary_line({kind: len(entries) for kind, entries in plan.items()}))
+    for entry in plan["no_match"]:
+        logging.warning(f"No match for hostname: {entry['hostname']}")
+
+    if dry_run:
+        for entry in plan["update"][:DRY_RUN_PREVIEW]:
+            logging.info(f"Would update {entry['hostname']} ({entry['agent_id']}): {entry['fields']}")
+        if len(plan["update"]) > DRY_RUN_PREVIEW:
+            logging.info(f"... and {len(plan['update']) - DRY_RUN_PREVIEW} more")
+        logging.info("Dry run: no changes were sent")
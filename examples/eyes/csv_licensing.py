@@ -1,25 +1,39 @@
 # This script demonstrates how to license Eyes Agents in bulk using a CSV file.
 # It shows how to:
-#  - Fetch all Eyes Agents from the /eyes/agents endpoint
-#  - Read a list of hostnames from a CSV file
+#  - Fetch all Eyes Agents from the /eyes/agents endpoint, following every page
+#  - Stream hostnames from a CSV file, dropping empty and duplicate rows, so memory stays flat
 #  - Match agents by hostname using a dictionary lookup for efficiency
 #  - Send a PATCH request to update each matched agent's "isLicensed" field to True
+#  - Let an adaptive concurrency controller decide how many PATCH requests run at once
+#  - Stay inside the shared rate limit budget with handle_rate_limits
+#  - Write the outcome of every CSV row to a results file and print a live throughput/ETA line
+#  - Skip agents that are already licensed, and preview the changes with --dry-run
 
 # Example usage:
 #   python3 csv_licensing.py agents.csv
+#   python3 csv_licensing.py agents.csv licensing_results.csv
+#   python3 csv_licensing.py agents.csv --dry-run
 
 import os
-import csv
 import logging
-import requests
 import sys
 
 # Make sure we can import get_token
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from pagination import iter_results_parallel
+from bulk import ProgressReporter, ResultsWriter, iter_csv_jobs, run_bulk
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'rate_limiting')))
+from rate_limit import handle_rate_limits
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from agent_sync import agent_lookup, close_lookup, apply_update, plan_agent_updates, iter_agent_updates, log_plan_summary, summary_line
 
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 # Fetch all agents from the Eyes API
 def fetch_agents(token):
     url = f"https://{API_HOST}/eyes/agents"
@@ -27,22 +41,24 @@ def fetch_agents(token):
         "Authorization": f"Bearer {token}"
     }
     try:
-        # GET request to fetch agents
-        resp = requests.get(url, headers=headers)
-        # Raise error if HTTP request fails
-        resp.raise_for_status()
-        # Return list of agents
-        return resp.json().get("results", [])
+        # GET every page of agents, pages 2..N in parallel; HTTP errors are raised by the pager
+        return list(iter_results_parallel(url, headers=headers, session=session))
     except Exception as e:
         logging.error(f"Failed to fetch agents: {e}")
         return []
 
-# License a specific agent by ID
+# Columns of the results file
+RESULT_FIELDS = ["row", "hostname", "agent_id", "outcome", "error"]
+
+# License a specific agent by ID.
+# Returns True if the agent was licensed.
 def license_agent(token, agent_id):
     url = f"https://{API_HOST}/eyes/agents/{agent_id}"
 
+    # No Authorization header: the shared session adds a current token to every request,
+    # so a long job keeps working after the startup token expires
     headers = {
-        "Authorization": f"Bearer {token}", "Content-Type": "application/json"
+        "Content-Type": "application/json"
     }
 
     # Set licensing flag to True
@@ -50,59 +66,100 @@ def license_agent(token, agent_id):
         "isLicensed": True
     }
 
+    def api_call():
+        return session.patch(url, headers=headers, json=payload)
+
     try:
-        # PATCH request
-        resp = requests.patch(url, headers=headers, json=payload)
-        # Raise error if request fails
-        resp.raise_for_status()
+        # PATCH request, paced by the shared rate limiter and retried on 429
+        if handle_rate_limits(api_call) is None:
+            return False
         # Log success
-        logging.info(f"Licensed agent {agent_id} successfully")
+        logging.debug(f"Licensed agent {agent_id} successfully")
+        return True
     except Exception as e:
         # Log failure
         logging.error(f"Failed to license agent {agent_id}: {e}")
+        return False
+
+# Turns a CSV row into a job, or None for rows without a hostname
+def parse_row(number, row):
+    hostname = (row.get("hostname") or "").strip().lower()
+    if not hostname:
+        # Skip empty rows
+        return None
+    return {"row": number, "hostname": hostname}
 
 # Main function that runs the script
 def main():
     # Get API token
     token, _ = get_token()
 
+    # --dry-run only prints what would change
+    dry_run = "--dry-run" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+
     # CSV file provided as a command-line prompt
-    if len(sys.argv) < 2:
-        logging.error("Usage: python3 csv_licensing.py <csv_file>")
+    if not args:
+        logging.error("Usage: python3 csv_licensing.py <csv_file> [results_file] [--dry-run]")
         return
-    csv_file = sys.argv[1]
+    csv_file = args[0]
+
+    # Per-row outcomes go next to the input file unless a path is given
+    results_file = args[1] if len(args) > 1 else f"{os.path.splitext(csv_file)[0]}_results.csv"
 
-    # Read CSV file 
+    # Open the CSV file; rows are read lazily while the requests go out
     try:
-        with open(csv_file) as f:
-            csv_rows = csv.DictReader(f)
-            # rows are dictionaries with a "hostname" column
-            rows = list(csv_rows)
-    except Exception as e:
+        f = open(csv_file, newline="")
+    except OSError as e:
         logging.error(f"Error reading CSV {csv_file}: {e}")
         return
 
-    # Fetch all agents from API
-    agents = fetch_agents(token)
-
-  # Build a lookup dictionary
-    agents_dict = { (a.get("name") or "").lower(): a for a in agents }
-
-    # Loop over each row in the CSV
-    for row in rows:
-        hostname = (row.get("hostname") or "").strip().lower()
-        if not hostname:
-            # Skip empty rows
-            continue
-
-        # Lookup agent directly
-        match = agents_dict.get(hostname)
-        if match:
-            # License the matched agent
-            license_agent(token, match["id"])
-        else:
-            # Warn if no agent found
-            logging.warning(f"No match for hostname: {hostname}")
+    progress = ProgressReporter()
+    with f:
+        # Every row with a hostname should end up licensed. All rows for a hostname ask for
+        # the same thing, so the first one is kept and the file is read in a single pass.
+        targets = ((job["row"], job["hostname"], {"isLicensed": True})
+                   for job in iter_csv_jobs(f, parse_row, key=lambda job: job["hostname"],
+                                            last=False, progress=progress))
+
+        # Lookup by lowercased hostname: the local agent index when AGENT_INDEX_FILE is set,
+        # filtered queries for a few hostnames, otherwise a dictionary built from every agent
+        agents_dict, targets = agent_lookup(token, fetch_agents, targets)
+        try:
+            if dry_run:
+                log_plan_summary(plan_agent_updates(targets, agents_dict), dry_run)
+                return
+
+            counts = {}
+            with ResultsWriter(results_file, RESULT_FIELDS) as results:
+                # Rows that need no PATCH are recorded as they stream past
+                def skipped(kind, entry):
+                    if kind == "no_match":
+                        logging.warning(f"No match for hostname: {entry['hostname']}")
+                    results.write({**entry, "outcome": kind})
+                    progress.skip()
+
+                # License one agent and keep the lookup current
+                def license(job):
+                    ok = license_agent(token, job["agent_id"])
+                    if ok:
+                        apply_update(agents_dict, job)
+                    return ok
+
+                # License the agents that are not licensed yet on the adaptive worker pool
+                licensed, failed = run_bulk(
+                    iter_agent_updates(targets, agents_dict, counts, skipped),
+                    license,
+                    results,
+                    success="licensed",
+                    progress=progress
+                )
+        finally:
+            # The agent index holds a database connection
+            close_lookup(agents_dict)
+
+    logging.info(summary_line(counts))
+    logging.info(f"Licensed {licensed} agents, {failed} failed. Results written to {results_file}")
 
 if __name__ == "__main__":
     main()
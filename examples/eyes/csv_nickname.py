@@ -1,46 +1,57 @@
 # This script demonstrates how to update the "nickname" of Eyes Agents in bulk using a CSV file.
 # It shows how to:
-#  - Fetch all Eyes Agents from the /eyes/agents endpoint
-#  - Read hostnames and nicknames from a CSV file (passed as a command-line argument)
+#  - Fetch all Eyes Agents from the /eyes/agents endpoint, following every page
+#  - Stream hostnames and nicknames from a CSV file (passed as a command-line argument) so memory stays flat
 #  - Match agents by hostname using a dictionary lookup
-#  - Send a PATCH request to update each matched agent's "nickname"
+#  - Send a PATCH request to update each matched agent's "nickname", paced by the shared rate limiter
+#  - Let an adaptive concurrency controller decide how many PATCH requests run at once
+#  - Skip agents that already have the requested nickname, and preview the changes with --dry-run
+#  - Record every outcome in a journal (<csv>.journal) so a rerun after a crash resumes where it stopped
 
 # Example usage:
 #   python3 csv_nickname.py agents.csv
+#   python3 csv_nickname.py agents.csv --dry-run
 
 import os
-import csv
 import logging
-import requests
 import sys
 
 # Make sure we can import get_token
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from pagination import iter_results_parallel
+from bulk import ProgressReporter, iter_csv_jobs, run_bulk
+from journal import Journal
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'rate_limiting')))
+from rate_limit import handle_rate_limits
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from agent_sync import agent_lookup, close_lookup, apply_update, plan_agent_updates, iter_agent_updates, log_plan_summary, summary_line
 
 # API host url
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 # Fetch all Eyes Agents from API
 def fetch_agents(token):
     url = f"https://{API_HOST}/eyes/agents"
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        # GET request to fetch agents
-        resp = requests.get(url, headers=headers)
-        # Raise error if status is not 200
-        resp.raise_for_status()
-        # Return list of agents
-        return resp.json().get("results", [])
+        # GET every page of agents, pages 2..N in parallel; HTTP errors are raised by the pager
+        return list(iter_results_parallel(url, headers=headers, session=session))
     except Exception as e:
         logging.error(f"Failed to fetch agents: {e}")
         return []
 
-# Update nickname for a specific agent
+# Update nickname for a specific agent.
+# Returns True if the nickname was updated.
 def update_nickname(token, agent_id, nickname):
     url = f"https://{API_HOST}/eyes/agents/{agent_id}"
+    # No Authorization header: the shared session adds a current token to every request,
+    # so a long job keeps working after the startup token expires
     headers = {
-        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
 
@@ -49,60 +60,95 @@ def update_nickname(token, agent_id, nickname):
         "nickname": nickname
         }
 
+    def api_call():
+        return session.patch(url, headers=headers, json=payload)
+
     try:
-        # Send a PATCH request to update the agent's nickname
-        resp = requests.patch(url, headers=headers, json=payload)
-        # Raise error if response is not OK
-        resp.raise_for_status()
+        # PATCH request, paced by the shared rate limiter and retried on 429
+        if handle_rate_limits(api_call) is None:
+            return False
         # Log success
-        logging.info(f"Updated agent {agent_id} nickname -> {nickname}")
+        logging.debug(f"Updated agent {agent_id} nickname -> {nickname}")
+        return True
     except Exception as e:
         # Log failure
         logging.error(f"Failed to update nickname for agent {agent_id}: {e}")
+        return False
+
+# Turns a CSV row (hostname,nickname) into a job, or None if either value is missing
+def parse_row(number, row):
+    hostname = (row.get("hostname") or "").strip().lower()
+    nickname = (row.get("nickname") or "").strip()
+    if not hostname or not nickname:
+        return None
+    return {"row": number, "hostname": hostname, "nickname": nickname}
 
 # Main function that runs the script
 def main():
     # Get authentication token
     token, _ = get_token()
 
+    # --dry-run only prints what would change
+    dry_run = "--dry-run" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+
     # CSV file provided as a command-line prompt
-    if len(sys.argv) < 2:
-        logging.error("Usage: python3 csv_nickname.py <csv_file>")
+    if not args:
+        logging.error("Usage: python3 csv_nickname.py <csv_file> [--dry-run]")
         return
-    csv_file = sys.argv[1]
+    csv_file = args[0]
 
-    # Read CSV file with columns: hostname,nickname
+    # Open the CSV file with columns: hostname,nickname; rows are read lazily
     try:
-        with open(csv_file) as f:
-            # Each row is a dict: hostname,nickname
-            rows = list(csv.DictReader(f))  # Each row is a dict: hostname,nickname
-    except Exception as e:
+        f = open(csv_file, newline="")
+    except OSError as e:
         logging.error(f"Error reading CSV {csv_file}: {e}")
         return
 
-    # Get current agents from the API
-    agents = fetch_agents(token)
-
-    # Build dictionary for quick lookup
-    agents_dict = {(a.get("name") or "").lower(): a for a in agents}
-
-    # Loop through CSV rows
-    for row in rows:
-        hostname = (row.get("hostname") or "").strip().lower()
-        nickname = (row.get("nickname") or "").strip()
-
-        # Skip if hostname or nickname missing
-        if not hostname or not nickname:
-            continue 
-
-        # Lookup agent directly
-        match = agents_dict.get(hostname)
-        if match:
-            # If match found, update nickname
-            update_nickname(token, match["id"], nickname)
-        else:
-            # If no match, log a warning
-            logging.warning(f"No match for hostname: {hostname}")
-        
+    progress = ProgressReporter()
+    with f:
+        # One target per hostname; the last row for a hostname wins
+        targets = ((job["row"], job["hostname"], {"nickname": job["nickname"]})
+                   for job in iter_csv_jobs(f, parse_row, key=lambda job: job["hostname"], progress=progress))
+
+        # Lookup by lowercased hostname: the local agent index when AGENT_INDEX_FILE is set,
+        # filtered queries for a few hostnames, otherwise a dictionary built from every agent
+        agents_dict, targets = agent_lookup(token, fetch_agents, targets)
+        try:
+            if dry_run:
+                log_plan_summary(plan_agent_updates(targets, agents_dict), dry_run)
+                return
+
+            def skipped(kind, entry):
+                if kind == "no_match":
+                    logging.warning(f"No match for hostname: {entry['hostname']}")
+                progress.skip()
+
+            # Update one nickname and keep the lookup current
+            def update(job):
+                ok = update_nickname(token, job["agent_id"], job["fields"]["nickname"])
+                if ok:
+                    apply_update(agents_dict, job)
+                return ok
+
+            # Update the nicknames that differ on the adaptive worker pool; rows that
+            # already succeeded in an interrupted run are skipped, failures are retried
+            counts = {}
+            with Journal(f"{os.path.splitext(csv_file)[0]}.journal") as journal:
+                updated, failed = run_bulk(
+                    iter_agent_updates(targets, agents_dict, counts, skipped),
+                    update,
+                    success="updated",
+                    journal=journal,
+                    key=lambda job: f"{job['hostname']}:{job['fields']['nickname']}",
+                    progress=progress
+                )
+        finally:
+            # The agent index holds a database connection
+            close_lookup(agents_dict)
+
+    logging.info(summary_line(counts))
+    logging.info(f"Updated {updated} nicknames, {failed} failed")
+
 if __name__ == "__main__":
     main()
@@ -11,6 +11,7 @@ import logging
 # Make sure we can import get_token
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
 
 # Setup logging configuration
 logging.basicConfig(
@@ -21,6 +22,9 @@ logging.basicConfig(
 # # Define API Host and Agent ID from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def fetch_agent_by_id(token, agent_id):
 
     # Construct the full API URL for fetching the agent by its ID
@@ -33,7 +37,7 @@ def fetch_agent_by_id(token, agent_id):
 
     try:
         # send the GET request to the agents endpoint
-        response = requests.get(agent_url, headers=headers)
+        response = session.get(agent_url, headers=headers)
         response.raise_for_status()
         data = response.json()
         
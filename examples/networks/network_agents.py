@@ -1,6 +1,7 @@
 # This script demonstrates how to make an authenticated API call to fetch network agents.
 # It shows how to:
 #  - Retrieve network agents from the /networks/agents endpoint
+#  - Reuse network agents from the reference cache (REFERENCE_CACHE_FILE) until they expire
 #  - Log each agent's ID, name, enabled status, creation date, and last update date
 
 import os
@@ -11,6 +12,8 @@ import sys
 # Ensure we can import get_token from two levels up
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from reference_cache import reference_cache
 
 # Setup logging configuration
 logging.basicConfig(
@@ -21,6 +24,9 @@ logging.basicConfig(
 # Define API host from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def fetch_networks_agents(token):
     # Fetch network agent data from the API.
 
@@ -36,13 +42,8 @@ def fetch_networks_agents(token):
     logging.info("Fetching networks agents from %s", url)
 
     try:
-        # Send GET request to the API.
-        response = requests.get(url, headers=headers)
-        # Raise an exception if the response status code is an error.
-        response.raise_for_status()
-
-        # Parse the response as JSON.
-        data = response.json()
+        # Served from the reference cache when fresh, otherwise fetched from the API.
+        data = {"results": reference_cache.network_agents(headers, session)}
         logging.info("Networks Agents fetched successfully.")
         return data
     
@@ -12,6 +12,7 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
 
 # Setup logging configuration
 logging.basicConfig(
@@ -22,6 +23,9 @@ logging.basicConfig(
 # Environment variables
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def start_packet_capture(token, sensor_id):
     # Sends a POST request to initiate packet capture on a given sensor/AP.
     url = f"https://{API_HOST}/on-demand-tests/sensors/{sensor_id}/packet-capture"
@@ -43,7 +47,7 @@ def start_packet_capture(token, sensor_id):
     logging.debug(f"POST {url} with payload: {payload}")
 
     # Make the POST request to start the capture
-    response = requests.post(url, headers=headers, json=payload)
+    response = session.post(url, headers=headers, json=payload)
 
     # If response code is not successful, log the error content for troubleshooting
     if not response.ok:
@@ -66,7 +70,7 @@ def get_packet_capture_status(token, sensor_id, test_id):
     logging.debug(f"GET {url} for status check")
     try:
         # Send GET request to retrieve current capture status
-        response = requests.get(url, headers=headers)
+        response = session.get(url, headers=headers)
         if response.status_code == 404:
             # If status file not found (404), capture file not ready yet, so return None to retry later
             logging.info("Status file not ready yet (404), will retry...")
@@ -87,7 +91,7 @@ def download_packet_capture(token, sensor_id, test_id):
     logging.debug(f"GET {url} to download pcap")
 
     # Make GET request to download the raw pcap file content
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers)
 
     # Log error content if download response failed
     if not response.ok:
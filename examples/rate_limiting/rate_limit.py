@@ -5,18 +5,26 @@
 #  - Calculate wait time based on the replenish rate before retrying
 #  - Enforce a maximum retry limit using a circuit breaker
 #  - Log and interpret rate limiting headers
+#  - Pace requests with a client-side token bucket seeded from those headers,
+#    so callers wait just long enough to stay under the limit instead of hitting 429s
+#  - Share one budget between several scripts on the same host through a locked state file
+#  - Do the same from asyncio code with handle_rate_limits_async
 
 # You may wish to enable DEBUG logging for this script in order to see the
 # rate limiting information printed on the screen.
 
-import requests
 import time
+import asyncio
+import json
 import logging
+import threading
+import contextlib
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from auth_utils import get_token
+from api_client import get_session, header_number
+from file_lock import locked
 
 # Configures logging
 logging.basicConfig(
@@ -27,6 +35,9 @@ logging.basicConfig(
 # Define API host from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 # Construct the full API URL
 EYES_URL = f"https://{API_HOST}/eyes"
 
@@ -34,68 +45,268 @@ EYES_URL = f"https://{API_HOST}/eyes"
 if not EYES_URL:
     raise ValueError("API_URL variable not set")
 
-# Get a valid bearer token from the authenticate file
-token, _ = get_token()
+max_retries=5
 
-# Include the token in the request headers
-HEADERS = {
-    "Authorization": f"Bearer {token}"
-}
+# Optional path of a file holding the rate limit budget shared by every
+# script on this host. Leave unset to give each process its own budget.
+RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE")
+
+
+# Client-side token bucket that mirrors the server's rate limiter.
+# It starts unseeded (never blocks) and learns the burst capacity,
+# replenish rate and request cost from the x-ratelimit-* headers.
+class TokenBucket:
+    def __init__(self):
+        self.capacity = None
+        self.rate = None
+        self.cost = 1
+        self.tokens = None
+        self.updated = self._now()
+        self.lock = threading.Lock()
+
+    def _now(self):
+        return time.monotonic()
+
+    # Every read-modify-write of the bucket state runs inside this block
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self.lock:
+            yield
+
+    # Adds the tokens replenished since the last update
+    def _refill(self, now):
+        if self.rate and self.tokens is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Updates the bucket from the rate limit headers of a response
+    def update_from_headers(self, headers):
+        remaining = header_number(headers, "x-ratelimit-remaining")
+        burst = header_number(headers, "x-ratelimit-burst-capacity")
+        replenish = header_number(headers, "x-ratelimit-replenish-rate")
+        requested = header_number(headers, "x-ratelimit-requested-tokens")
+
+        with self._transaction():
+            self._refill(self._now())
+            if burst and replenish:
+                self.capacity = burst
+                self.rate = replenish
+            if requested:
+                self.cost = requested
+            if remaining is not None and self.capacity:
+                # The server count does not include requests still in flight,
+                # so never let it raise our own, more conservative count
+                if self.tokens is None:
+                    self.tokens = min(remaining, self.capacity)
+                else:
+                    self.tokens = min(self.tokens, remaining)
+
+    # Empties the bucket after a 429 so other callers hold back too
+    def drain(self):
+        with self._transaction():
+            if self.tokens is not None:
+                self._refill(self._now())
+                self.tokens = min(self.tokens, 0)
+
+    # Takes the tokens for one request if they are available.
+    # Returns 0 when the request may go out, otherwise the seconds to wait.
+    def _take(self):
+        with self._transaction():
+            # Nothing learned from the server yet: do not block
+            if self.rate is None or self.tokens is None:
+                return 0
+            self._refill(self._now())
+            if self.tokens >= self.cost:
+                self.tokens -= self.cost
+                return 0
+            return (self.cost - self.tokens) / self.rate
+
+    # Blocks until a request may be sent and takes its tokens.
+    # Returns the number of seconds spent waiting.
+    def acquire(self):
+        waited = 0.0
+        while True:
+            wait_time = self._take()
+            if not wait_time:
+                return waited
+            logging.debug(f"Rate limiter waiting {wait_time:.3f} seconds")
+            time.sleep(wait_time)
+            waited += wait_time
+
+    # Same as acquire(), but yields to the event loop while waiting
+    async def acquire_async(self):
+        waited = 0.0
+        while True:
+            wait_time = self._take()
+            if not wait_time:
+                return waited
+            logging.debug(f"Rate limiter waiting {wait_time:.3f} seconds")
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+
+
+# Token bucket whose state lives in a file shared by every process on the host.
+# Each operation locks the file, loads the state, updates it and writes it back,
+# so parallel scripts using the same API key draw from one budget.
+class SharedTokenBucket(TokenBucket):
+    def __init__(self, path):
+        self.path = path
+        super().__init__()
+
+    # Wall-clock time, because monotonic clocks are not comparable between processes
+    def _now(self):
+        return time.time()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self.lock, locked(self.path + ".lock"):
+            self._load()
+            yield
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            # No usable state yet: keep what this process knows
+            return
+        self.capacity = state.get("capacity")
+        self.rate = state.get("rate")
+        self.cost = state.get("cost", 1)
+        self.tokens = state.get("tokens")
+        self.updated = state.get("updated", self._now())
+
+    def _save(self):
+        state = {
+            "capacity": self.capacity,
+            "rate": self.rate,
+            "cost": self.cost,
+            "tokens": self.tokens,
+            "updated": self.updated
+        }
+        with open(self.path, "w") as f:
+            json.dump(state, f)
+
+
+# Shared limiter used by handle_rate_limits unless another one is passed in
+if RATE_LIMIT_STATE_FILE:
+    rate_limiter = SharedTokenBucket(RATE_LIMIT_STATE_FILE)
+else:
+    rate_limiter = TokenBucket()
+
+
+# Checks one response and keeps the limiter in step with the server.
+# Returns (wait_time, None) when the call should be retried after a 429,
+# or (None, result) when it is finished.
+def _process_response(response, limiter):
+    # Extract rate limit data from the response headers
+    remaining = response.headers.get("x-ratelimit-remaining")
+    burst = response.headers.get("x-ratelimit-burst-capacity")
+    replenish = response.headers.get("x-ratelimit-replenish-rate")
+    requested = response.headers.get("x-ratelimit-requested-tokens")
+
+    logging.debug(f"ratelimit-remaining: {remaining}")
+    logging.debug(f"ratelimit-burst-capacity: {burst}")
+    logging.debug(f"ratelimit-replenish-rate: {replenish}")
+    logging.debug(f"ratelimit-requested-tokens: {requested}")
+
+    # Keep the client-side bucket in step with the server
+    limiter.update_from_headers(response.headers)
+
+    # Handle rate limiting if we get a 429 Too Many Requests response
+    if response.status_code == 429:
+        logging.warning("Rate limit exceeded (429). Retrying after delay...")
+
+        print("You’ve hit the rate limit. Please wait while the system backs off and retries...")
+        limiter.drain()
+
+        try:
+            # Calculate a wait time 
+            wait_time = 1 / int(replenish or 1) + 1 
+
+        # If replenish rate is missing, default to 2 seconds
+        except ValueError:
+            wait_time = 2
+    
+        logging.info(f"Sleeping for {wait_time:.2f} seconds.")
+        return wait_time, None
+
+    # Not modified: a conditional request confirmed the caller's cached copy, there is no body
+    if response.status_code == 304:
+        logging.debug("Not modified.")
+        return None, {}
+
+    # Success without a body, e.g. 204 No Content after a PATCH
+    if response.ok and (response.status_code == 204 or not response.text):
+        logging.debug("Request successful (no content).")
+        return None, {}
+
+    # Success
+    if response.ok:
+        logging.debug("Request successful.")
+        return None, response.json()
+
+    # Other errors
+    logging.error(f"Request failed: {response.status_code} - {response.text}")
+    return None, None
 
-max_retries=5
 
 # Rate-Limited API Call
-def handle_rate_limits(api_func):
+def handle_rate_limits(api_func, limiter=None):
+    limiter = limiter or rate_limiter
     attempt = 0
 
     while attempt < max_retries:
+        attempt += 1
+
+        # Wait for room in the client-side budget before sending
+        limiter.acquire()
         response = api_func()
 
-        # Extract rate limit data from the response headers
-        remaining = response.headers.get("x-ratelimit-remaining")
-        burst = response.headers.get("x-ratelimit-burst-capacity")
-        replenish = response.headers.get("x-ratelimit-replenish-rate")
-        requested = response.headers.get("x-ratelimit-requested-tokens")
+        wait_time, result = _process_response(response, limiter)
+        if wait_time is None:
+            return result
 
-        logging.debug(f"ratelimit-remaining: {remaining}")
-        logging.debug(f"ratelimit-burst-capacity: {burst}")
-        logging.debug(f"ratelimit-replenish-rate: {replenish}")
-        logging.debug(f"ratelimit-requested-tokens: {requested}")
+        # Retry the request after waiting
+        time.sleep(wait_time)
 
-        # Handle rate limiting if we get a 429 Too Many Requests response
-        if response.status_code == 429:
-            logging.warning("Rate limit exceeded (429). Retrying after delay...")
+    # Circuit breaker: stop after max_retries rate limited attempts
+    logging.error(f"Giving up after {max_retries} rate limited attempts.")
+    return None
 
-            print("You’ve hit the rate limit. Please wait while the system backs off and retries...")
 
-            try:
-                # Calculate a wait time 
-                wait_time = 1 / int(replenish or 1) + 1 
+# Rate-Limited API Call for asyncio code.
+# api_func is a coroutine function returning a response with status_code,
+# ok, headers, text and a json() method (see async_client.py).
+async def handle_rate_limits_async(api_func, limiter=None):
+    limiter = limiter or rate_limiter
+    attempt = 0
 
-            # If replenish rate is missing, default to 2 seconds
-            except ValueError:
-                wait_time = 2
-        
-            logging.info(f"Sleeping for {wait_time:.2f} seconds.")
+    while attempt < max_retries:
+        attempt += 1
 
-            # Retry the request after waiting
-            time.sleep(wait_time)
-            continue
+        # Wait for room in the client-side budget without blocking the event loop
+        await limiter.acquire_async()
+        response = await api_func()
+
+        wait_time, result = _process_response(response, limiter)
+        if wait_time is None:
+            return result
 
-        # Success
-        if response.ok:
-            logging.info("Request successful.")
-            return response.json()
+        # Retry the request after waiting
+        await asyncio.sleep(wait_time)
 
-        # Other errors
-        logging.error(f"Request failed: {response.status_code} - {response.text}")
-        return None
+    # Circuit breaker: stop after max_retries rate limited attempts
+    logging.error(f"Giving up after {max_retries} rate limited attempts.")
+    return None
 
 # Main Execution
 def main():
 
     def get_eyes_summary():
-        return requests.get(EYES_URL, headers=HEADERS)
+        # The shared session adds the bearer token from get_token() for us
+        return session.get(EYES_URL)
 
     result = handle_rate_limits(get_eyes_summary)
 
@@ -1,6 +1,7 @@
 # This script demonstrates how to fetch and log role data from the API.
 # It shows how to:
-#  - Retrieve all accessible roles from the /roles endpoint
+#  - Retrieve all accessible roles from the /roles endpoint, following every page
+#  - Reuse roles from the reference cache (REFERENCE_CACHE_FILE) until they expire
 #  - Log each role's ID, key, description, Auth0 ID, and whether it is public
 
 import os
@@ -10,6 +11,8 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from reference_cache import reference_cache
 
 # Setup logging configuration
 logging.basicConfig(
@@ -20,6 +23,9 @@ logging.basicConfig(
 # Define API host from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def fetch_roles(token):
     # Fetch role data from the API.
 
@@ -35,13 +41,8 @@ def fetch_roles(token):
     logging.info("Fetching roles from %s", url)
 
     try:
-        # Make a GET request to the API
-        response = requests.get(url, headers=headers)
-        # Raise an error if the status code shows failure
-        response.raise_for_status()
-
-        # Parse JSON response into a Python dictionary
-        data = response.json()
+        # Served from the reference cache when fresh, otherwise fetched page by page
+        data = {"results": reference_cache.roles(headers, session)}
         logging.info("Roles fetched successfully.")
         return data
     
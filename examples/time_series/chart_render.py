@@ -0,0 +1,158 @@
+# This module renders the SLA report charts with a selectable backend.
+# It shows how to:
+#  - Draw a chart on matplotlib's Agg canvas with Figure objects instead of pyplot's global state
+#  - Draw the same chart as a compact SVG polyline without importing matplotlib
+#  - Leave gaps where buckets are missing, using the array-based MetricSeries
+#  - Render many (device, metric) charts in parallel processes, one per core by default
+#  - Hand each chart back as soon as it is ready, with only a bounded number of jobs in flight
+
+# Example usage:
+#   jobs = [(device_id, metric, time_series), ...]
+#   for device_id, metric, image in iter_rendered(jobs, backend="svg"):
+#       ...
+
+import os
+import io
+import html
+import sys
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from series import MetricSeries
+
+# Worker processes used to render charts; 1 renders in the calling process
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(os.cpu_count() or 1)))
+# "matplotlib" draws PNG images; "svg" draws vector charts without importing matplotlib
+CHART_BACKEND = os.getenv("CHART_BACKEND", "matplotlib")
+
+# SVG chart geometry, in pixels
+_SVG_WIDTH, _SVG_HEIGHT = 600, 300
+_SVG_LEFT, _SVG_RIGHT, _SVG_TOP, _SVG_BOTTOM = 50, 15, 30, 40
+
+
+# Renders one metric's points as a PNG and returns its bytes, or None if there are no points.
+# Values are SLA fractions (0–1) drawn as percentages on a 0–100 scale; missing buckets are left blank.
+def render_png(time_series, metric, title=None):
+    if not time_series:
+        return None
+
+    # Imported here so processes that never draw do not pay for loading matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    series = MetricSeries.from_points(time_series).fill_gaps().scale(100)
+
+    # A Figure with its own canvas keeps no global state, so each worker can draw independently
+    fig = Figure(figsize=(6, 3))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(series.datetimes(), series.values, marker="o", linestyle="-")
+    ax.set_title(title or f"{metric} SLA % (last 8 hours)")
+    ax.set_ylim(0, 100)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("SLA %")
+    ax.tick_params(axis="x", labelsize=8)
+    ax.grid(True)
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+# Renders one metric's points as an SVG document and returns its bytes, or None if there are no points.
+# Same layout as render_png: SLA % on a fixed 0–100 axis, time (UTC) along the bottom.
+def render_svg(time_series, metric, title=None):
+    if not time_series:
+        return None
+
+    series = MetricSeries.from_points(time_series).fill_gaps()
+    first, last = int(series.ts[0]), int(series.ts[-1])
+    plot_width = _SVG_WIDTH - _SVG_LEFT - _SVG_RIGHT
+    plot_height = _SVG_HEIGHT - _SVG_TOP - _SVG_BOTTOM
+    span = max(last - first, 1)
+
+    def x(ts):
+        return _SVG_LEFT + (ts - first) * plot_width / span
+
+    def y(percent):
+        return _SVG_TOP + (100 - np.clip(percent, 0, 100)) * plot_height / 100
+
+    # Pixel coordinates for every point at once; NaN (missing bucket) splits the line
+    xs, ys = x(series.ts), y(series.values * 100)
+    present = np.flatnonzero(~np.isnan(ys))
+    runs = np.split(present, np.flatnonzero(np.diff(present) != 1) + 1)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_SVG_WIDTH}" height="{_SVG_HEIGHT}" '
+        f'viewBox="0 0 {_SVG_WIDTH} {_SVG_HEIGHT}" font-family="sans-serif" font-size="10">',
+        f'<text x="{_SVG_WIDTH / 2:.0f}" y="18" text-anchor="middle" font-size="13">'
+        f'{html.escape(title or f"{metric} SLA % (last 8 hours)")}</text>',
+    ]
+    # Horizontal grid lines and labels every 25%
+    for percent in range(0, 101, 25):
+        parts.append(f'<line x1="{_SVG_LEFT}" x2="{_SVG_WIDTH - _SVG_RIGHT}" y1="{y(percent):.1f}" '
+                     f'y2="{y(percent):.1f}" stroke="#ddd"/>'
+                     f'<text x="{_SVG_LEFT - 5}" y="{y(percent) + 3:.1f}" text-anchor="end">{percent}</text>')
+    # Start, middle and end times
+    for ts in sorted({first, first + span // 2, last}):
+        label = datetime.fromtimestamp(ts / 1000, timezone.utc).strftime("%m-%d %H:%M")
+        parts.append(f'<text x="{x(ts):.1f}" y="{_SVG_HEIGHT - _SVG_BOTTOM + 15}" text-anchor="middle" '
+                     f'font-size="8">{label}</text>')
+    parts.append(f'<text x="{_SVG_WIDTH / 2:.0f}" y="{_SVG_HEIGHT - 5}" text-anchor="middle">Time</text>')
+    parts.append(f'<text x="12" y="{_SVG_HEIGHT / 2:.0f}" text-anchor="middle" '
+                 f'transform="rotate(-90 12 {_SVG_HEIGHT / 2:.0f})">SLA %</text>')
+    for run in runs:
+        if len(run):
+            coords = " ".join(f"{px:.1f},{py:.1f}" for px, py in zip(xs[run].tolist(), ys[run].tolist()))
+            parts.append(f'<polyline fill="none" stroke="#1f77b4" stroke-width="1.5" points="{coords}"/>')
+    parts.append("</svg>")
+    return "".join(parts).encode("utf-8")
+
+
+_BACKENDS = {"matplotlib": render_png, "svg": render_svg}
+
+
+# Renders one chart with the named backend; returns PNG or SVG bytes, or None if there are no points
+def render_chart(time_series, metric, backend=CHART_BACKEND):
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown chart backend: {backend}")
+    return _BACKENDS[backend](time_series, metric)
+
+
+# Runs in the worker process; a job is (key, metric, time_series)
+def _render_job(job, backend=CHART_BACKEND):
+    key, metric, time_series = job
+    if not time_series:
+        logging.warning(f"No data for {metric}")
+    return key, metric, render_chart(time_series, metric, backend)
+
+
+# Renders every job and yields (key, metric, image) as charts complete, not in job order.
+# Jobs may be a lazy iterator; at most 2 * workers are queued at a time, so memory stays flat.
+# SVG charts take well under a millisecond, less than handing them to another process,
+# so they are always drawn in the calling process.
+def iter_rendered(jobs, workers=CHART_WORKERS, backend=CHART_BACKEND):
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown chart backend: {backend}")
+    if workers <= 1 or backend == "svg":
+        for job in jobs:
+            yield _render_job(job, backend)
+        return
+
+    backlog = 2 * workers
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for job in jobs:
+            if len(pending) >= backlog:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(_render_job, job, backend))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
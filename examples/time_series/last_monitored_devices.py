@@ -1,22 +1,33 @@
 # This script demonstrates how to generate SLA charts for recently monitored devices.
 # It shows how to:
 #  - Fetch the last 3 monitored devices from the Eyes Agents API
-#  - Query the /time-series/agents/numeric/{groupByDimension} endpoint for SLA metrics
-#  - Generate charts (0–100% scale) for SEVEN_MCS, ROAMING, COVERAGE, CONGESTION, and INTERFERENCE
-#  - Embed the charts as base64 images into a single HTML report for easy viewing
+#  - Query the /time-series/agents/numeric/{groupByDimension} endpoint for SLA metrics,
+#    splitting long windows into bucket-aligned chunks fetched concurrently
+#  - Ask for many devices per request (TS_DEVICE_BATCH) and split the per-device results apart,
+#    falling back to one request per device on a worker pool if a batch is refused
+#  - Reuse points cached on disk (TS_CACHE_DIR) and fetch only the missing time ranges
+#  - Generate charts (0–100% scale) for SEVEN_MCS, ROAMING, COVERAGE, CONGESTION, and INTERFERENCE,
+#    drawn as PNG with matplotlib in parallel worker processes (CHART_WORKERS), or as lightweight
+#    SVG vector charts with CHART_BACKEND=svg
+#  - Write each device's section of the HTML report as soon as its charts are ready, with charts
+#    embedded as base64 or saved as image files (REPORT_ASSETS=inline, files or hashed)
 
 import os
 import sys
 import logging
 import requests
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-import io
 import base64
+from concurrent.futures import ThreadPoolExecutor
 
 # Allow importing get_token from two levels up
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import POOL_SIZE, get_session
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from ts_cache import fetch_series
+from chart_render import iter_rendered, render_png
+from report_writer import ReportWriter
 
 # Setup logging configuration
 logging.basicConfig(
@@ -26,6 +37,9 @@ logging.basicConfig(
 
 # Load environment variables and constants
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
+
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
 METRICS = [
     "APPLICATION_CONNECTIVITY",
     "NETWORK_CONNECTIVITY",
@@ -35,8 +49,16 @@ METRICS = [
     "INTERFERENCE",
 ]
 TIME_BUCKET = "10_MIN"
-AGGREGATE_FUNCTION = ["AVG"]
+# COUNT lets a window split into chunks or read from the cache keep a sample-weighted avg
+AGGREGATE_FUNCTION = ["AVG", "COUNT"]
 groupByDimension = "deviceId"
+# How many deviceIds go in one time-series request; 1 sends one request per device
+TS_DEVICE_BATCH = int(os.getenv("TS_DEVICE_BATCH", "50"))
+
+
+# Raised when a batched request returns devices that were not asked for, or no devices at all
+class BatchNotApplied(Exception):
+    pass
 
 # Fetches the last monitored devices from the Eyes Agents API.
 def fetch_devices(token, limit=3):
@@ -46,7 +68,7 @@ def fetch_devices(token, limit=3):
         "Authorization": f"Bearer {token}"
     }
     # Send GET request to the Eyes Agents endpoint
-    resp = requests.get(url, headers=headers)
+    resp = session.get(url, headers=headers)
     resp.raise_for_status()
     data = resp.json()
 
@@ -59,13 +81,12 @@ def fetch_devices(token, limit=3):
     return devices[:limit]
 
 
-# Fetches SLA-related numeric metrics for a single device over a time window.
+# Fetches SLA-related numeric metrics for a device (or a comma-separated list of devices) over a time window.
 def fetch_time_series(token, device_id, from_time, to_time):
     # Construct numeric endpoint URL
     url = f"https://{API_HOST}/time-series/agents/numeric/{groupByDimension}"
+    # "from" and "to" are set per chunk
     params = {
-        "from": from_time,
-        "to": to_time,
         "timeBucket": TIME_BUCKET,
         "aggregateFunctions": ",".join(AGGREGATE_FUNCTION),
         "metrics": ",".join(METRICS),
@@ -75,12 +96,47 @@ def fetch_time_series(token, device_id, from_time, to_time):
         "Authorization": f"Bearer {token}"
     }
 
-    # Send GET request to numeric endpoint
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-
+    # Send GET requests to numeric endpoint; HTTP errors are raised
     # Returns a list of aggregated metric results with time series points.
-    return resp.json().get("results", [])
+    return fetch_series(url, params, from_time, to_time, groupByDimension, headers=headers, session=session)
+
+
+# Fetches SLA metrics for many devices and returns {device_id: results}.
+# Devices are requested TS_DEVICE_BATCH at a time; the deviceId of every result group says
+# which device it belongs to. Devices without data get an empty list.
+# A batch that fails, comes back with other devices or comes back empty (the API may read
+# the list as one unknown deviceId) is fetched again one device at a time.
+def fetch_devices_time_series(token, device_ids, from_time, to_time, batch_size=TS_DEVICE_BATCH):
+    device_ids = [str(device_id) for device_id in device_ids]
+    batch_size = max(1, batch_size)
+    batches = [device_ids[i:i + batch_size] for i in range(0, len(device_ids), batch_size)]
+
+    def fetch_batch(batch):
+        if len(batch) == 1:
+            return {batch[0]: fetch_time_series(token, batch[0], from_time, to_time)}
+        try:
+            results = fetch_time_series(token, ",".join(batch), from_time, to_time)
+            if not results:
+                raise BatchNotApplied("no result groups")
+            by_device = {device_id: [] for device_id in batch}
+            for res in results:
+                device_id = str(res.get(groupByDimension))
+                if device_id not in by_device:
+                    raise BatchNotApplied(device_id)
+                by_device[device_id].append(res)
+            return by_device
+        except (requests.exceptions.HTTPError, BatchNotApplied) as e:
+            logging.warning(f"Batched time-series request for {len(batch)} devices failed ({e!r}); "
+                            f"fetching them one at a time")
+            with ThreadPoolExecutor(max_workers=max(1, min(POOL_SIZE, len(batch)))) as pool:
+                single = pool.map(lambda device_id: fetch_time_series(token, device_id, from_time, to_time), batch)
+                return dict(zip(batch, single))
+
+    by_device = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(POOL_SIZE, len(batches)))) as pool:
+        for batch_results in pool.map(fetch_batch, batches):
+            by_device.update(batch_results)
+    return by_device
 
 
 # Creates a chart for one metric and returns it as a base64-encoded PNG.
@@ -90,59 +146,24 @@ def plot_chart_base64(time_series, metric):
         logging.warning(f"No data for {metric}")
         return None
 
-    # Sort the data points by timestamp to ensure proper plotting
-    time_series.sort(key=lambda x: x["ts"])
-    # Convert timestamps from milliseconds to datetime objects (UTC)
-    times = [datetime.utcfromtimestamp(p["ts"] / 1000) for p in time_series]
-    # Extract SLA values and convert decimals (0–1) into percentages (0–100)
-    values = [p.get("avg", 0) * 100 for p in time_series]
-
-    # Create the chart
-    plt.figure(figsize=(6, 3))
-    plt.plot(times, values, marker="o", linestyle="-")
-    plt.title(f"{metric} SLA % (last 8 hours)")
-    plt.ylim(0, 100)
-    plt.xlabel("Time")
-    plt.ylabel("SLA %")
-    plt.xticks(fontsize=8)  # Smaller font for readability
-    plt.grid(True)
-    plt.tight_layout()
-
-    # Save chart into memory buffer as PNG
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close()
-    buf.seek(0)
-
-    # Convert the PNG buffer to a base64-encoded string for embedding in HTML
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
+    # Draw the chart (0–100% scale) as a PNG
+    png = render_png(time_series, metric)
+
     # Returns a base64 string representing the PNG image.
-    return img_base64
+    return base64.b64encode(png).decode("utf-8")
 
 
-# Builds an HTML report containing charts for each device and metric.
-def build_html_report(devices_charts, output_file="sla_report.html"):
-    # Open the output HTML file for writing
-    with open(output_file, "w") as f:
-        # Write the HTML head and main heading
-        f.write("<html><head><title>Device SLA Report</title></head><body>\n")
-        f.write("<h1>Device SLA Report (Last 8 Hours)</h1>\n")
+# Opens the streaming HTML report; device sections are added with add_device as they are ready.
+def open_report(output_file="sla_report.html"):
+    return ReportWriter(output_file, "Device SLA Report", heading="Device SLA Report (Last 8 Hours)")
 
-        # Iterate through each device in the provided chart dictionary
+
+# Builds an HTML report containing charts (base64 PNG strings) for each device and metric.
+def build_html_report(devices_charts, output_file="sla_report.html"):
+    with open_report(output_file) as report:
         for device_name, charts in devices_charts.items():
-            # Write the device name as a subheading
-            f.write(f"<h2>{device_name}</h2>\n")
-            # Only include charts that have data
-            for metric, img_base64 in charts.items():
-                if img_base64:
-                    # Write the metric title
-                    f.write(f"<h4>{metric}</h4>\n")
-                    # Embed the chart as a base64 image, set width for readability
-                    f.write(f'<img src="data:image/png;base64,{img_base64}" width="500"><br>\n')
-            f.write("<hr>\n")
-        # Close the HTML tags
-        f.write("</body></html>")
-    logging.info(f"Report generated: {output_file}")
+            report.add_device(device_name, {metric: base64.b64decode(img) if img else None
+                                            for metric, img in charts.items()})
 
 
 # Main fucntion
@@ -160,31 +181,42 @@ def main():
     to_time = int(datetime.utcnow().timestamp() * 1000)
     from_time = int((datetime.utcnow() - timedelta(hours=8)).timestamp() * 1000)
 
-    # Dictionary to hold chart images for each device
-    devices_charts = {}
-
-    # Loop through each device to fetch metrics and generate charts
-    for device in devices:
-        device_id = device.get("id")
-        device_name = device.get("name", f"Device {device_id}")
-        logging.info(f"Fetching SLA metrics for device: {device_name} ({device_id})")
-
-        # Get numeric SLA metrics for this device
-        results = fetch_time_series(token, device_id, from_time, to_time)
-
-        # Generate charts for each metric
-        charts = {}
-        for res in results:
-            for agg in res.get("metricAggregates", []):
-                metric = agg.get("metric")
-                img_base64 = plot_chart_base64(agg.get("timeSeries", []), metric)
-                charts[metric] = img_base64
-
-        # Store charts under the device's name
-        devices_charts[f"{device_name} ({device_id})"] = charts
-
-    # Generate the HTML report for all devices
-    build_html_report(devices_charts)
+    # Get numeric SLA metrics for all devices, several devices per request
+    logging.info(f"Fetching SLA metrics for {len(devices)} devices...")
+    series_by_device = fetch_devices_time_series(token, [d.get("id") for d in devices], from_time, to_time)
+
+    # Charts of devices still being rendered; a device leaves as soon as its section is written
+    pending_charts = {}
+    # One rendering job per (device, metric), and how many are still out per device
+    jobs = []
+    remaining = {}
+
+    with open_report() as report:
+        for device in devices:
+            device_id = device.get("id")
+            device_name = device.get("name", f"Device {device_id}")
+            label = f"{device_name} ({device_id})"
+
+            charts = {}
+            for res in series_by_device.get(str(device_id), []):
+                for agg in res.get("metricAggregates", []):
+                    metric = agg.get("metric")
+                    # Reserve the slot so charts keep the API's metric order
+                    charts[metric] = None
+                    jobs.append((label, metric, agg.get("timeSeries", [])))
+                    remaining[label] = remaining.get(label, 0) + 1
+
+            if charts:
+                pending_charts[label] = charts
+            else:
+                report.add_device(label, charts)
+
+        # Render charts in worker processes; a device's section is written once its last chart arrives
+        for label, metric, image in iter_rendered(jobs):
+            pending_charts[label][metric] = image
+            remaining[label] -= 1
+            if not remaining[label]:
+                report.add_device(label, pending_charts.pop(label))
 
 
 if __name__ == "__main__":
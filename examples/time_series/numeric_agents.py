@@ -1,7 +1,9 @@
 # This script demonstrates how to make an authenticated API call to the numeric endpoint.
 # It shows how to:
 #  - Make a GET request to the /time-series/agents/numeric/{groupByDimension} endpoint with query parameters
-#  - Log aggregated metric data and time series details
+#  - Split long windows into bucket-aligned chunks that are fetched concurrently and stitched back together
+#  - Reuse points cached on disk (TS_CACHE_DIR) and fetch only the missing time ranges
+#  - Log aggregated metric data, min/max/mean over the window, and time series details
 #  - Handle cases where the response structure may vary or be missing expected keys
 
 import os
@@ -12,6 +14,10 @@ import sys
 # Allow importing get_token from two levels up
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from ts_cache import fetch_series
+from series import MetricSeries
 
 # Setup logging configuration
 logging.basicConfig(
@@ -22,11 +28,15 @@ logging.basicConfig(
 # Load environment variables
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 # Hardcoded values
 METRICS = ["EXPERIENCE_SCORE"]
 groupByDimension = "locationId"
 TIME_BUCKET = "2_HOUR"
-AGGREGATE_FUNCTION = ["AVG"]
+# COUNT lets a window split into chunks or read from the cache keep a sample-weighted avg
+AGGREGATE_FUNCTION = ["AVG", "COUNT"]
 
 # Construct numeric endpoint URL
 url = f"https://{API_HOST}/time-series/agents/numeric/{groupByDimension}"
@@ -40,26 +50,20 @@ def fetch_numeric_metrics(token, from_time, to_time):
         "Authorization": f"Bearer {token}"
     }
 
-    # Query parameters for the GET request
+    # Query parameters for the GET request; "from" and "to" are set per chunk
     params = {
-        "from": from_time,
-        "to": to_time,
         "metrics": METRICS,
         "aggregateFunctions": AGGREGATE_FUNCTION,
         "timeBucket": TIME_BUCKET
     }
 
     # Log the request details
-    logging.info(f"GET {url} with params: {params}")
+    logging.info(f"GET {url} from {from_time} to {to_time} with params: {params}")
 
     try:
-        # Send GET request to the numeric endpoint
-        response = requests.get(url, headers=headers, params=params)
-        # Raise exception for HTTP error codes
-        response.raise_for_status()
-
-        # Parse JSON response
-        data = response.json()
+        # Send GET requests to the numeric endpoint for the parts of the window not cached yet
+        data = {"results": fetch_series(url, params, from_time, to_time, groupByDimension,
+                                        headers=headers, session=session)}
 
         # Log summary of numeric metric data
         log_numeric_summary(data)
@@ -67,7 +71,8 @@ def fetch_numeric_metrics(token, from_time, to_time):
     except requests.exceptions.HTTPError as e:
         # Log HTTP errors
         logging.error(f"HTTP error occurred: {e}")
-        logging.error(f"Response content: {response.text}")
+        if e.response is not None:
+            logging.error(f"Response content: {e.response.text}")
     except Exception as e:
         # Log any other unexpected errors
         logging.error(f"Unexpected error occurred: {e}")
@@ -101,6 +106,11 @@ def log_numeric_summary(data):
             # Log time series details if present
             time_series = agg.get("timeSeries", [])
             if time_series:
+                # Window statistics computed on the arrays rather than point by point
+                stats = MetricSeries.from_points(time_series).stats()
+                if stats["count"]:
+                    logging.info(f"  Points: {stats['count']} | Min: {stats['min']:.4g} | "
+                                 f"Max: {stats['max']:.4g} | Mean: {stats['mean']:.4g}")
                 logging.info("  Time Series:")
                 for point in time_series:
                     ts = point.get("ts")
@@ -0,0 +1,115 @@
+# This module writes the SLA HTML report one device section at a time.
+# It shows how to:
+#  - Stream each section to disk as soon as its charts are ready, so memory does not grow with the fleet
+#  - Embed charts inline (PNG as base64, SVG as markup), or write them as separate image files next to the report
+#  - Store charts in a content-addressed asset folder, so identical charts (such as empty series) are written once
+
+# Example usage:
+#   with ReportWriter("sla_report.html", "Device SLA Report", assets="hashed") as report:
+#       report.add_device("laptop-john (123)", {"COVERAGE": png_bytes})
+
+import os
+import re
+import html
+import base64
+import hashlib
+import logging
+
+# Where chart images go: "inline" (base64 in the HTML), "files" (one file per chart)
+# or "hashed" (files named by content, identical charts stored once)
+REPORT_ASSETS = os.getenv("REPORT_ASSETS", "inline")
+
+_MIME = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+# Returns "svg" for SVG markup and "png" otherwise
+def image_type(data):
+    head = data[:256].lstrip()
+    return "svg" if head.startswith(b"<svg") or head.startswith(b"<?xml") else "png"
+
+
+# SVG markup without an XML declaration, sized to its container
+def _svg_markup(data):
+    markup = data.decode("utf-8")
+    markup = markup[markup.find("<svg"):]
+    return markup.replace("<svg ", '<svg style="width:100%;height:auto" ', 1)
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", text).strip("-") or "chart"
+
+
+class ReportWriter:
+    def __init__(self, path, title, heading=None, assets=REPORT_ASSETS, asset_dir=None):
+        if assets not in ("inline", "files", "hashed"):
+            raise ValueError(f"Unknown report asset mode: {assets}")
+        self.path = path
+        self.assets = assets
+        # Assets live next to the report by default, e.g. sla_report_assets/ for sla_report.html
+        self.asset_dir = asset_dir or os.path.splitext(path)[0] + "_assets"
+        self.written = set()
+        self.sections = 0
+        self.asset_bytes = 0
+
+        if assets != "inline":
+            os.makedirs(self.asset_dir, exist_ok=True)
+        self.file = open(path, "w")
+        self.file.write(f"<html><head><title>{html.escape(title)}</title></head><body>\n")
+        self.file.write(f"<h1>{html.escape(heading or title)}</h1>\n")
+
+    # Writes one device section; charts maps metric to image bytes (PNG or SVG), or None for no data.
+    # The section is flushed right away, so a report is readable while it is being built.
+    def add_device(self, name, charts):
+        self.file.write(f"<h2>{html.escape(name)}</h2>\n")
+        for metric, data in charts.items():
+            # Only include charts that have data
+            if data:
+                self.file.write(f"<h4>{html.escape(metric)}</h4>\n")
+                if self.assets == "inline" and image_type(data) == "svg":
+                    # Vector charts go straight into the page, without the base64 overhead
+                    self.file.write(f'<div style="width:500px">{_svg_markup(data)}</div>\n')
+                else:
+                    self.file.write(f'<img src="{self._source(name, metric, data)}" width="500"><br>\n')
+        self.file.write("<hr>\n")
+        self.file.flush()
+        self.sections += 1
+
+    # Returns the img src for a chart, writing its asset file if needed
+    def _source(self, name, metric, data):
+        kind = image_type(data)
+        if self.assets == "inline":
+            return f"data:{_MIME[kind]};base64,{base64.b64encode(data).decode('ascii')}"
+
+        if self.assets == "hashed":
+            file_name = f"{hashlib.sha256(data).hexdigest()[:20]}.{kind}"
+        else:
+            file_name = f"{_slug(name)}-{_slug(metric)}.{kind}"
+        asset_path = os.path.join(self.asset_dir, file_name)
+
+        # Content-addressed files are only written the first time they are seen
+        if file_name not in self.written:
+            if not (self.assets == "hashed" and os.path.exists(asset_path)):
+                with open(asset_path, "wb") as f:
+                    f.write(data)
+                self.asset_bytes += len(data)
+            self.written.add(file_name)
+
+        relative = os.path.relpath(asset_path, os.path.dirname(os.path.abspath(self.path)))
+        return html.escape(relative.replace(os.sep, "/"))
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write("</body></html>")
+        self.file.close()
+        if self.assets == "inline":
+            logging.info(f"Report generated: {self.path} ({self.sections} devices)")
+        else:
+            logging.info(f"Report generated: {self.path} ({self.sections} devices, "
+                         f"{len(self.written)} chart files in {self.asset_dir})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
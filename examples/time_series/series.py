@@ -0,0 +1,134 @@
+# This module holds one metric's time series as two NumPy arrays instead of a list of point dicts.
+# It shows how to:
+#  - Convert API points ({"ts": ..., "avg": ...}) into int64 timestamps and float64 values, and back
+#  - Sort, convert units and turn timestamps into datetimes without a Python loop per point
+#  - Fill missing buckets with NaN, so charts show gaps instead of drawing straight across them
+#  - Resample to a coarser bucket and compute rolling statistics, ignoring missing values
+
+# Example usage:
+#   series = MetricSeries.from_points(agg["timeSeries"]).sorted()
+#   hourly = series.resample(60 * 60 * 1000)
+#   percent = series.scale(100).values
+
+import warnings
+import numpy as np
+
+
+class MetricSeries:
+    def __init__(self, ts, values):
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.ts.shape != self.values.shape:
+            raise ValueError(f"{len(self.ts)} timestamps but {len(self.values)} values")
+
+    # Builds a series from API points; a missing or null field becomes NaN
+    @classmethod
+    def from_points(cls, points, field="avg"):
+        count = len(points)
+        ts = np.fromiter((p["ts"] for p in points), dtype=np.int64, count=count)
+        values = np.fromiter((np.nan if p.get(field) is None else p[field] for p in points),
+                             dtype=np.float64, count=count)
+        return cls(ts, values)
+
+    # Returns API points; NaN values are left out
+    def to_points(self, field="avg"):
+        series = self.dropna()
+        return [{"ts": t, field: v} for t, v in zip(series.ts.tolist(), series.values.tolist())]
+
+    # Returns the series without its NaN values
+    def dropna(self):
+        valid = ~np.isnan(self.values)
+        return MetricSeries(self.ts[valid], self.values[valid])
+
+    def __len__(self):
+        return len(self.ts)
+
+    def is_sorted(self):
+        return bool(np.all(self.ts[1:] >= self.ts[:-1]))
+
+    # Returns the series in timestamp order (stable, so equal timestamps keep their order)
+    def sorted(self):
+        if self.is_sorted():
+            return self
+        order = np.argsort(self.ts, kind="stable")
+        return MetricSeries(self.ts[order], self.values[order])
+
+    # Multiplies every value, e.g. scale(100) turns SLA fractions into percentages
+    def scale(self, factor):
+        return MetricSeries(self.ts, self.values * factor)
+
+    # Timestamps as numpy datetime64 values (UTC), which matplotlib plots directly
+    def datetimes(self):
+        return self.ts.astype("datetime64[ms]")
+
+    # Smallest step between timestamps, or None for fewer than two distinct points
+    def step(self):
+        steps = np.diff(np.unique(self.ts))
+        return int(steps.min()) if len(steps) else None
+
+    # Returns the sorted series on a regular grid of `bucket` milliseconds from the first to the
+    # last timestamp, with `fill` (NaN by default) where a bucket has no point.
+    # The bucket defaults to the smallest step in the data.
+    def fill_gaps(self, bucket=None, fill=np.nan):
+        series = self.sorted()
+        bucket = bucket or series.step()
+        if not bucket:
+            return series
+        start = series.ts[0]
+        grid = np.arange(start, series.ts[-1] + 1, bucket, dtype=np.int64)
+        values = np.full(len(grid), fill, dtype=np.float64)
+        # Points off the grid are dropped; a later duplicate replaces an earlier one
+        offsets = series.ts - start
+        aligned = offsets % bucket == 0
+        values[offsets[aligned] // bucket] = series.values[aligned]
+        return MetricSeries(grid, values)
+
+    # Returns one point per `bucket`-millisecond bucket (aligned to the epoch, UTC) holding
+    # the mean, min, max, sum or count of the non-NaN values in it. Empty buckets are left out.
+    def resample(self, bucket, how="mean"):
+        valid = ~np.isnan(self.values)
+        ts = self.ts[valid] // bucket * bucket
+        values = self.values[valid]
+        if not len(ts):
+            return MetricSeries([], [])
+
+        order = np.argsort(ts, kind="stable")
+        ts, values = ts[order], values[order]
+        keys, starts, counts = np.unique(ts, return_index=True, return_counts=True)
+
+        if how == "mean":
+            result = np.add.reduceat(values, starts) / counts
+        elif how == "sum":
+            result = np.add.reduceat(values, starts)
+        elif how == "min":
+            result = np.minimum.reduceat(values, starts)
+        elif how == "max":
+            result = np.maximum.reduceat(values, starts)
+        elif how == "count":
+            result = counts.astype(np.float64)
+        else:
+            raise ValueError(f"Unknown resample aggregate: {how}")
+        return MetricSeries(keys, result)
+
+    # Returns the rolling mean, min, max or std over `window` points, ignoring NaN.
+    # The first window - 1 points, and windows with no values at all, are NaN.
+    def rolling(self, window, how="mean"):
+        functions = {"mean": np.nanmean, "min": np.nanmin, "max": np.nanmax, "std": np.nanstd}
+        if how not in functions:
+            raise ValueError(f"Unknown rolling statistic: {how}")
+        result = np.full(len(self.values), np.nan)
+        if 0 < window <= len(self.values):
+            windows = np.lib.stride_tricks.sliding_window_view(self.values, window)
+            with warnings.catch_warnings():
+                # All-NaN windows are expected around gaps and give NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                result[window - 1:] = functions[how](windows, axis=1)
+        return MetricSeries(self.ts, result)
+
+    # Mean, min and max of the non-NaN values (all NaN for an empty series)
+    def stats(self):
+        valid = self.values[~np.isnan(self.values)]
+        if not len(valid):
+            return {"count": 0, "mean": np.nan, "min": np.nan, "max": np.nan}
+        return {"count": len(valid), "mean": float(valid.mean()),
+                "min": float(valid.min()), "max": float(valid.max())}
@@ -0,0 +1,301 @@
+# This script keeps daily, weekly and monthly SLA rollups per location and device in a local SQLite file.
+# It shows how to:
+#  - Fetch 10_MIN buckets once and compute coarser aggregates locally instead of querying every timeBucket
+#  - Weight averages by the number of samples in each bucket, and combine the buckets' MIN and MAX
+#  - Keep a fixed histogram per period, so percentiles can be updated without the raw buckets
+#  - Update the stored rollups incrementally: only buckets newer than the last run are fetched and added
+#  - Skip the bucket that is still filling, so it is counted once, when it is complete
+
+# Example usage:
+#   SLA_ROLLUP_FILE=sla_rollups.db python sla_rollup.py
+#
+#   with RollupStore("sla_rollups.db") as store:
+#       ingest_results(store, results, "locationId", complete_until)
+#       for row in store.rollups("locationId=123/COVERAGE", "week"):
+#           ...
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from auth_utils import get_token
+from api_client import get_session, api_url
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from series import MetricSeries
+from ts_cache import fetch_series
+from ts_fetch import bucket_ms
+
+# Setup logging configuration
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+
+# Path of the rollup database
+SLA_ROLLUP_FILE = os.getenv("SLA_ROLLUP_FILE", "sla_rollups.db")
+# Days of history read on the first run; later runs only read what is new
+ROLLUP_DAYS = int(os.getenv("ROLLUP_DAYS", "35"))
+# Dimensions to roll up, comma-separated
+ROLLUP_GROUP_BY = os.getenv("ROLLUP_GROUP_BY", "locationId,deviceId").split(",")
+# Aggregates requested per bucket; COUNT weights each bucket's average by its number of samples,
+# MIN and MAX give the lowest and highest sample rather than the extremes of the bucket averages
+ROLLUP_AGGREGATES = os.getenv("ROLLUP_AGGREGATES", "AVG,COUNT,MIN,MAX")
+# Histogram bins over the 0–1 SLA range; 1000 bins give percentiles to 0.1%
+ROLLUP_BINS = int(os.getenv("ROLLUP_BINS", "1000"))
+
+METRICS = [
+    "APPLICATION_CONNECTIVITY",
+    "NETWORK_CONNECTIVITY",
+    "ROAMING",
+    "COVERAGE",
+    "CONGESTION",
+    "INTERFERENCE",
+]
+TIME_BUCKET = "10_MIN"
+PERIODS = ("day", "week", "month")
+PERCENTILES = (5, 50, 95)
+DAY_MS = 24 * 60 * 60 * 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    series TEXT NOT NULL,
+    period TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    total REAL NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    histogram BLOB NOT NULL,
+    PRIMARY KEY (series, period, start)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    series TEXT PRIMARY KEY,
+    ts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+# Returns the start (epoch ms, UTC) of the day, ISO week (Monday) or calendar month holding each timestamp
+def period_starts(ts, period):
+    ts = np.asarray(ts, dtype=np.int64)
+    if period == "day":
+        return ts // DAY_MS * DAY_MS
+    if period == "week":
+        days = ts // DAY_MS
+        # 1970-01-01 was a Thursday, so day + 3 counts from a Monday
+        return (days - (days + 3) % 7) * DAY_MS
+    if period == "month":
+        return ts.astype("datetime64[ms]").astype("datetime64[M]").astype("datetime64[ms]").astype(np.int64)
+    raise ValueError(f"Unknown rollup period: {period}")
+
+
+class RollupStore:
+    def __init__(self, path=SLA_ROLLUP_FILE, bins=ROLLUP_BINS):
+        self.path = path
+        self.bins = bins
+        # sqlite3 connections are not thread-safe on their own, so every use goes through the lock
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.executescript(_SCHEMA)
+
+    # Timestamp of the newest bucket already counted for a series, or None
+    def watermark(self, series_key):
+        with self.lock:
+            row = self.db.execute("SELECT ts FROM watermarks WHERE series = ?", (series_key,)).fetchone()
+        return row[0] if row else None
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # Names of every series with rollups
+    def series(self):
+        with self.lock:
+            rows = self.db.execute("SELECT series FROM watermarks ORDER BY series").fetchall()
+        return [row[0] for row in rows]
+
+    # Adds fine-grained buckets of one series to its day, week and month rollups.
+    # weights holds the number of samples per bucket (1 each if not given); lows and highs hold
+    # each bucket's MIN and MAX sample, and default to the bucket average where missing.
+    # Buckets at or before the series watermark were counted already and are skipped,
+    # as are buckets starting at or after complete_until. Returns the number of buckets added.
+    def ingest(self, series_key, series, weights=None, complete_until=None, lows=None, highs=None):
+        weights = np.ones(len(series)) if weights is None else np.asarray(weights, dtype=np.float64)
+        lows = series.values if lows is None else np.asarray(lows, dtype=np.float64)
+        highs = series.values if highs is None else np.asarray(highs, dtype=np.float64)
+        lows = np.where(np.isnan(lows), series.values, lows)
+        highs = np.where(np.isnan(highs), series.values, highs)
+        order = np.argsort(series.ts, kind="stable")
+        ts, values, weights = series.ts[order], series.values[order], weights[order]
+        lows, highs = lows[order], highs[order]
+
+        watermark = self.watermark(series_key)
+        keep = ~np.isnan(values) & ~np.isnan(weights) & (weights > 0)
+        if watermark is not None:
+            keep &= ts > watermark
+        if complete_until is not None:
+            keep &= ts < complete_until
+        ts, values, weights = ts[keep], values[keep], weights[keep]
+        lows, highs = lows[keep], highs[keep]
+        if not len(ts):
+            return 0
+
+        # Histogram bin of every bucket; SLA values are fractions between 0 and 1
+        bin_index = np.clip((values * self.bins).astype(np.int64), 0, self.bins - 1)
+
+        with self.lock, self.db:
+            for period in PERIODS:
+                starts, group = np.unique(period_starts(ts, period), return_inverse=True)
+                count = len(starts)
+                weight = np.bincount(group, weights=weights, minlength=count)
+                total = np.bincount(group, weights=weights * values, minlength=count)
+                low = np.full(count, np.inf)
+                high = np.full(count, -np.inf)
+                np.minimum.at(low, group, lows)
+                np.maximum.at(high, group, highs)
+                histograms = np.bincount(group * self.bins + bin_index, weights=weights,
+                                         minlength=count * self.bins).reshape(count, self.bins)
+
+                for i, start in enumerate(starts.tolist()):
+                    row = self.db.execute(
+                        "SELECT weight, total, low, high, histogram FROM rollups "
+                        "WHERE series = ? AND period = ? AND start = ?", (series_key, period, start)).fetchone()
+                    w, t, lo, hi, histogram = weight[i], total[i], low[i], high[i], histograms[i]
+                    if row:
+                        # Merge with what earlier runs stored for this period
+                        w, t = w + row[0], t + row[1]
+                        lo, hi = min(lo, row[2]), max(hi, row[3])
+                        histogram = histogram + np.frombuffer(row[4], dtype=np.float64)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO rollups (series, period, start, weight, total, low, high, histogram) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (series_key, period, start, float(w), float(t), float(lo), float(hi), histogram.tobytes()))
+
+            self.db.execute("INSERT OR REPLACE INTO watermarks (series, ts) VALUES (?, ?)",
+                            (series_key, int(ts[-1])))
+        return len(ts)
+
+    # Returns the rollups of one series for a period ("day", "week" or "month"), oldest first,
+    # as dicts with start, avg (weighted by samples), min and max (lowest and highest sample),
+    # samples and p<N> for each percentile. Percentiles come from the bucket averages.
+    def rollups(self, series_key, period, start=None, end=None, percentiles=PERCENTILES):
+        query = "SELECT start, weight, total, low, high, histogram FROM rollups WHERE series = ? AND period = ?"
+        args = [series_key, period]
+        if start is not None:
+            query += " AND start >= ?"
+            args.append(start)
+        if end is not None:
+            query += " AND start < ?"
+            args.append(end)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY start", args).fetchall()
+
+        results = []
+        for period_start, weight, total, low, high, histogram in rows:
+            row = {"start": period_start, "avg": total / weight, "min": low, "max": high, "samples": weight}
+            cumulative = np.cumsum(np.frombuffer(histogram, dtype=np.float64))
+            for p in percentiles:
+                # Middle of the first bin holding the p-th percentile, kept within the observed range
+                index = min(int(np.searchsorted(cumulative, cumulative[-1] * p / 100)), self.bins - 1)
+                row[f"p{p}"] = min(max((index + 0.5) / self.bins, low), high)
+            results.append(row)
+        return results
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Adds every series of numeric endpoint results to the store, keyed "<group_by>=<id>/<metric>".
+# Averages are weighted by each point's "count" when the query asked for COUNT, otherwise by 1.
+# The point "min" and "max" set the rollup MIN and MAX when the query asked for them.
+# Returns the number of buckets added.
+def ingest_results(store, results, group_by, complete_until=None):
+    added = 0
+    for result in results:
+        for agg in result.get("metricAggregates", []):
+            points = agg.get("timeSeries", [])
+            series = MetricSeries.from_points(points)
+            weights = MetricSeries.from_points(points, "count").values
+            weights[np.isnan(weights)] = 1
+            lows = MetricSeries.from_points(points, "min").values
+            highs = MetricSeries.from_points(points, "max").values
+            key = f"{group_by}={result.get(group_by)}/{agg.get('metric')}"
+            added += store.ingest(key, series, weights, complete_until, lows, highs)
+    return added
+
+
+# Formats a rollup row, e.g. "2026-10-12: avg 97.2% min 81.0% max 100.0% p5 88.5% (1008 samples)"
+def format_rollup(row):
+    day = datetime.fromtimestamp(row["start"] / 1000, timezone.utc).strftime("%Y-%m-%d")
+    text = f"{day}: avg {row['avg'] * 100:.1f}% min {row['min'] * 100:.1f}% max {row['max'] * 100:.1f}%"
+    for key in (k for k in row if k.startswith("p")):
+        text += f" {key} {row[key] * 100:.1f}%"
+    return text + f" ({row['samples']:.0f} samples)"
+
+
+# Fetches the buckets completed since the last run for one dimension and adds them to the store
+def update_rollups(store, group_by, headers=None, session=None, now=None):
+    bucket = bucket_ms(TIME_BUCKET)
+    now = now or int(time.time() * 1000)
+    complete_until = now // bucket * bucket
+    from_time = store.get_meta(f"fetched_until:{group_by}") or complete_until - ROLLUP_DAYS * DAY_MS
+    if from_time >= complete_until:
+        return 0
+
+    params = {
+        "timeBucket": TIME_BUCKET,
+        "aggregateFunctions": ROLLUP_AGGREGATES,
+        "metrics": ",".join(METRICS),
+    }
+    url = api_url(f"/time-series/agents/numeric/{group_by}")
+    results = fetch_series(url, params, from_time, complete_until, group_by, headers=headers, session=session)
+    added = ingest_results(store, results, group_by, complete_until)
+    store.set_meta(f"fetched_until:{group_by}", complete_until)
+    logging.info(f"Added {added} {TIME_BUCKET} buckets to the {group_by} rollups")
+    return added
+
+
+def main():
+    # Authenticate and get API token
+    token, _ = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    session = get_session()
+
+    with RollupStore(SLA_ROLLUP_FILE) as store:
+        for group_by in ROLLUP_GROUP_BY:
+            update_rollups(store, group_by, headers=headers, session=session)
+
+        # Log the latest day, week and month of every series
+        for series_key in store.series():
+            logging.info(series_key)
+            for period in PERIODS:
+                rows = store.rollups(series_key, period)
+                if rows:
+                    logging.info(f"  {period:<5} {format_rollup(rows[-1])}")
+
+
+if __name__ == "__main__":
+    main()
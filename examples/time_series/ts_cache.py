@@ -0,0 +1,203 @@
+# This module caches numeric time-series points on disk so overlapping queries only fetch what is missing.
+# It shows how to:
+#  - Store each series, keyed by (groupByDimension, id, metric, timeBucket, aggregate), as two compact
+#    column files: int64 timestamps and float64 values, read straight into NumPy arrays
+#  - Remember which time ranges each query has already covered, and fetch only the gaps
+#  - Always fetch the bucket that is still filling, so a refresh every 10 minutes costs about one bucket
+#  - Merge new points into the stored columns and answer queries in the API's "results" shape
+
+# Example usage:
+#   results = fetch_series(url, params, from_time, to_time, "deviceId", headers=headers)
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from file_lock import locked
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from ts_fetch import bucket_ms, fetch_chunked, window_aggregates
+from series import MetricSeries
+
+# Optional directory for the cache; every query goes to the API when it is not set
+TS_CACHE_DIR = os.getenv("TS_CACHE_DIR")
+
+
+# Accepts a list or a comma-separated string, as the scripts pass both
+def _as_list(value):
+    if isinstance(value, str):
+        return [item for item in value.split(",") if item]
+    return list(value or [])
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+# Adds [start, end) to a sorted list of disjoint ranges, merging overlaps
+def add_range(ranges, start, end):
+    merged = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+# Returns the parts of [start, end) not covered by ranges
+def missing_ranges(ranges, start, end):
+    gaps = []
+    cursor = start
+    for s, e in ranges:
+        if e <= cursor:
+            continue
+        if s >= end:
+            break
+        if s > cursor:
+            gaps.append((cursor, s))
+        cursor = max(cursor, e)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class SeriesCache:
+    def __init__(self, directory=TS_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # Reads one series as a sorted MetricSeries; empty if it is not stored yet
+    def read_series(self, key):
+        name = _digest(key)
+        try:
+            ts = np.fromfile(self._path(name + ".ts"), dtype=np.int64)
+            values = np.fromfile(self._path(name + ".values"), dtype=np.float64)
+        except OSError:
+            return MetricSeries([], [])
+        if len(ts) != len(values):
+            # A half-written pair; drop it and fetch again
+            logging.warning(f"Discarding damaged series cache {name}")
+            return MetricSeries([], [])
+        return MetricSeries(ts, values)
+
+    # Merges a MetricSeries into a stored series; new values replace old ones at the same ts
+    def write_series(self, key, series):
+        stored = self.read_series(key)
+        ts = np.concatenate([stored.ts, series.ts])
+        values = np.concatenate([stored.values, series.values])
+        # np.unique keeps the first occurrence of each ts; reversed, that is the newest value
+        ts, first = np.unique(ts[::-1], return_index=True)
+        values = values[::-1][first]
+
+        name = _digest(key)
+        for suffix, column in ((".ts", ts), (".values", values)):
+            tmp_path = self._path(f"{name}{suffix}.{os.getpid()}.tmp")
+            column.tofile(tmp_path)
+            os.replace(tmp_path, self._path(name + suffix))
+
+    # Query scope: everything about a request except its time range
+    def read_scope(self, scope):
+        try:
+            with open(self._path(_digest(scope) + ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"coverage": [], "groups": {}, "metrics": {}}
+
+    def write_scope(self, scope, meta):
+        path = self._path(_digest(scope) + ".json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+
+# Returns the numeric "results" for [from_time, to_time), like fetch_chunked.
+# With TS_CACHE_DIR set (or a cache passed in), only the ranges this query has not
+# covered before are fetched; the rest is read from the column files.
+def fetch_series(url, params, from_time, to_time, group_by, headers=None, session=None, cache=None):
+    if cache is None:
+        if not TS_CACHE_DIR:
+            return fetch_chunked(url, params, from_time, to_time, headers=headers, session=session)
+        cache = SeriesCache(TS_CACHE_DIR)
+
+    from_time, to_time = int(from_time), int(to_time)
+    bucket = bucket_ms(params["timeBucket"])
+    aggregates = [a.lower() for a in _as_list(params.get("aggregateFunctions"))] or ["avg"]
+    scope = {"url": url, **{k: _as_list(v) if isinstance(v, list) else v for k, v in params.items()}}
+
+    # The bucket still filling is never treated as covered
+    complete_until = int(time.time() * 1000) // bucket * bucket
+
+    with locked(os.path.join(cache.directory, ".lock")):
+        meta = cache.read_scope(scope)
+        # Widen to whole buckets so a gap never splits one
+        start = from_time // bucket * bucket
+        gaps = missing_ranges(meta["coverage"], start, to_time)
+
+        for gap_start, gap_end in gaps:
+            logging.debug(f"Time-series cache miss {gap_start}-{gap_end} for {url}")
+            results = fetch_chunked(url, params, gap_start, gap_end, headers=headers, session=session)
+            _store_results(cache, meta, results, params, group_by, aggregates)
+            # A bucket cut off by an unaligned to_time was only partly fetched
+            covered_end = min(gap_end // bucket * bucket, complete_until)
+            if covered_end > gap_start:
+                meta["coverage"] = add_range(meta["coverage"], gap_start, covered_end)
+
+        if gaps:
+            cache.write_scope(scope, meta)
+        else:
+            logging.debug(f"Time-series cache hit for {url}")
+
+    return _build_results(cache, meta, params, group_by, aggregates, from_time, to_time)
+
+
+# Writes the points of fetched results into the series files and records groups and metrics in meta
+def _store_results(cache, meta, results, params, group_by, aggregates):
+    for result in results:
+        group_id = str(result.get(group_by))
+        meta["groups"][group_id] = {k: v for k, v in result.items() if k != "metricAggregates"}
+        for agg in result.get("metricAggregates", []):
+            metric = agg.get("metric")
+            meta["metrics"][metric] = {k: v for k, v in agg.items()
+                                       if k not in ("timeSeries", "metric") and k not in aggregates}
+            for aggregate in aggregates:
+                series = MetricSeries.from_points(agg.get("timeSeries", []), aggregate).dropna()
+                if len(series):
+                    cache.write_series(_series_key(group_by, group_id, metric, params, aggregate), series)
+
+
+# Filters other than the group's own dimension change what a series holds, so they are part of the key;
+# a deviceId filter on a deviceId query is not, so batched and single-device queries share series.
+def _series_key(group_by, group_id, metric, params, aggregate):
+    filters = {k: v for k, v in params.items()
+               if k not in ("metrics", "aggregateFunctions", "timeBucket", group_by)}
+    return [group_by, group_id, metric, params["timeBucket"], aggregate, filters]
+
+
+# Reads [from_time, to_time) back out of the column files in the API's "results" shape.
+# Window-level aggregates are recomputed from the points read, as merge_results does for chunks.
+def _build_results(cache, meta, params, group_by, aggregates, from_time, to_time):
+    results = []
+    for group_id, group in meta["groups"].items():
+        metric_aggregates = []
+        for metric, extra in meta["metrics"].items():
+            points = {}
+            for aggregate in aggregates:
+                series = cache.read_series(_series_key(group_by, group_id, metric, params, aggregate))
+                lo = np.searchsorted(series.ts, from_time, side="left")
+                hi = np.searchsorted(series.ts, to_time, side="left")
+                for t, v in zip(series.ts[lo:hi].tolist(), series.values[lo:hi].tolist()):
+                    points.setdefault(t, {"ts": t})[aggregate] = v
+            series = [points[t] for t in sorted(points)]
+            agg = {"metric": metric, **extra, **window_aggregates(series), "timeSeries": series}
+            metric_aggregates.append(agg)
+        results.append({**group, "metricAggregates": metric_aggregates})
+    return results
@@ -0,0 +1,140 @@
+# This module splits long time-series queries into bucket-aligned chunks and fetches them concurrently.
+# It shows how to:
+#  - Convert a timeBucket such as "10_MIN" or "2_HOUR" into milliseconds
+#  - Plan chunks whose boundaries fall on bucket boundaries, so no bucket is split between two requests
+#  - Fetch the chunks in parallel through the shared rate limiter
+#  - Stitch the timeSeries points of every group and metric back together in order,
+#    dropping the duplicate points some chunks return at their boundaries
+#  - Recompute the window-level aggregates from the merged points, weighting averages by the bucket counts
+
+# Example usage:
+#   url = api_url("/time-series/agents/numeric/deviceId")
+#   params = {"timeBucket": "10_MIN", "metrics": "COVERAGE", "aggregateFunctions": "AVG", "deviceId": device_id}
+#   results = fetch_chunked(url, params, from_time, to_time, headers=headers)
+
+import os
+import re
+import sys
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api_client import POOL_SIZE, get_session
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'rate_limiting')))
+from rate_limit import handle_rate_limits
+
+# Number of buckets per request; a longer window is split into several requests
+TS_CHUNK_BUCKETS = int(os.getenv("TS_CHUNK_BUCKETS", "144"))
+
+_UNIT_MS = {"MIN": 60 * 1000, "HOUR": 60 * 60 * 1000, "DAY": 24 * 60 * 60 * 1000, "WEEK": 7 * 24 * 60 * 60 * 1000}
+
+
+# Returns the length of a timeBucket ("10_MIN", "2_HOUR", "1_DAY") in milliseconds
+def bucket_ms(time_bucket):
+    match = re.fullmatch(r"(\d+)_(MIN|HOUR|DAY|WEEK)S?", str(time_bucket).upper())
+    if not match:
+        raise ValueError(f"Unknown timeBucket: {time_bucket}")
+    return int(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+# Splits [from_time, to_time) into (start, end) chunks of at most chunk_buckets buckets.
+# Inner boundaries are multiples of the bucket length (counted from the epoch, UTC),
+# so every bucket lands in exactly one chunk. A short window gives a single chunk.
+def plan_chunks(from_time, to_time, time_bucket, chunk_buckets=TS_CHUNK_BUCKETS):
+    from_time, to_time = int(from_time), int(to_time)
+    span = bucket_ms(time_bucket) * max(1, chunk_buckets)
+
+    chunks = []
+    start = from_time
+    while start < to_time:
+        # Next boundary on the chunk grid after start
+        end = min((start // span + 1) * span, to_time)
+        chunks.append((start, end))
+        start = end
+    return chunks or [(from_time, to_time)]
+
+
+# Identifies a result group (for example one deviceId or locationId) across chunks
+def _group_key(result):
+    return json.dumps({k: v for k, v in result.items() if k != "metricAggregates"}, sort_keys=True)
+
+
+# Window-level aggregates that combine exactly from the bucket values
+_COMBINE = {"min": min, "max": max, "count": sum, "sum": sum}
+
+
+# Recomputes the window-level aggregates of a metric from its bucket points.
+# min, max, count and sum combine directly; avg is weighted by each bucket's count, so it
+# is only returned when the points carry one (query COUNT along with AVG). Aggregates that
+# cannot be rebuilt from buckets, such as avg without counts or percentiles, are left out.
+def window_aggregates(points):
+    window = {}
+    for field in {k for p in points for k in p} & _COMBINE.keys():
+        values = [p[field] for p in points if p.get(field) is not None]
+        if values:
+            window[field] = _COMBINE[field](values)
+
+    averaged = [p for p in points if p.get("avg") is not None]
+    if averaged and all(p.get("count") is not None for p in averaged):
+        samples = sum(p["count"] for p in averaged)
+        if samples:
+            window["avg"] = sum(p["avg"] * p["count"] for p in averaged) / samples
+    return window
+
+
+# Merges the "results" of several chunks, given in time order.
+# Points are sorted by ts; when two chunks return the same ts the later chunk wins,
+# since a chunk owns the buckets that start inside it.
+# Window-level aggregates are recomputed from the merged points (see window_aggregates);
+# the ones that cannot be are dropped rather than copied from the first chunk.
+def merge_results(chunk_results):
+    groups = {}
+    for results in chunk_results:
+        for result in results:
+            group = groups.setdefault(_group_key(result), {"result": result, "metrics": {}})
+            for agg in result.get("metricAggregates", []):
+                metric = group["metrics"].setdefault(agg.get("metric"), {"agg": agg, "points": {}})
+                for point in agg.get("timeSeries", []):
+                    metric["points"][point["ts"]] = point
+
+    merged = []
+    for group in groups.values():
+        aggregates = []
+        for metric in group["metrics"].values():
+            points = [metric["points"][ts] for ts in sorted(metric["points"])]
+            agg = {**metric["agg"], "timeSeries": points}
+            if len(chunk_results) > 1:
+                # Every field the points carry besides ts is an aggregate
+                fields = {k for p in points for k in p if k != "ts"}
+                agg = {k: v for k, v in agg.items() if k not in fields}
+                agg.update(window_aggregates(points))
+            aggregates.append(agg)
+        merged.append({**group["result"], "metricAggregates": aggregates})
+    return merged
+
+
+# Fetches a numeric time-series query over [from_time, to_time), splitting it into
+# bucket-aligned chunks that are requested concurrently, and returns the merged "results".
+# params holds every query parameter except "from" and "to"; its "timeBucket" sets the chunk grid.
+# Raises requests.exceptions.HTTPError if a chunk cannot be fetched.
+def fetch_chunked(url, params, from_time, to_time, headers=None, session=None,
+                  chunk_buckets=TS_CHUNK_BUCKETS, workers=POOL_SIZE, limiter=None):
+    session = session or get_session()
+    chunks = plan_chunks(from_time, to_time, params["timeBucket"], chunk_buckets)
+
+    def fetch(chunk):
+        chunk_params = {**params, "from": chunk[0], "to": chunk[1]}
+        data = handle_rate_limits(lambda: session.get(url, headers=headers, params=chunk_params), limiter)
+        if data is None:
+            raise requests.exceptions.HTTPError(f"Failed to fetch {url} from {chunk[0]} to {chunk[1]}")
+        return data.get("results", [])
+
+    if len(chunks) == 1:
+        return fetch(chunks[0])
+
+    logging.debug(f"Fetching {url} in {len(chunks)} chunks")
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        # map keeps the chunks in time order
+        return merge_results(list(pool.map(fetch, chunks)))
@@ -1,8 +1,12 @@
 # This script demonstrates how to create new users in bulk from a CSV file.
 # It shows how to:
-#  - Read user data from a CSV file with first_name, last_name, and email columns
-#  - Fetch the "Reporter" role UUID from the /roles endpoint
+#  - Stream user data from a CSV file with first_name, last_name, and email columns,
+#    dropping incomplete and duplicate rows, so memory stays flat for very large files
+#  - Fetch the "Reporter" role UUID from the /roles endpoint, through the reference cache
 #  - Send POST requests to create each user with the Reporter role
+#  - Read every existing user from /users once and skip rows whose email already exists
+#  - Let an adaptive concurrency controller decide how many POST requests run at once
+#  - Record every outcome in a journal (<csv>.journal) so a rerun after a crash resumes where it stopped
 
 # !!!!!!!!!!!!!!!!!!!!!!
 # Note: This script requires the API key being used to have been granted the 
@@ -15,14 +19,17 @@
 #   python3 add_users_from_csv.py users.csv
 
 import os
-import csv
 import logging
-import requests
 import sys
 
 # Make sure we can import get_token and handle_rate_limits
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from bulk import ProgressReporter, iter_csv_jobs, run_bulk
+from pagination import iter_results_parallel
+from reference_cache import reference_cache
+from journal import Journal
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'rate_limiting')))
 from rate_limit import handle_rate_limits
 
@@ -34,24 +41,19 @@ logging.basicConfig(
 
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 def fetch_reporter_role_id(token):
-    url = f"https://{API_HOST}/roles"
     headers = {"Authorization": f"Bearer {token}"}
     
-    def api_call():
-        return requests.get(url, headers=headers)
-    
     try:
-        data = handle_rate_limits(api_call)
-        if not data:
-            return None
-            
-        # Find the Reporter role (try multiple possible keys)
-        for role in data.get("results", []):
-            role_key = role.get("key", "")
-            if role_key in ["Reporter", "customer:reporter", "reporter"]:
-                logging.info(f"Found Reporter role with ID: {role.get('id')}, key: {role_key}")
-                return role.get("id")
+        # Find the Reporter role (try multiple possible keys) in the cached role list
+        role = reference_cache.role_by_key("Reporter", "customer:reporter", "reporter",
+                                           headers=headers, session=session)
+        if role:
+            logging.info(f"Found Reporter role with ID: {role.get('id')}, key: {role.get('key')}")
+            return role.get("id")
         
         logging.error("Reporter role not found")
         return None
@@ -61,19 +63,11 @@ def fetch_reporter_role_id(token):
         return None
 
 def fetch_organization_id(token):
-    url = f"https://{API_HOST}/organizations"
     headers = {"Authorization": f"Bearer {token}"}
     
-    def api_call():
-        return requests.get(url, headers=headers)
-    
     try:
-        data = handle_rate_limits(api_call)
-        if not data:
-            return None
-        
-        # Get the first organization
-        results = data.get("results", [])
+        # Get the first organization from the cached organization list
+        results = reference_cache.organizations(headers, session)
         if results:
             org_id = results[0].get("id")
             org_name = results[0].get("name")
@@ -89,8 +83,9 @@ def fetch_organization_id(token):
 
 def create_user(token, first_name, last_name, email, role_id, organization_id):
     url = f"https://{API_HOST}/users"
+    # No Authorization header: the shared session adds a current token to every request,
+    # so a long job keeps working after the startup token expires
     headers = {
-        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
     
@@ -103,18 +98,58 @@ def create_user(token, first_name, last_name, email, role_id, organization_id):
     }
     
     def api_call():
-        return requests.post(url, headers=headers, json=payload)
+        return session.post(url, headers=headers, json=payload)
     
     try:
         data = handle_rate_limits(api_call)
         if data is not None:
-            logging.info(f"Created user: {first_name} {last_name} ({email})")
+            logging.debug(f"Created user: {first_name} {last_name} ({email})")
             return True
         return False
     except Exception as e:
         logging.error(f"Failed to create user {email}: {e}")
         return False
 
+# Returns the lowercased emails of every existing user, or None if /users could not be read
+def fetch_existing_emails(token):
+    url = f"https://{API_HOST}/users"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    try:
+        # Only the emails are kept, one page at a time
+        emails = {(user.get("email") or "").lower()
+                  for user in iter_results_parallel(url, headers=headers, session=session)}
+    except Exception as e:
+        logging.error(f"Failed to fetch existing users: {e}")
+        return None
+
+    emails.discard("")
+    logging.info(f"Found {len(emails)} existing users")
+    return emails
+
+# Drops users whose email already exists, counting them in counts["skipped"] and off the progress total
+def new_users(users, existing, counts, progress=None):
+    for user in users:
+        if user["email"].lower() in existing:
+            logging.debug(f"Skipping existing user {user['email']}")
+            counts["skipped"] += 1
+            if progress:
+                progress.skip()
+            continue
+        yield user
+
+# Turns a CSV row into a job, or None if a column is missing
+def parse_row(number, row):
+    first_name = (row.get("first_name") or "").strip()
+    last_name = (row.get("last_name") or "").strip()
+    email = (row.get("email") or "").strip()
+
+    if not all([first_name, last_name, email]):
+        logging.warning(f"Skipping incomplete row: {row}")
+        return None
+
+    return {"row": number, "first_name": first_name, "last_name": last_name, "email": email}
+
 def main():
     # Notice or role requirement:
     logging.warning("This script requires the Oragnization Admin role!")
@@ -140,30 +175,39 @@ def main():
         logging.error("Cannot proceed without Organization ID")
         return
     
-    # Read CSV file
+    # Index existing users by email so duplicates never reach the POST
+    existing = fetch_existing_emails(token)
+    if existing is None:
+        logging.error("Cannot proceed without the list of existing users")
+        return
+
+    # Open the CSV file; rows are read lazily while the requests go out
     try:
-        with open(csv_file) as f:
-            csv_rows = csv.DictReader(f)
-            rows = list(csv_rows)
-    except Exception as e:
+        f = open(csv_file, newline="")
+    except OSError as e:
         logging.error(f"Error reading CSV {csv_file}: {e}")
         return
-    
-    # Process each row
-    success_count = 0
-    for row in rows:
-        first_name = row.get("first_name", "").strip()
-        last_name = row.get("last_name", "").strip()
-        email = row.get("email", "").strip()
-        
-        if not all([first_name, last_name, email]):
-            logging.warning(f"Skipping incomplete row: {row}")
-            continue
-        
-        if create_user(token, first_name, last_name, email, role_id, organization_id):
-            success_count += 1
-    
-    logging.info(f"Successfully created {success_count} users from {len(rows)} rows")
+
+    # Create the new users, growing or shrinking the number of parallel
+    # requests with the observed latency and the shared rate limit budget.
+    # Users created by an interrupted run are skipped, failures are retried.
+    email_key = lambda user: user["email"].lower()
+    counts = {"skipped": 0}
+    progress = ProgressReporter()
+    with f, Journal(f"{os.path.splitext(csv_file)[0]}.journal") as journal:
+        created, failed = run_bulk(
+            new_users(iter_csv_jobs(f, parse_row, key=email_key, progress=progress), existing, counts, progress),
+            lambda user: create_user(token, user["first_name"], user["last_name"], user["email"],
+                                     role_id, organization_id),
+            success="created",
+            journal=journal,
+            key=email_key,
+            progress=progress
+        )
+
+    logging.info(f"Summary: {created} created, {counts['skipped']} skipped (already exist), {failed} failed")
+    if progress.latencies:
+        logging.info(f"Request latency: {progress.latency_line()}")
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,6 @@
 # This script demonstrates how to make an authenticated API call to fetch a list of users.
 # It shows how to:
-#  - Make a GET request to the /users endpoint with query parameters
+#  - Make a GET request to the /users endpoint with query parameters, following every page
 #  - Log the total number of users returned and basic info per user
 #  - Handle cases where the response structure may vary or be missing expected keys
 
@@ -11,6 +11,8 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from auth_utils import get_token
+from api_client import get_session
+from pagination import iter_results
 
 # Setup logging configuration
 logging.basicConfig(
@@ -21,6 +23,9 @@ logging.basicConfig(
 # Define API host from environment
 API_HOST = os.getenv("API_HOST", "api-v2.7signal.com")
 
+# Shared keep-alive session so repeated calls reuse the same connections
+session = get_session()
+
 # Fetch users endpoint URL
 users_url = f"https://{API_HOST}/users"
 
@@ -37,12 +42,8 @@ def fetch_users(token):
     logging.info(f"GET /users with params: {params}")
 
     try:
-        # send the GET request to the users endpoints
-        response = requests.get(users_url, headers=headers, params=params)
-        response.raise_for_status()
-
-        # parses the JSON response
-        data = response.json()
+        # send the GET requests to the users endpoint, one per page
+        data = {"results": list(iter_results(users_url, headers=headers, params=params, session=session))}
         logging.debug(f"Response: {data}")
 
         # calls the helper function to log the users information
@@ -51,7 +52,8 @@ def fetch_users(token):
     # logs HTTP specific errors
     except requests.exceptions.HTTPError as e:
         logging.error(f"HTTP error occurred: {e}")
-        logging.error(f"Response content: {response.text}")
+        if e.response is not None:
+            logging.error(f"Response content: {e.response.text}")
     except Exception as e:
         logging.error(f"Unexpected error occurred: {e}")
 
@@ -0,0 +1,47 @@
+# This module provides an exclusive lock on a file that works across processes.
+# It shows how to:
+#  - Use fcntl.flock on macOS/Linux and msvcrt.locking on Windows
+#  - Hold the lock for the duration of a "with" block
+
+# Example usage:
+#   with locked("/tmp/state.json.lock"):
+#       ... read and rewrite /tmp/state.json ...
+
+import os
+import time
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; msvcrt provides byte-range locks instead
+    fcntl = None
+    import msvcrt
+
+
+# Blocks until this process holds the lock on the given lock file.
+# The file is created if it does not exist and is never deleted.
+@contextlib.contextmanager
+def locked(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            # LK_LOCK gives up after about 10 seconds, so keep trying
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
@@ -0,0 +1,116 @@
+# This module provides a resumable checkpoint journal for long-running bulk jobs.
+# It shows how to:
+#  - Append the outcome of every row to a JSON-lines file as the job runs
+#  - Batch fsync calls so checkpointing costs little throughput
+#  - On restart, skip rows that already succeeded and retry only the failures
+#  - Survive a crash in the middle of a write by ignoring a torn last line
+
+# Example usage:
+#   with Journal("users.journal") as journal:
+#       run_bulk(jobs, create, journal=journal, key=lambda job: job["email"])
+
+import os
+import json
+import time
+import logging
+import threading
+
+# Force the journal to disk after this many records...
+JOURNAL_SYNC_EVERY = int(os.getenv("JOURNAL_SYNC_EVERY", "200"))
+# ...or after this many seconds, whichever comes first
+JOURNAL_SYNC_INTERVAL = float(os.getenv("JOURNAL_SYNC_INTERVAL", "1.0"))
+
+
+# Reads a journal file and returns {key: record} with the last record for each key.
+# A missing file is an empty journal.
+def load_journal(path):
+    records = {}
+    try:
+        with open(path) as f:
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Only the last line can be torn by a crash
+                    logging.warning(f"Ignoring unreadable line {number} in journal {path}")
+                    continue
+                records[record["key"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class Journal:
+    def __init__(self, path, sync_every=JOURNAL_SYNC_EVERY, sync_interval=JOURNAL_SYNC_INTERVAL):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        # Outcomes from previous runs
+        self.records = load_journal(path)
+        self.completed = {key for key, record in self.records.items() if record.get("ok")}
+
+        self.file = open(path, "a")
+        # Start on a fresh line if the previous run died in the middle of one
+        if self.file.tell() and not _ends_with_newline(path):
+            self.file.write("\n")
+
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+
+    # True if the row with this key succeeded in an earlier run
+    def is_done(self, key):
+        return str(key) in self.completed
+
+    # Appends the outcome of one row; the record reaches the disk at the next sync
+    def record(self, key, ok, outcome=None, error=""):
+        key = str(key)
+        entry = {"key": key, "ok": bool(ok), "outcome": outcome, "error": error}
+        line = json.dumps(entry) + "\n"
+
+        with self.lock:
+            self.file.write(line)
+            self.records[key] = entry
+            if ok:
+                self.completed.add(key)
+            else:
+                self.completed.discard(key)
+
+            self.unsynced += 1
+            now = time.monotonic()
+            if self.unsynced >= self.sync_every or now - self.last_sync >= self.sync_interval:
+                self._sync(now)
+
+    # Flushes buffered records and forces them to disk
+    def sync(self):
+        with self.lock:
+            self._sync(time.monotonic())
+
+    def _sync(self, now):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = now
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self._sync(time.monotonic())
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Checks the last byte of a non-empty file
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
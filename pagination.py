@@ -0,0 +1,132 @@
+# This module provides lazy iteration over paginated list endpoints.
+# It shows how to:
+#  - Follow the "pagination" block (perPage, page, total, pages) across every page
+#  - Fetch the next page in the background while the caller works on the current one
+#  - Yield records one at a time so memory stays flat however large the result set is
+#  - Once the page count is known, fetch the remaining pages in parallel within the rate limit budget
+
+# Example usage:
+#   for agent in iter_results(api_url("/eyes/agents")):
+#       print(agent["name"])
+
+import os
+import sys
+import logging
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+
+from api_client import POOL_SIZE, get_session
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'examples', 'rate_limiting')))
+from rate_limit import handle_rate_limits
+
+
+# Fetches one page through the rate limiter and returns its JSON body.
+# Raises requests.exceptions.HTTPError if the page could not be fetched.
+def _fetch_page(session, url, headers, params, per_page, page, limiter=None):
+    page_params = dict(params or {})
+    page_params["page"] = page
+    if per_page:
+        page_params["perPage"] = per_page
+
+    logging.debug(f"GET {url} page {page}")
+    data = handle_rate_limits(lambda: session.get(url, headers=headers, params=page_params), limiter)
+    if data is None:
+        raise requests.exceptions.HTTPError(f"Failed to fetch page {page} of {url}")
+    return data
+
+
+# Returns the page count from the pagination block, defaulting to `page`
+# for endpoints that return everything at once.
+def _page_count(data, page):
+    pagination = data.get("pagination") or {}
+    return pagination.get("pages") or page
+
+
+# Yields each page (the full JSON body) of a list endpoint, starting at page 1.
+# Pages are requested with "page" and, if given, "perPage" query parameters.
+# Requests go through handle_rate_limits. HTTP errors are raised as requests
+# exceptions, so callers never get silently truncated data.
+def iter_pages(url, headers=None, params=None, per_page=None, session=None, prefetch=True):
+    session = session or get_session()
+
+    def fetch(page):
+        return _fetch_page(session, url, headers, params, per_page, page)
+
+    # One background worker holds at most the next page
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = 1
+        data = fetch(page)
+        while True:
+            # Endpoints without a pagination block return everything in one page
+            pages = _page_count(data, page)
+            has_next = page < pages and bool(data.get("results"))
+
+            # Start downloading the next page before handing this one over
+            next_page = pool.submit(fetch, page + 1) if has_next and pool else None
+
+            yield data
+
+            if not has_next:
+                return
+            page += 1
+            data = next_page.result() if next_page else fetch(page)
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Yields the records in "results" across all pages of a list endpoint.
+def iter_results(url, headers=None, params=None, per_page=None, session=None, prefetch=True):
+    for data in iter_pages(url, headers, params, per_page, session, prefetch):
+        yield from data.get("results", [])
+
+
+# Like iter_pages, but once page 1 reports how many pages there are, pages 2..N
+# are fetched concurrently by `workers` threads through the shared rate limiter.
+# ordered=True yields pages in page order; ordered=False yields them as they arrive.
+# At most 2 * workers pages are downloaded ahead of the caller.
+def iter_pages_parallel(url, headers=None, params=None, per_page=None, session=None,
+                        workers=POOL_SIZE, ordered=True, limiter=None):
+    session = session or get_session()
+
+    def fetch(page):
+        return _fetch_page(session, url, headers, params, per_page, page, limiter)
+
+    first = fetch(1)
+    pages = _page_count(first, 1)
+    yield first
+    if pages <= 1 or not first.get("results"):
+        return
+
+    remaining = iter(range(2, pages + 1))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # Keep a bounded number of pages in flight
+        pending = deque(pool.submit(fetch, page) for page in itertools.islice(remaining, 2 * workers))
+        while pending:
+            if ordered:
+                done = pending.popleft()
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = finished.pop()
+                pending.remove(done)
+
+            # Top the window up before handing the page over
+            page = next(remaining, None)
+            if page is not None:
+                pending.append(pool.submit(fetch, page))
+
+            yield done.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Yields the records in "results" across all pages, fetching pages in parallel.
+def iter_results_parallel(url, headers=None, params=None, per_page=None, session=None,
+                          workers=POOL_SIZE, ordered=True, limiter=None):
+    for data in iter_pages_parallel(url, headers, params, per_page, session, workers, ordered, limiter):
+        yield from data.get("results", [])
@@ -0,0 +1,218 @@
+# This module caches slowly changing reference data: roles, organizations, groups and networks.
+# It shows how to:
+#  - Serve list endpoints from memory or from a cache file until a TTL expires
+#  - Revalidate expired entries page by page with If-None-Match / If-Modified-Since, so an unchanged
+#    list costs one 304 per page
+#  - Share the cache file between processes without torn writes
+#  - Look records up by key or name instead of scanning lists in every script
+
+# Example usage:
+#   role = reference_cache.role_by_key("customer:reporter")
+#   org = reference_cache.org_by_name("Acme")
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+import requests
+
+from api_client import API_HOST, get_session, api_url
+from auth_utils import client_id
+from file_lock import locked
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'examples', 'rate_limiting')))
+from rate_limit import handle_rate_limits
+
+# Optional file that keeps reference data between runs
+REFERENCE_CACHE_FILE = os.getenv("REFERENCE_CACHE_FILE")
+# Seconds a cached list is used without asking the API (default one hour)
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "3600"))
+
+
+class ReferenceCache:
+    def __init__(self, path=REFERENCE_CACHE_FILE, ttl=REFERENCE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries = None
+        self.lock = threading.Lock()
+
+    # Entries are stored per API key and host, since each key sees its own organization.
+    # The key is hashed so the client_id does not appear in the file.
+    def _key(self, path):
+        return hashlib.sha256(f"{client_id}@{API_HOST}{path}".encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if self.entries is None:
+            self.entries = {}
+            if self.path:
+                try:
+                    with open(self.path) as f:
+                        self.entries = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self.entries
+
+    # Writes one entry to the cache file, merging with entries written by other processes
+    def _save(self, key, entry):
+        if not self.path:
+            return
+        with locked(self.path + ".lock"):
+            try:
+                with open(self.path) as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            cache[key] = entry
+
+            # Swap in a complete file so readers never see a half-written one
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.path)
+
+    # Returns every record of a list endpoint such as "/roles".
+    # Fresh entries cost no request; expired ones are revalidated with the ETag or
+    # Last-Modified value stored for each page, and only changed pages are downloaded again.
+    # Raises requests.exceptions.HTTPError if the list cannot be fetched and nothing is cached.
+    def get(self, path, headers=None, session=None):
+        key = self._key(path)
+        with self.lock:
+            entry = self._load().get(key)
+            if entry and time.time() - entry["fetched_at"] < self.ttl:
+                logging.debug(f"Reference data {path} served from cache")
+                return entry["results"]
+
+            entry = self._refresh(path, entry, headers, session or get_session())
+            self.entries[key] = entry
+            self._save(key, entry)
+            return entry["results"]
+
+    # Reads every page of a list. Each page keeps its own ETag / Last-Modified and record count,
+    # so a 304 reuses that page's slice of the cached results and a change on any page is seen.
+    def _refresh(self, path, entry, headers, session):
+        url = api_url(path)
+        cached_pages = (entry or {}).get("pages") or []
+        cached_results = (entry or {}).get("results") or []
+        # Page size, from the API's perPage or else the first of several cached pages
+        per_page = (entry or {}).get("per_page") or (cached_pages[0]["count"] if len(cached_pages) > 1 else None)
+
+        pages, results = [], []
+        offset = 0
+        page, page_count = 1, max(1, len(cached_pages))
+        # Set once a 200 has told us the current number of pages
+        counted = False
+        while page <= page_count:
+            known = cached_pages[page - 1] if page <= len(cached_pages) else None
+            response, data = self._fetch_page(url, page, known, headers, session)
+
+            if known and response is not None and response.status_code == 304:
+                pages.append(known)
+                results.extend(cached_results[offset:offset + known["count"]])
+                # A 304 has no pagination block, so records added after a full last page
+                # would go unseen; ask for the page after it as well
+                if not counted and page == page_count and per_page and known["count"] >= per_page:
+                    page_count += 1
+            elif data is None:
+                if entry:
+                    # Better slightly stale reference data than none
+                    logging.warning(f"Could not refresh {path}; using cached copy")
+                    return entry
+                raise requests.exceptions.HTTPError(f"Failed to fetch page {page} of {url}")
+            else:
+                page_results = data.get("results", [])
+                if page > 1 and not page_results:
+                    break
+                pagination = data.get("pagination") or {}
+                if page == 1:
+                    per_page = pagination.get("perPage") or per_page
+                pages.append({
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "count": len(page_results),
+                })
+                results.extend(page_results)
+                # Endpoints without a pagination block return everything in one page
+                page_count = pagination.get("pages") or page
+                counted = True
+                if not page_results:
+                    break
+
+            if known:
+                offset += known["count"]
+            page += 1
+
+        if pages == cached_pages:
+            logging.debug(f"Reference data {path} not modified")
+        else:
+            logging.debug(f"Reference data {path} fetched ({len(results)} records)")
+        return {"fetched_at": time.time(), "pages": pages, "per_page": per_page, "results": results}
+
+    # Requests one page, conditionally when its validators are known.
+    # Returns the response (None if no request got through) and the JSON body (None unless 2xx).
+    def _fetch_page(self, url, page, known, headers, session):
+        request_headers = dict(headers or {})
+        if known and known.get("etag"):
+            request_headers["If-None-Match"] = known["etag"]
+        if known and known.get("last_modified"):
+            request_headers["If-Modified-Since"] = known["last_modified"]
+
+        # Keep the response so its status and validators can be read after the rate limiter
+        sent = {}
+        def api_call():
+            sent["response"] = session.get(url, headers=request_headers, params={"page": page})
+            return sent["response"]
+
+        data = handle_rate_limits(api_call)
+        return sent.get("response"), data
+
+    # Drops one path, or everything, from the cache
+    def invalidate(self, path=None):
+        with self.lock:
+            entries = self._load()
+            if path is None:
+                entries.clear()
+            else:
+                entries.pop(self._key(path), None)
+
+    def roles(self, headers=None, session=None):
+        return self.get("/roles", headers, session)
+
+    def organizations(self, headers=None, session=None):
+        return self.get("/organizations", headers, session)
+
+    def groups(self, headers=None, session=None):
+        return self.get("/groups", headers, session)
+
+    def network_agents(self, headers=None, session=None):
+        return self.get("/networks/agents", headers, session)
+
+    # Returns the first role whose key matches any of keys (case-insensitive), or None
+    def role_by_key(self, *keys, headers=None, session=None):
+        wanted = [key.lower() for key in keys]
+        roles = {(role.get("key") or "").lower(): role for role in self.roles(headers, session)}
+        return next((roles[key] for key in wanted if key in roles), None)
+
+    # Returns the organization with this name (case-insensitive), or None
+    def org_by_name(self, name, headers=None, session=None):
+        return _find(self.organizations(headers, session), "name", name)
+
+    # Returns the group with this key (case-insensitive), or None
+    def group_by_key(self, key, headers=None, session=None):
+        return _find(self.groups(headers, session), "key", key)
+
+    # Returns the network agent with this name (case-insensitive), or None
+    def network_agent_by_name(self, name, headers=None, session=None):
+        return _find(self.network_agents(headers, session), "name", name)
+
+
+def _find(records, field, value):
+    value = (value or "").lower()
+    return next((r for r in records if (r.get(field) or "").lower() == value), None)
+
+
+# Shared cache used by the example scripts
+reference_cache = ReferenceCache()
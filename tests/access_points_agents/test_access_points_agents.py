@@ -15,7 +15,7 @@ def test_fetch_accesspoints_function_exists():
 
 
 # Test that fetch_accesspoints correctly handles a successful API call
-@patch("examples.access_points.access_points_agents.requests.get")
+@patch("examples.access_points.access_points_agents.session.get")
 def test_fetch_accesspoints_success(mock_get, caplog):
     # Sample data to return from the mocked API call
     sample_data = {
@@ -35,6 +35,8 @@ def test_fetch_accesspoints_success(mock_get, caplog):
     # Simulate HTTP 200 OK
     mock_response.status_code = 200
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     # Return our sample data
     mock_response.json.return_value = sample_data 
     # Avoid raising exceptions
@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import agent_index
+
+# Builds a fake session serving `agents` from /eyes/agents in pages of `per_page`,
+# sorted by lastTestSeen (newest first) when asked to; agents never tested come first or last
+def make_agents_session(agents, per_page=2, nulls_first=False):
+    session = MagicMock()
+
+    def get(url, headers=None, params=None):
+        records = agents
+        if params.get("sort") == "lastTestSeen":
+            tested = sorted((a for a in agents if a.get("lastTestSeen")), key=lambda a: a["lastTestSeen"], reverse=True)
+            untested = [a for a in agents if not a.get("lastTestSeen")]
+            records = untested + tested if nulls_first else tested + untested
+        page = params["page"]
+        pages = max(1, -(-len(records) // per_page))
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {}
+        response.json.return_value = {
+            "pagination": {"perPage": per_page, "page": page, "total": len(records), "pages": pages},
+            "results": records[(page - 1) * per_page:page * per_page]
+        }
+        return response
+
+    session.get.side_effect = get
+    return session
+
+def make_agents():
+    return [
+        {"id": "a1", "name": "WINPC-USER1", "macAddress": "00:11:22:AA:BB:01", "lastTestSeen": "2025-08-01T10:00:00Z"},
+        {"id": "a2", "name": "laptop-john", "macAddress": "00:11:22:AA:BB:02", "lastTestSeen": "2025-08-02T10:00:00Z"},
+        {"id": "a3", "name": "desk-3", "lastTestSeen": "2025-08-03T10:00:00Z"},
+        {"id": "a4", "name": "desk-4", "lastTestSeen": "2025-08-04T10:00:00Z"},
+        {"id": "a5", "name": "desk-5", "lastTestSeen": "2025-08-05T10:00:00Z"},
+    ]
+
+@pytest.fixture
+def index(tmp_path):
+    with agent_index.AgentIndex(str(tmp_path / "agents.db")) as index:
+        yield index
+
+# Test that the first refresh downloads every agent and lookups work by name, id and MAC
+def test_full_refresh_and_lookups(index):
+    index.refresh(session=make_agents_session(make_agents()))
+
+    assert len(index) == 5
+    assert index.get("winpc-user1")["id"] == "a1"
+    assert index.get("missing") is None
+    assert index.get_by_id("a2")["name"] == "laptop-john"
+    assert index.get_by_mac("0011.22aa.bb02")["id"] == "a2"
+
+# Test that a later refresh only reads pages until it reaches agents already seen
+def test_incremental_refresh_stops_early(index):
+    agents = make_agents()
+    index.refresh(session=make_agents_session(agents))
+
+    agents[0] = {**agents[0], "nickname": "Front desk", "lastTestSeen": "2025-08-09T10:00:00Z"}
+    session = make_agents_session(agents)
+    index.refresh(session=session)
+
+    assert index.get("winpc-user1")["nickname"] == "Front desk"
+    # Page 1 already holds an agent older than the watermark
+    pages = [call.kwargs["params"]["page"] for call in session.get.call_args_list]
+    assert 3 not in pages
+
+# Test that an index older than max_age is downloaded again, dropping deleted agents
+def test_stale_index_gets_full_refresh(index):
+    index.refresh(session=make_agents_session(make_agents()))
+    index.max_age = -1
+
+    index.refresh(session=make_agents_session(make_agents()[:2]))
+
+    assert len(index) == 2
+    assert index.get("desk-5") is None
+
+# Test that the index keeps its contents between runs and applies PATCHed fields
+def test_index_persists_updates(tmp_path):
+    path = str(tmp_path / "agents.db")
+    with agent_index.AgentIndex(path) as index:
+        index.refresh(session=make_agents_session(make_agents()))
+        index.update_fields("a2", {"isLicensed": True})
+
+    with agent_index.AgentIndex(path) as index:
+        assert index.get("laptop-john")["isLicensed"] is True
+
+# Test that a new agent that was never tested is indexed when it is sorted first
+def test_incremental_refresh_keeps_untested_agents(index):
+    agents = make_agents()
+    index.refresh(session=make_agents_session(agents))
+
+    agents.append({"id": "a6", "name": "new-laptop", "lastTestSeen": None})
+    session = make_agents_session(agents, nulls_first=True)
+    index.refresh(session=session)
+
+    assert index.get("new-laptop")["id"] == "a6"
+    # No full download was needed
+    assert all(call.kwargs["params"].get("sort") for call in session.get.call_args_list)
+
+# Test that a never-tested agent sorted after the watermark triggers a full refresh
+def test_missing_untested_agent_triggers_full_refresh(index):
+    agents = make_agents()
+    index.refresh(session=make_agents_session(agents))
+
+    agents.append({"id": "a6", "name": "new-laptop"})
+    index.refresh(session=make_agents_session(agents))
+
+    assert index.get("new-laptop")["id"] == "a6"
+    assert len(index) == 6
+
+# Test that a full refresh failing half-way keeps the previous contents
+def test_failed_full_refresh_keeps_index(index):
+    index.refresh(session=make_agents_session(make_agents()))
+
+    with pytest.raises(KeyError):
+        index.refresh(session=make_agents_session(make_agents() + [{"name": "no-id"}]), full=True)
+
+    assert len(index) == 5
@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import api_client
+
+# Test that get_session always hands back the same shared session
+def test_get_session_is_shared():
+    assert api_client.get_session() is api_client.get_session()
+
+# Test that create_session sizes the connection pool as requested
+def test_create_session_pool_size():
+    session = api_client.create_session(pool_size=25)
+    adapter = session.get_adapter("https://example.com")
+
+    assert adapter._pool_maxsize == 25
+    assert adapter._pool_connections == 25
+
+# Test that BearerAuth injects the token from get_token
+@patch("api_client.get_token", return_value=("fake-token", 0))
+def test_bearer_auth_adds_header(mock_get_token):
+    request = MagicMock()
+    request.headers = {}
+
+    api_client.BearerAuth()(request)
+
+    assert request.headers["Authorization"] == "Bearer fake-token"
+    mock_get_token.assert_called_once()
+
+# Test that BearerAuth keeps an Authorization header the caller already set
+@patch("api_client.get_token", return_value=("fake-token", 0))
+def test_bearer_auth_keeps_existing_header(mock_get_token):
+    request = MagicMock()
+    request.headers = {"Authorization": "Bearer caller-token"}
+
+    api_client.BearerAuth()(request)
+
+    assert request.headers["Authorization"] == "Bearer caller-token"
+    mock_get_token.assert_not_called()
+
+# Test that api_url joins the host and path with a single slash
+def test_api_url():
+    assert api_client.api_url("/eyes/agents") == f"https://{api_client.API_HOST}/eyes/agents"
+    assert api_client.api_url("eyes/agents") == f"https://{api_client.API_HOST}/eyes/agents"
+
+# Test that header_number parses numeric headers and ignores missing or malformed ones
+def test_header_number():
+    headers = {"x-ratelimit-remaining": "7", "x-ratelimit-burst-capacity": "ten"}
+
+    assert api_client.header_number(headers, "x-ratelimit-remaining") == 7.0
+    assert api_client.header_number(headers, "x-ratelimit-burst-capacity") is None
+    assert api_client.header_number(headers, "x-ratelimit-replenish-rate") is None
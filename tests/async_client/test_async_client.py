@@ -0,0 +1,125 @@
+import pytest
+import sys
+import os
+import time
+import asyncio
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# The async client is optional and needs aiohttp
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Import the module to be tested
+import auth_utils
+import async_client
+
+# Clear the cached token before and after each test
+@pytest.fixture(autouse=True)
+def reset_token_info():
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+    yield
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+
+# Starts a local aiohttp server with the given routes, runs `body(server)` and returns its result
+def run_with_server(routes, body, monkeypatch):
+    async def runner():
+        app = web.Application()
+        app.add_routes(routes)
+        server = TestServer(app)
+        await server.start_server()
+
+        # Send every API and token request to the local server
+        base = str(server.make_url("")).rstrip("/")
+        monkeypatch.setattr(async_client, "api_url", lambda path: f"{base}/{path.lstrip('/')}")
+        monkeypatch.setattr(auth_utils, "token_url", f"{base}/oauth2/token")
+        try:
+            async with async_client.create_async_session() as session:
+                return await body(session)
+        finally:
+            await server.close()
+    return asyncio.run(runner())
+
+# Test that concurrent coroutines with no token share a single token request
+def test_get_token_async_single_flight(monkeypatch):
+    calls = []
+
+    async def token(request):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return web.json_response({"access_token": "async-token", "expires_in": 3600})
+
+    async def body(session):
+        return await asyncio.gather(*(async_client.get_token_async(session) for _ in range(10)))
+
+    results = run_with_server([web.post("/oauth2/token", token)], body, monkeypatch)
+
+    assert [t for t, _ in results] == ["async-token"] * 10
+    assert len(calls) == 1
+    assert auth_utils.token_info["access_token"] == "async-token"
+
+# Test that license_agent sends a PATCH with the bearer token and payload
+def test_license_agent(monkeypatch):
+    seen = []
+    auth_utils.token_info.update(access_token="cached", expires_at=time.time() + 3600,
+                                 refresh_at=time.time() + 3000)
+
+    async def patch_agent(request):
+        seen.append((request.match_info["agent_id"], request.headers["Authorization"], await request.json()))
+        return web.json_response({"id": request.match_info["agent_id"]})
+
+    async def body(session):
+        return await async_client.license_agent(session, "agent-1")
+
+    assert run_with_server([web.patch("/eyes/agents/{agent_id}", patch_agent)], body, monkeypatch) is True
+    assert seen == [("agent-1", "Bearer cached", {"isLicensed": True})]
+
+# Test that update_nickname reports failure for a non-retriable error
+def test_update_nickname_failure(monkeypatch):
+    auth_utils.token_info.update(access_token="cached", expires_at=time.time() + 3600,
+                                 refresh_at=time.time() + 3000)
+
+    async def patch_agent(request):
+        return web.json_response({"message": "not found"}, status=404)
+
+    async def body(session):
+        return await async_client.update_nickname(session, "missing", "Nick")
+
+    assert run_with_server([web.patch("/eyes/agents/{agent_id}", patch_agent)], body, monkeypatch) is False
+
+# Test that fetch_agents returns the results list
+def test_fetch_agents(monkeypatch):
+    auth_utils.token_info.update(access_token="cached", expires_at=time.time() + 3600,
+                                 refresh_at=time.time() + 3000)
+
+    async def list_agents(request):
+        return web.json_response({"results": [{"id": "1", "name": "Laptop"}]})
+
+    async def body(session):
+        return await async_client.fetch_agents(session)
+
+    assert run_with_server([web.get("/eyes/agents", list_agents)], body, monkeypatch) == [{"id": "1", "name": "Laptop"}]
+
+# Test that fetch_agents follows every page, and returns nothing rather than a partial fleet
+def test_fetch_agents_all_pages(monkeypatch):
+    auth_utils.token_info.update(access_token="cached", expires_at=time.time() + 3600,
+                                 refresh_at=time.time() + 3000)
+    failing = set()
+
+    async def list_agents(request):
+        page = int(request.query["page"])
+        if page in failing:
+            return web.Response(status=500, text="error")
+        return web.json_response({"pagination": {"page": page, "pages": 3, "total": 6},
+                                  "results": [{"id": f"{page}-{i}"} for i in range(2)]})
+
+    async def body(session):
+        return await async_client.fetch_agents(session)
+
+    agents = run_with_server([web.get("/eyes/agents", list_agents)], body, monkeypatch)
+    assert [a["id"] for a in agents] == ["1-0", "1-1", "2-0", "2-1", "3-0", "3-1"]
+
+    failing.add(3)
+    assert run_with_server([web.get("/eyes/agents", list_agents)], body, monkeypatch) == []
@@ -0,0 +1,143 @@
+import pytest
+import sys
+import os
+import time
+import threading
+from unittest.mock import patch, MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import auth_utils
+
+# Helper function to create a mocked token response
+def make_token_response(token="new-token", expires_in=3600):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.json.return_value = {"access_token": token, "expires_in": expires_in}
+    return resp
+
+# Clear the cached token before and after each test
+@pytest.fixture(autouse=True)
+def reset_token_info():
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+    yield
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+
+# Test that a fresh token is requested and then reused from memory
+@patch("auth_utils.requests.post")
+def test_get_token_requests_then_reuses(mock_post):
+    mock_post.return_value = make_token_response()
+
+    token, expires_at = auth_utils.get_token()
+    again, _ = auth_utils.get_token()
+
+    assert token == "new-token"
+    assert again == "new-token"
+    assert expires_at > time.time()
+    mock_post.assert_called_once()
+
+# Test that a failed token request returns (None, None)
+@patch("auth_utils.requests.post")
+def test_get_token_failure(mock_post):
+    mock_post.return_value = MagicMock(status_code=401, text="Unauthorized")
+
+    assert auth_utils.get_token() == (None, None)
+
+# Test that the refresh point never falls before half of a short token lifetime
+@patch("auth_utils.requests.post")
+def test_refresh_at_for_short_lived_token(mock_post):
+    mock_post.return_value = make_token_response(expires_in=20)
+
+    _, expires_at = auth_utils.get_token()
+
+    assert auth_utils.token_info["refresh_at"] == pytest.approx(expires_at - 10)
+
+# Test that a token close to expiry is still served while one refresh runs in the background
+@patch("auth_utils.requests.post")
+def test_refresh_ahead_serves_current_token(mock_post):
+    now = time.time()
+    auth_utils.token_info.update(access_token="old-token", expires_at=now + 30, refresh_at=now - 1)
+
+    release = threading.Event()
+
+    def slow_post(*args, **kwargs):
+        release.wait(timeout=5)
+        return make_token_response()
+    mock_post.side_effect = slow_post
+
+    # Every caller gets the current token while the refresh is blocked
+    tokens = [auth_utils.get_token()[0] for _ in range(10)]
+    assert tokens == ["old-token"] * 10
+
+    release.set()
+    for _ in range(50):
+        if auth_utils.token_info["access_token"] == "new-token":
+            break
+        time.sleep(0.01)
+
+    assert auth_utils.token_info["access_token"] == "new-token"
+    mock_post.assert_called_once()
+
+# Test that concurrent callers with no valid token collapse onto one request
+@patch("auth_utils.requests.post")
+def test_concurrent_callers_single_flight(mock_post):
+    def slow_post(*args, **kwargs):
+        time.sleep(0.05)
+        return make_token_response()
+    mock_post.side_effect = slow_post
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(auth_utils.get_token()[0]))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["new-token"] * 8
+    mock_post.assert_called_once()
+
+# Test that a token written to the cache file is picked up without a new request
+@patch("auth_utils.requests.post")
+def test_token_cache_file_shared_between_runs(mock_post, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_utils, "TOKEN_CACHE_FILE", str(tmp_path / "token_cache.json"))
+    mock_post.return_value = make_token_response(token="cached-token")
+
+    # First run requests a token and writes it to the file
+    assert auth_utils.get_token()[0] == "cached-token"
+    assert os.path.exists(tmp_path / "token_cache.json")
+
+    # A new process starts with an empty token_info but finds the cached token
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+    assert auth_utils.get_token()[0] == "cached-token"
+    mock_post.assert_called_once()
+
+# Test that a cached token for a different API key is ignored
+@patch("auth_utils.requests.post")
+def test_token_cache_file_keyed_by_client(mock_post, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_utils, "TOKEN_CACHE_FILE", str(tmp_path / "token_cache.json"))
+    mock_post.return_value = make_token_response(token="first-key-token")
+    auth_utils.get_token()
+
+    # Switch to another API key and start from an empty memory cache
+    monkeypatch.setattr(auth_utils, "client_id", "another-client")
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+    mock_post.return_value = make_token_response(token="second-key-token")
+
+    assert auth_utils.get_token()[0] == "second-key-token"
+    assert mock_post.call_count == 2
+
+# Test that a cached token past its refresh point is replaced
+@patch("auth_utils.requests.post")
+def test_token_cache_file_stale_entry_refreshed(mock_post, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth_utils, "TOKEN_CACHE_FILE", str(tmp_path / "token_cache.json"))
+    now = time.time()
+    auth_utils.token_info.update(access_token="stale-token", expires_at=now + 5, refresh_at=now - 1)
+    auth_utils._write_cached_token()
+    auth_utils.token_info.update(access_token=None, expires_at=0, refresh_at=0)
+    mock_post.return_value = make_token_response(token="fresh-token")
+
+    assert auth_utils.get_token()[0] == "fresh-token"
+    mock_post.assert_called_once()
@@ -0,0 +1,144 @@
+import pytest
+import sys
+import os
+import csv
+import io
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import bulk
+
+# A session stand-in so run_adaptive can attach its response hook
+@pytest.fixture(autouse=True)
+def fake_session(monkeypatch):
+    monkeypatch.setattr("concurrency.get_session", lambda: MagicMock(hooks={"response": []}))
+
+# Test that ResultsWriter writes a header and one line per row
+def test_results_writer(tmp_path):
+    path = tmp_path / "results.csv"
+
+    with bulk.ResultsWriter(str(path), ["row", "outcome"]) as results:
+        results.write({"row": 1, "outcome": "licensed"})
+        results.write({"row": 2, "outcome": "failed", "extra": "ignored"})
+
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{"row": "1", "outcome": "licensed"}, {"row": "2", "outcome": "failed"}]
+
+# Test that the progress line shows counts, rate and ETA
+def test_progress_line_has_eta():
+    progress = bulk.ProgressReporter(total=100, interval=3600, stream=io.StringIO())
+    progress.started -= 10
+    for ok in [True] * 19 + [False]:
+        progress.update(ok)
+
+    line = progress.line()
+
+    assert line.startswith("20/100 done, 1 failed | 2.0 req/s")
+    assert "ETA 0:00:40" in line
+
+# Test that run_bulk counts outcomes and records every job in the results file
+def test_run_bulk_records_outcomes(tmp_path):
+    path = tmp_path / "results.csv"
+    jobs = [{"row": i, "agent_id": f"a{i}"} for i in range(1, 7)]
+
+    def work(job):
+        if job["row"] == 3:
+            raise RuntimeError("boom")
+        return job["row"] % 2 == 1
+
+    with bulk.ResultsWriter(str(path), ["row", "agent_id", "outcome", "error"]) as results:
+        succeeded, failed = bulk.run_bulk(jobs, work, results, success="licensed")
+
+    assert (succeeded, failed) == (2, 4)
+    with open(path) as f:
+        rows = {int(r["row"]): r for r in csv.DictReader(f)}
+    assert rows[1]["outcome"] == "licensed"
+    assert rows[2]["outcome"] == "failed"
+    assert rows[3]["error"] == "boom"
+    assert len(rows) == 6
+
+# Test that a rerun with the same journal skips rows that succeeded and retries failures
+def test_run_bulk_resumes_from_journal(tmp_path):
+    from journal import Journal
+    jobs = [{"row": n} for n in range(1, 6)]
+    path = str(tmp_path / "job.journal")
+
+    with Journal(path) as journal:
+        assert bulk.run_bulk(jobs, lambda job: job["row"] != 3, journal=journal) == (4, 1)
+
+    seen = []
+    with Journal(path) as journal:
+        assert bulk.run_bulk(jobs, lambda job: seen.append(job["row"]) or True, journal=journal) == (1, 0)
+    assert seen == [3]
+
+# Test that iter_csv_jobs skips invalid rows and keeps the last row for a duplicate key
+def test_iter_csv_jobs_validates_and_dedupes():
+    f = io.StringIO("hostname,nickname\n WinPC ,old\n,\nlaptop,lap\nwinpc,new\n")
+
+    def parse(number, row):
+        hostname = row["hostname"].strip().lower()
+        return {"row": number, "hostname": hostname, "nickname": row["nickname"]} if hostname else None
+
+    jobs = list(bulk.iter_csv_jobs(f, parse, key=lambda job: job["hostname"]))
+
+    assert jobs == [{"row": 3, "hostname": "laptop", "nickname": "lap"},
+                    {"row": 4, "hostname": "winpc", "nickname": "new"}]
+
+# Test that without a key every valid row is yielded in one pass
+def test_iter_csv_jobs_without_key():
+    f = io.StringIO("hostname\nwinpc\n\nwinpc\n")
+
+    jobs = list(bulk.iter_csv_jobs(f, lambda number, row: row["hostname"] or None))
+
+    assert jobs == ["winpc", "winpc"]
+
+# Test that the first pass sets the progress total to the number of jobs
+def test_iter_csv_jobs_sets_progress_total():
+    f = io.StringIO("hostname\nwinpc\nlaptop\nwinpc\n")
+    progress = bulk.ProgressReporter(stream=io.StringIO())
+
+    jobs = bulk.iter_csv_jobs(f, lambda number, row: row["hostname"], key=lambda job: job, progress=progress)
+
+    assert next(jobs) == "laptop"
+    assert progress.total == 2
+
+# Test that a single pass keeps the first row per key and lowers the estimated total for dropped rows
+def test_iter_csv_jobs_single_pass_keeps_first():
+    f = io.StringIO("hostname\nwinpc\n,\nlaptop\nwinpc\n")
+    progress = bulk.ProgressReporter(stream=io.StringIO())
+
+    jobs = bulk.iter_csv_jobs(f, lambda number, row: row["hostname"] or None, key=lambda job: job,
+                              last=False, progress=progress)
+
+    assert next(jobs) == "winpc"
+    assert progress.total == 4
+    assert list(jobs) == ["laptop"]
+    assert progress.total == 2
+
+# Test that run_bulk accepts a lazy iterator of jobs
+def test_run_bulk_with_iterator():
+    jobs = ({"row": n} for n in range(10))
+
+    assert bulk.run_bulk(jobs, lambda job: job["row"] % 2 == 0) == (5, 5)
+
+# Test that latency percentiles use the nearest-rank method
+def test_latency_percentiles():
+    progress = bulk.ProgressReporter(stream=io.StringIO())
+    for ms in range(1, 101):
+        progress.update(True, ms / 1000)
+
+    assert progress.latency_percentiles() == {50: 0.05, 90: 0.09, 99: 0.099}
+    assert progress.latency_line() == "p50 50ms, p90 90ms, p99 99ms"
+
+# Test that run_bulk records a latency for every job in the given reporter
+def test_run_bulk_records_latency():
+    progress = bulk.ProgressReporter(stream=io.StringIO())
+
+    bulk.run_bulk([{"row": n} for n in range(5)], lambda job: True, progress=progress)
+
+    assert len(progress.latencies) == 5
+    assert progress.total == 5
@@ -0,0 +1,150 @@
+import pytest
+import sys
+import os
+import time
+import threading
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import concurrency
+
+# Test that healthy responses grow the window by about one per window of responses
+def test_window_grows_when_healthy():
+    controller = concurrency.AdaptiveConcurrency(initial=2, maximum=32)
+
+    for _ in range(20):
+        controller.observe(200, 0.1, remaining=90, capacity=100)
+
+    assert controller.limit > 2
+    assert controller.limit <= 32
+
+# Test that the window never grows past the maximum
+def test_window_capped_at_maximum():
+    controller = concurrency.AdaptiveConcurrency(initial=2, maximum=4)
+
+    for _ in range(200):
+        controller.observe(200, 0.1)
+
+    assert controller.limit == 4
+
+# Test that a 429 halves the window
+def test_429_halves_window():
+    controller = concurrency.AdaptiveConcurrency(initial=16, maximum=32)
+
+    controller.observe(429, 0.1)
+
+    assert controller.limit == 8
+    assert controller.metrics()["throttled"] == 1
+
+# Test that a burst of 429s from requests already in flight only cuts once
+def test_429_burst_cuts_once_per_round_trip():
+    controller = concurrency.AdaptiveConcurrency(initial=16, maximum=32)
+    controller.observe(200, 0.5)
+
+    for _ in range(5):
+        controller.observe(429, 0.5)
+
+    assert controller.limit == 8
+
+# Test that a latency spike shrinks the window
+def test_latency_spike_shrinks_window():
+    controller = concurrency.AdaptiveConcurrency(initial=10, maximum=32)
+    controller.observe(200, 0.01)
+    window = controller.limit
+
+    controller.observe(200, 1.0)
+
+    assert controller.limit < window
+
+# Test that a lasting step up in latency becomes the new baseline and the window recovers
+def test_sustained_latency_step_recovers(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(concurrency.time, "monotonic", lambda: clock[0])
+    controller = concurrency.AdaptiveConcurrency(initial=12, maximum=32)
+    for _ in range(20):
+        clock[0] += 0.01
+        controller.observe(200, 0.1)
+
+    for _ in range(300):
+        clock[0] += 0.1
+        controller.observe(200, 1.0)
+
+    assert controller.baseline_latency > 0.5
+    assert controller.limit > 12
+
+# Test that growth stops while the rate limit budget is low
+def test_low_budget_stops_growth():
+    controller = concurrency.AdaptiveConcurrency(initial=4, maximum=32)
+
+    for _ in range(20):
+        controller.observe(200, 0.1, remaining=5, capacity=100)
+
+    assert controller.limit == 4
+
+# Test that observe_response reads status, latency and rate limit headers from a requests response
+def test_observe_response_reads_headers():
+    controller = concurrency.AdaptiveConcurrency(initial=4, maximum=32)
+    response = MagicMock()
+    response.status_code = 429
+    response.elapsed = timedelta(milliseconds=50)
+    response.headers = {"x-ratelimit-remaining": "0", "x-ratelimit-burst-capacity": "10"}
+
+    controller.observe_response(response)
+
+    assert controller.limit == 2
+
+# Test that run_adaptive runs every item, keeps order and respects the window
+def test_run_adaptive_respects_window():
+    controller = concurrency.AdaptiveConcurrency(initial=3, maximum=3)
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return item * 2
+
+    results = concurrency.run_adaptive(range(20), work, controller, session=MagicMock(hooks={"response": []}))
+
+    assert results == [i * 2 for i in range(20)]
+    assert peak[0] <= 3
+
+# Test that run_adaptive attaches the controller to the session only while running
+def test_run_adaptive_detaches_hook():
+    session = MagicMock(hooks={"response": []})
+    controller = concurrency.AdaptiveConcurrency()
+
+    def work(item):
+        assert controller.observe_response in session.hooks["response"]
+        return item
+
+    concurrency.run_adaptive([1, 2], work, controller, session=session)
+
+    assert session.hooks["response"] == []
+
+# Test that items are pulled lazily: the first result comes back before the input is exhausted
+def test_iter_adaptive_streams_items():
+    controller = concurrency.AdaptiveConcurrency(initial=2, maximum=2)
+    pulled = [0]
+
+    def items():
+        for i in range(1000):
+            pulled[0] += 1
+            yield i
+
+    results = concurrency.iter_adaptive(items(), lambda item: item, controller,
+                                        session=MagicMock(hooks={"response": []}))
+
+    assert next(results) == 0
+    # Only a bounded backlog has been read from the input
+    assert pulled[0] <= 2 * controller.maximum + 1
+    assert list(results) == list(range(1, 1000))
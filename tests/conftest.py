@@ -0,0 +1,14 @@
+import pytest
+import sys
+import os
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from reference_cache import reference_cache
+
+
+# Start every test with an empty reference cache so no test sees another's data
+@pytest.fixture(autouse=True)
+def empty_reference_cache():
+    reference_cache.invalidate()
@@ -0,0 +1,173 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.eyes import agent_sync
+
+AGENTS = {
+    "winpc-user1": {"id": "a1", "name": "WINPC-USER1", "isLicensed": True, "nickname": "Front desk"},
+    "laptop-john": {"id": "a2", "name": "laptop-john", "isLicensed": False},
+}
+
+# Test that only fields with a different current value are kept
+def test_changed_fields():
+    agent = AGENTS["winpc-user1"]
+
+    assert agent_sync.changed_fields(agent, {"isLicensed": True}) == {}
+    assert agent_sync.changed_fields(agent, {"nickname": "Lobby"}) == {"nickname": "Lobby"}
+
+# Test that rows are split into updates, unchanged agents and unmatched hostnames
+def test_plan_agent_updates():
+    targets = [
+        (1, "winpc-user1", {"isLicensed": True}),
+        (2, "laptop-john", {"isLicensed": True}),
+        (3, "desktop-test", {"isLicensed": True}),
+    ]
+
+    plan = agent_sync.plan_agent_updates(targets, AGENTS)
+
+    assert [e["agent_id"] for e in plan["update"]] == ["a2"]
+    assert plan["update"][0]["fields"] == {"isLicensed": True}
+    assert [e["agent_id"] for e in plan["unchanged"]] == ["a1"]
+    assert [e["hostname"] for e in plan["no_match"]] == ["desktop-test"]
+
+# Test that a missing field counts as a change
+def test_plan_agent_updates_missing_field():
+    plan = agent_sync.plan_agent_updates([(1, "laptop-john", {"nickname": "John"})], AGENTS)
+
+    assert plan["update"][0]["fields"] == {"nickname": "John"}
+
+# Test that only updates are yielded, while skipped rows are reported and counted
+def test_iter_agent_updates():
+    targets = iter([
+        (1, "winpc-user1", {"isLicensed": True}),
+        (2, "laptop-john", {"isLicensed": True}),
+        (3, "desktop-test", {"isLicensed": True}),
+    ])
+    counts, skipped = {}, []
+
+    updates = list(agent_sync.iter_agent_updates(targets, AGENTS, counts,
+                                                 lambda kind, entry: skipped.append((kind, entry["row"]))))
+
+    assert [e["agent_id"] for e in updates] == ["a2"]
+    assert skipped == [("unchanged", 1), ("no_match", 3)]
+    assert counts == {"unchanged": 1, "update": 1, "no_match": 1}
+
+# Test that a successful update is applied to a dictionary lookup
+def test_apply_update_to_dict():
+    agents = {"laptop-john": {"id": "a2", "isLicensed": False}}
+
+    agent_sync.apply_update(agents, {"hostname": "laptop-john", "agent_id": "a2", "fields": {"isLicensed": True}})
+
+    assert agents["laptop-john"] == {"id": "a2", "isLicensed": True}
+
+# A stand-in for /eyes/agents that honours the name filter (comma-separated, case-insensitive).
+# With literal=True the whole value is read as one name, as an API without list support would.
+def make_fleet_session(fleet, honour_filter=True, literal=False):
+    session = MagicMock()
+
+    def get(url, headers=None, params=None):
+        records = fleet
+        names = params.get("name")
+        if names and honour_filter:
+            wanted = [names] if literal else names.split(",")
+            records = [a for a in fleet if a["name"].lower() in wanted]
+        per_page = params.get("perPage") or 100
+        page = params["page"]
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {}
+        response.json.return_value = {
+            "pagination": {"perPage": per_page, "page": page, "total": len(records),
+                           "pages": max(1, -(-len(records) // per_page))},
+            "results": records[(page - 1) * per_page:page * per_page]
+        }
+        return response
+
+    session.get.side_effect = get
+    return session
+
+FLEET = [{"id": f"a{i}", "name": f"HOST-{i}"} for i in range(1000)]
+
+# Test that a handful of hostnames is matched with filtered queries instead of the full list
+def test_small_input_uses_filtered_queries(monkeypatch):
+    session = make_fleet_session(FLEET)
+    monkeypatch.setattr(agent_sync, "get_session", lambda: session)
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", None)
+    fetch_all = MagicMock()
+    targets = iter([(1, "host-3", {}), (2, "host-42", {}), (3, "missing", {})])
+
+    lookup, targets = agent_sync.agent_lookup("token", fetch_all, targets)
+
+    fetch_all.assert_not_called()
+    assert lookup.get("host-42")["id"] == "a42"
+    assert lookup.get("missing") is None
+    # The read-ahead rows are still there
+    assert [t[0] for t in targets] == [1, 2, 3]
+
+# Test that an input covering a large part of the fleet downloads the full list
+def test_large_input_uses_full_scan(monkeypatch):
+    monkeypatch.setattr(agent_sync, "get_session", lambda: make_fleet_session(FLEET[:40]))
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", None)
+    fetch_all = MagicMock(return_value=FLEET[:40])
+    targets = iter([(i, f"host-{i}", {}) for i in range(10)])
+
+    lookup, targets = agent_sync.agent_lookup("token", fetch_all, targets)
+
+    fetch_all.assert_called_once()
+    assert lookup.get("host-9")["id"] == "a9"
+    assert len(list(targets)) == 10
+
+# Test that a server ignoring the filter is detected and the full list is used instead
+def test_ignored_filter_falls_back_to_full_scan(monkeypatch):
+    monkeypatch.setattr(agent_sync, "get_session", lambda: make_fleet_session(FLEET, honour_filter=False))
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", None)
+    fetch_all = MagicMock(return_value=FLEET)
+
+    lookup, _ = agent_sync.agent_lookup("token", fetch_all, iter([(1, "host-3", {})]))
+
+    fetch_all.assert_called_once()
+    assert lookup.get("host-3")["id"] == "a3"
+
+# Test that a batch of names read as one literal name (no records) falls back to the full list
+def test_literal_name_filter_falls_back_to_full_scan(monkeypatch):
+    session = make_fleet_session(FLEET, literal=True)
+    monkeypatch.setattr(agent_sync, "get_session", lambda: session)
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", None)
+    monkeypatch.setattr(agent_sync, "AGENT_FILTER_BATCH", 20)
+    fetch_all = MagicMock(return_value=FLEET)
+
+    lookup, _ = agent_sync.agent_lookup("token", fetch_all, iter([(1, "host-3", {}), (2, "host-42", {})]))
+
+    fetch_all.assert_called_once()
+    assert lookup.get("host-42")["id"] == "a42"
+
+# Test that one name per request is the default, so the filter never needs list support
+def test_filtered_queries_send_one_name_each(monkeypatch):
+    session = make_fleet_session(FLEET, literal=True)
+    monkeypatch.setattr(agent_sync, "get_session", lambda: session)
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", None)
+    fetch_all = MagicMock()
+
+    lookup, _ = agent_sync.agent_lookup("token", fetch_all, iter([(1, "host-3", {}), (2, "host-42", {})]))
+
+    fetch_all.assert_not_called()
+    assert lookup.get("host-3")["id"] == "a3" and lookup.get("host-42")["id"] == "a42"
+
+# Test that a failed index refresh is logged and the API lookup is used instead
+def test_index_refresh_failure_falls_back(monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(agent_sync, "AGENT_INDEX_FILE", str(tmp_path / "agents.db"))
+    monkeypatch.setattr(agent_sync.AgentIndex, "refresh", MagicMock(side_effect=RuntimeError("boom")))
+    monkeypatch.setattr(agent_sync, "fleet_size", lambda headers=None, session=None: None)
+    fetch_all = MagicMock(return_value=FLEET[:5])
+
+    lookup, _ = agent_sync.agent_lookup("token", fetch_all, iter([(1, "host-3", {})]))
+
+    assert "Failed to refresh agent index" in caplog.text
+    assert lookup.get("host-3")["id"] == "a3"
+    agent_sync.close_lookup(lookup)
@@ -0,0 +1,98 @@
+import pytest
+import sys
+import os
+import csv
+from unittest.mock import patch, MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.eyes import csv_licensing
+
+# Keep the matching strategy on the full agent list so no request leaves the test
+@pytest.fixture(autouse=True)
+def no_fleet_size(monkeypatch):
+    monkeypatch.setattr("agent_sync.fleet_size", lambda headers=None, session=None: None)
+
+# Test that license_agent returns True when the PATCH succeeds
+@patch("examples.eyes.csv_licensing.handle_rate_limits", return_value={"isLicensed": True})
+def test_license_agent_success(mock_handle):
+    assert csv_licensing.license_agent("fake-token", "agent-1") is True
+
+# Test that a 204 No Content answer to the PATCH counts as licensed
+@patch("examples.eyes.csv_licensing.session.patch")
+def test_license_agent_no_content(mock_patch):
+    mock_patch.return_value = MagicMock(status_code=204, ok=True, headers={}, text="")
+    mock_patch.return_value.json.side_effect = ValueError("Expecting value")
+    assert csv_licensing.license_agent("fake-token", "agent-1") is True
+    # The session adds the current token, so a refreshed token reaches long jobs
+    assert "Authorization" not in mock_patch.call_args.kwargs["headers"]
+
+# Test that license_agent returns False when the PATCH fails
+@patch("examples.eyes.csv_licensing.handle_rate_limits", return_value=None)
+def test_license_agent_failure(mock_handle):
+    assert csv_licensing.license_agent("fake-token", "agent-1") is False
+
+# Test that main licenses matched hostnames and writes every row's outcome
+@patch("examples.eyes.csv_licensing.license_agent", side_effect=lambda token, agent_id: agent_id != "a2")
+@patch("examples.eyes.csv_licensing.fetch_agents")
+@patch("examples.eyes.csv_licensing.get_token", return_value=("fake-token", None))
+def test_main_writes_results(mock_token, mock_fetch, mock_license, tmp_path, monkeypatch):
+    monkeypatch.setattr("concurrency.get_session", lambda: MagicMock(hooks={"response": []}))
+    mock_fetch.return_value = [
+        {"id": "a1", "name": "WINPC-USER1"},
+        {"id": "a2", "name": "laptop-john"},
+    ]
+    csv_file = tmp_path / "agents.csv"
+    csv_file.write_text("hostname\nWINPC-USER1\n\nDESKTOP-TEST\n Laptop-John \n")
+    results_file = tmp_path / "results.csv"
+    monkeypatch.setattr(sys, "argv", ["csv_licensing.py", str(csv_file), str(results_file)])
+
+    csv_licensing.main()
+
+    with open(results_file) as f:
+        rows = {r["hostname"]: r for r in csv.DictReader(f)}
+    assert rows["winpc-user1"]["outcome"] == "licensed"
+    assert rows["desktop-test"]["outcome"] == "no_match"
+    assert rows["laptop-john"]["outcome"] == "failed"
+    assert mock_license.call_count == 2
+
+# Test that already licensed agents are not sent again and are recorded as unchanged
+@patch("examples.eyes.csv_licensing.license_agent", return_value=True)
+@patch("examples.eyes.csv_licensing.fetch_agents")
+@patch("examples.eyes.csv_licensing.get_token", return_value=("fake-token", None))
+def test_main_skips_licensed_agents(mock_token, mock_fetch, mock_license, tmp_path, monkeypatch):
+    monkeypatch.setattr("concurrency.get_session", lambda: MagicMock(hooks={"response": []}))
+    mock_fetch.return_value = [
+        {"id": "a1", "name": "WINPC-USER1", "isLicensed": True},
+        {"id": "a2", "name": "laptop-john", "isLicensed": False},
+    ]
+    csv_file = tmp_path / "agents.csv"
+    csv_file.write_text("hostname\nWINPC-USER1\nlaptop-john\n")
+    results_file = tmp_path / "results.csv"
+    monkeypatch.setattr(sys, "argv", ["csv_licensing.py", str(csv_file), str(results_file)])
+
+    csv_licensing.main()
+
+    with open(results_file) as f:
+        rows = {r["hostname"]: r for r in csv.DictReader(f)}
+    assert rows["winpc-user1"]["outcome"] == "unchanged"
+    assert rows["laptop-john"]["outcome"] == "licensed"
+    mock_license.assert_called_once_with("fake-token", "a2")
+
+# Test that --dry-run plans the changes without sending any PATCH
+@patch("examples.eyes.csv_licensing.license_agent")
+@patch("examples.eyes.csv_licensing.fetch_agents")
+@patch("examples.eyes.csv_licensing.get_token", return_value=("fake-token", None))
+def test_main_dry_run(mock_token, mock_fetch, mock_license, tmp_path, monkeypatch):
+    mock_fetch.return_value = [{"id": "a1", "name": "WINPC-USER1", "isLicensed": False}]
+    csv_file = tmp_path / "agents.csv"
+    csv_file.write_text("hostname\nWINPC-USER1\n")
+    results_file = tmp_path / "results.csv"
+    monkeypatch.setattr(sys, "argv", ["csv_licensing.py", str(csv_file), str(results_file), "--dry-run"])
+
+    csv_licensing.main()
+
+    mock_license.assert_not_called()
+    assert not results_file.exists()
@@ -0,0 +1,23 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.eyes import csv_nickname
+
+# Test that the PATCH goes through the shared rate limiter
+@patch("examples.eyes.csv_nickname.session.patch")
+@patch("examples.eyes.csv_nickname.handle_rate_limits", side_effect=lambda api_call: api_call() and {})
+def test_update_nickname_uses_rate_limiter(mock_handle, mock_patch):
+    assert csv_nickname.update_nickname("fake-token", "agent-1", "Nick") is True
+    mock_handle.assert_called_once()
+    assert mock_patch.call_args.kwargs["json"] == {"nickname": "Nick"}
+
+# Test that update_nickname returns False when the PATCH fails
+@patch("examples.eyes.csv_nickname.handle_rate_limits", return_value=None)
+def test_update_nickname_failure(mock_handle):
+    assert csv_nickname.update_nickname("fake-token", "agent-1", "Nick") is False
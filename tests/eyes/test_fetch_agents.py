@@ -15,7 +15,7 @@ def test_fetch_agent_by_id_function_exists():
 
 
 # Test that fetch_agent_by_id correctly handles a successful API call
-@patch("examples.eyes.fetch_agents.requests.get")
+@patch("examples.eyes.fetch_agents.session.get")
 def test_fetch_agent_by_id_success(mock_get, caplog):
     # Sample data returned from mocked API call
     sample_data = {
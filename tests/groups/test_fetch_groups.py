@@ -17,7 +17,7 @@ def test_fetch_groups_function_exists():
 
 
 # Test that fetch_groups correctly handles a successful API call
-@patch("examples.groups.fetch_groups.requests.get")
+@patch("examples.groups.fetch_groups.session.get")
 def test_fetch_groups_success(mock_get, caplog):
     # Sample API response to simulate a successful call
     sample_data = {
@@ -36,6 +36,8 @@ def test_fetch_groups_success(mock_get, caplog):
     mock_response = MagicMock()
     # Simulate successful HTTP response
     mock_response.ok = True  
+    # No rate limit headers
+    mock_response.headers = {}
     # Return our sample data
     mock_response.json.return_value = sample_data 
     # Avoid raising exceptions
@@ -57,7 +59,7 @@ def test_fetch_groups_success(mock_get, caplog):
 
 
 # Test that fetch_groups logs an error when the API request fails
-@patch("examples.groups.fetch_groups.requests.get")
+@patch("examples.groups.fetch_groups.session.get")
 def test_fetch_groups_failure(mock_get, caplog):
     # Simulate a network or API error
     mock_get.side_effect = requests.exceptions.RequestException("Internal Server Error")
@@ -0,0 +1,56 @@
+import pytest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import journal
+
+# Test that outcomes recorded in one run are known to the next
+def test_records_survive_reopen(tmp_path):
+    path = str(tmp_path / "job.journal")
+
+    with journal.Journal(path) as j:
+        j.record("a@example.com", True, "created")
+        j.record(2, False, "failed", "500 Server Error")
+
+    with journal.Journal(path) as j:
+        assert j.is_done("a@example.com")
+        assert not j.is_done(2)
+        assert j.records["2"]["error"] == "500 Server Error"
+
+# Test that the last record for a key wins, so a retried row counts as done
+def test_retry_overrides_failure(tmp_path):
+    path = str(tmp_path / "job.journal")
+
+    with journal.Journal(path) as j:
+        j.record(7, False, "failed")
+        j.record(7, True, "updated")
+
+    assert journal.load_journal(path)["7"]["ok"] is True
+
+# Test that a line torn by a crash is ignored and the next record starts on a new line
+def test_torn_last_line(tmp_path):
+    path = tmp_path / "job.journal"
+    path.write_text(json.dumps({"key": "1", "ok": True}) + "\n" + '{"key": "2", "o')
+
+    with journal.Journal(str(path)) as j:
+        assert j.is_done(1)
+        assert not j.is_done(2)
+        j.record(2, True)
+
+    assert set(journal.load_journal(str(path))) == {"1", "2"}
+
+# Test that fsync is batched instead of being called for every record
+def test_fsync_is_batched(tmp_path):
+    with patch("journal.os.fsync") as mock_fsync:
+        j = journal.Journal(str(tmp_path / "job.journal"), sync_every=50, sync_interval=3600)
+        for n in range(120):
+            j.record(n, True)
+        assert mock_fsync.call_count == 2
+        j.close()
+        assert mock_fsync.call_count == 3
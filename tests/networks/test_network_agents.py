@@ -17,7 +17,7 @@ def test_fetch_networks_agents_function_exists():
 
 
 # Test that fetch_networks_agents correctly handles a successful API call
-@patch("examples.networks.network_agents.requests.get")
+@patch("examples.networks.network_agents.session.get")
 def test_fetch_networks_agents_success(mock_get, caplog):
     # Sample API response to simulate a successful call
     sample_data = {
@@ -37,6 +37,8 @@ def test_fetch_networks_agents_success(mock_get, caplog):
     # Simulate HTTP 200 OK
     mock_response.status_code = 200   
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     # Return sample JSON
     mock_response.json.return_value = sample_data 
     # Prevent exception
@@ -95,7 +97,7 @@ def test_log_network_agents_warns_if_no_results(caplog):
 
 
 # Test that fetch_networks_agents logs an error when the API request fails
-@patch("examples.networks.network_agents.requests.get")
+@patch("examples.networks.network_agents.session.get")
 def test_fetch_network_agents_failure(mock_get, caplog):
     # Simulate a network or API error
     mock_get.side_effect = requests.exceptions.RequestException("Network error")
@@ -17,7 +17,7 @@ def test_fetch_organizations_function_exists():
 
 
 # Test that fetch_organizations correctly handles a successful API call
-@patch("examples.organization.fetch_orgs.requests.get")
+@patch("examples.organization.fetch_orgs.session.get")
 def test_fetch_organizations_success(mock_get, caplog):
     # Sample API response to simulate a successful call
     sample_data = {
@@ -37,6 +37,8 @@ def test_fetch_organizations_success(mock_get, caplog):
     # Simulate HTTP 200 OK
     mock_response.status_code = 200 
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     # Return sample JSON
     mock_response.json.return_value = sample_data 
     # Prevent exceptions
@@ -95,7 +97,7 @@ def test_log_organizations_warns_if_no_organizations(caplog):
 
 
 # Test that fetch_organizations logs an error when the API request fails
-@patch("examples.organization.fetch_orgs.requests.get")
+@patch("examples.organization.fetch_orgs.session.get")
 def test_fetch_organizations_failure(mock_get, caplog):
     # Simulate a network or API error
     mock_get.side_effect = requests.exceptions.RequestException("Network error")
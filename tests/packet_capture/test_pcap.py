@@ -14,7 +14,7 @@ def test_start_packet_capture_function_exists():
     assert hasattr(pcap, "start_packet_capture")
 
 # Test that start_packet_capture handles a successful API call
-@patch("examples.packet_capture.pcap.requests.post")
+@patch("examples.packet_capture.pcap.session.post")
 def test_start_packet_capture_success(mock_post, caplog):
     sample_response = {"testId": "test123"}
     
@@ -35,7 +35,7 @@ def test_start_packet_capture_success(mock_post, caplog):
     assert "Packet capture started" in caplog.text
 
 # Test that get_packet_capture_status handles a successful GET
-@patch("examples.packet_capture.pcap.requests.get")
+@patch("examples.packet_capture.pcap.session.get")
 def test_get_packet_capture_status_success(mock_get):
     sample_status = {"runStatus": "COMPLETE"}
     
@@ -54,7 +54,7 @@ def test_get_packet_capture_status_success(mock_get):
     assert status["runStatus"] == "COMPLETE"
 
 # Test that download_packet_capture writes file content correctly
-@patch("examples.packet_capture.pcap.requests.get")
+@patch("examples.packet_capture.pcap.session.get")
 @patch("builtins.open")
 def test_download_packet_capture_success(mock_open, mock_get, caplog):
     fake_content = b"pcap-data"
@@ -0,0 +1,142 @@
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import MagicMock
+import requests
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import pagination
+
+# Builds a fake session whose get() serves `total` records split into pages of `per_page`
+def make_paged_session(total, per_page):
+    pages = max(1, -(-total // per_page))
+    session = MagicMock()
+
+    def get(url, headers=None, params=None):
+        page = params["page"]
+        start = (page - 1) * per_page
+        response = MagicMock()
+        response.status_code = 200
+        response.headers = {}
+        response.json.return_value = {
+            "pagination": {"perPage": per_page, "page": page, "total": total, "pages": pages},
+            "results": [{"id": i} for i in range(start, min(start + per_page, total))]
+        }
+        return response
+
+    session.get.side_effect = get
+    return session
+
+# Test that every record across every page is yielded in order
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_results_follows_all_pages(prefetch):
+    session = make_paged_session(total=25, per_page=10)
+
+    records = list(pagination.iter_results("https://api/eyes/agents", session=session, prefetch=prefetch))
+
+    assert [r["id"] for r in records] == list(range(25))
+    assert session.get.call_count == 3
+
+# Test that query parameters are kept and perPage is sent when given
+def test_iter_pages_sends_page_params():
+    session = make_paged_session(total=4, per_page=2)
+
+    list(pagination.iter_pages("https://api/users", params={"q": "x"}, per_page=2, session=session))
+
+    sent = [call.kwargs["params"] for call in session.get.call_args_list]
+    assert sent == [{"q": "x", "page": 1, "perPage": 2}, {"q": "x", "page": 2, "perPage": 2}]
+
+# Test that a response without a pagination block is treated as a single page
+def test_iter_results_without_pagination_block():
+    session = MagicMock()
+    session.get.return_value.headers = {}
+    session.get.return_value.json.return_value = {"results": [{"id": "a"}, {"id": "b"}]}
+
+    records = list(pagination.iter_results("https://api/groups", session=session))
+
+    assert records == [{"id": "a"}, {"id": "b"}]
+    session.get.assert_called_once()
+
+# Test that the next page is fetched while the caller still holds the current one
+def test_next_page_is_prefetched():
+    session = make_paged_session(total=20, per_page=10)
+    fetched_second = threading.Event()
+    inner = session.get.side_effect
+
+    def get(url, headers=None, params=None):
+        response = inner(url, headers=headers, params=params)
+        if params["page"] == 2:
+            fetched_second.set()
+        return response
+    session.get.side_effect = get
+
+    pages = pagination.iter_pages("https://api/eyes/agents", session=session)
+    next(pages)
+
+    # The caller has not asked for page 2 yet, but it is on its way
+    assert fetched_second.wait(timeout=2)
+    pages.close()
+
+# Test that an HTTP error on a later page is raised instead of truncating the data
+def test_http_error_is_raised():
+    session = make_paged_session(total=20, per_page=10)
+    inner = session.get.side_effect
+
+    def get(url, headers=None, params=None):
+        if params["page"] == 2:
+            raise requests.exceptions.HTTPError("500 Server Error")
+        return inner(url, headers=headers, params=params)
+    session.get.side_effect = get
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(pagination.iter_results("https://api/eyes/agents", session=session))
+
+# Test that parallel fan-out returns every page in order
+def test_iter_results_parallel_ordered():
+    session = make_paged_session(total=95, per_page=10)
+
+    records = list(pagination.iter_results_parallel("https://api/eyes/agents", session=session, workers=3))
+
+    assert [r["id"] for r in records] == list(range(95))
+    assert session.get.call_count == 10
+
+# Test that unordered fan-out returns every page exactly once
+def test_iter_pages_parallel_unordered():
+    session = make_paged_session(total=95, per_page=10)
+
+    pages = list(pagination.iter_pages_parallel("https://api/eyes/agents", session=session,
+                                                workers=4, ordered=False))
+
+    assert pages[0]["pagination"]["page"] == 1
+    assert sorted(p["pagination"]["page"] for p in pages) == list(range(1, 11))
+
+# Test that pages 2..N really are fetched at the same time
+def test_iter_pages_parallel_runs_concurrently():
+    session = make_paged_session(total=40, per_page=10)
+    inner = session.get.side_effect
+    barrier = threading.Barrier(3, timeout=2)
+
+    def get(url, headers=None, params=None):
+        # Pages 2, 3 and 4 only get past the barrier together
+        if params["page"] > 1:
+            barrier.wait()
+        return inner(url, headers=headers, params=params)
+    session.get.side_effect = get
+
+    pages = list(pagination.iter_pages_parallel("https://api/eyes/agents", session=session, workers=3))
+
+    assert len(pages) == 4
+
+# Test that the parallel fetches draw from the given rate limiter
+def test_iter_pages_parallel_uses_limiter():
+    session = make_paged_session(total=30, per_page=10)
+    limiter = MagicMock()
+
+    list(pagination.iter_pages_parallel("https://api/eyes/agents", session=session, limiter=limiter))
+
+    assert limiter.acquire.call_count == 3
+    assert limiter.update_from_headers.call_count == 3
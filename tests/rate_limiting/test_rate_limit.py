@@ -1,5 +1,7 @@
 import pytest
+import asyncio
 import sys
+import json
 import os
 from unittest.mock import patch, MagicMock
 
@@ -24,10 +26,23 @@ def make_mock_response(status_code=200, json_data=None, headers=None):
     # Set HTTP response headers (can be empty)
     resp.headers = headers or {}
 
-    # Response body text (error message for non-200)
-    resp.text = "error" if status_code != 200 else ""
+    # Response body text (error message for non-200, the JSON body otherwise)
+    resp.text = "error" if status_code != 200 else json.dumps(json_data or {})
     return resp
 
+# Test that a 204 or an empty successful body counts as success, not a JSON error
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+def test_success_without_body(mock_sleep):
+    no_content = make_mock_response(204)
+    no_content.ok = True
+    no_content.json.side_effect = ValueError("Expecting value")
+    empty = make_mock_response(200)
+    empty.text = ""
+    empty.json.side_effect = ValueError("Expecting value")
+
+    assert rate_limit.handle_rate_limits(lambda: no_content) == {}
+    assert rate_limit.handle_rate_limits(lambda: empty) == {}
+
 # This mock API function always returns a successful 200 response immediately
 @patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
 def test_success_no_retry(mock_sleep):
@@ -110,3 +125,135 @@ def test_non_429_error(mock_sleep):
 
     # Assert that time.sleep was never called because no retry was attempted
     mock_sleep.assert_not_called()
+
+
+# Headers the gateway sends back with each response
+def make_rate_headers(remaining, burst=10, replenish=5, requested=1):
+    return {
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-burst-capacity": str(burst),
+        "x-ratelimit-replenish-rate": str(replenish),
+        "x-ratelimit-requested-tokens": str(requested),
+    }
+
+# An unseeded bucket never blocks
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+def test_token_bucket_unseeded_does_not_wait(mock_sleep):
+    bucket = rate_limit.TokenBucket()
+
+    for _ in range(100):
+        assert bucket.acquire() == 0
+
+    mock_sleep.assert_not_called()
+
+# A bucket seeded from headers lets the remaining budget through, then waits for replenishment
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+@patch("examples.rate_limiting.rate_limit.time.monotonic", return_value=100.0)
+def test_token_bucket_waits_when_empty(mock_monotonic, mock_sleep):
+    bucket = rate_limit.TokenBucket()
+    bucket.update_from_headers(make_rate_headers(remaining=2, burst=10, replenish=5))
+
+    # Two tokens left: both go out immediately
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    mock_sleep.assert_not_called()
+
+    # Empty: move the clock forward when the caller sleeps
+    def advance(seconds):
+        mock_monotonic.return_value += seconds
+    mock_sleep.side_effect = advance
+
+    # One token at 5 tokens per second takes 0.2 seconds
+    assert bucket.acquire() == pytest.approx(0.2)
+    mock_sleep.assert_called_once()
+
+# The server's remaining count never raises the client's own, lower count
+@patch("examples.rate_limiting.rate_limit.time.monotonic", return_value=100.0)
+def test_token_bucket_keeps_conservative_count(mock_monotonic):
+    bucket = rate_limit.TokenBucket()
+    bucket.update_from_headers(make_rate_headers(remaining=3))
+    bucket.acquire()
+    bucket.acquire()
+
+    # A stale response still reports 3 remaining
+    bucket.update_from_headers(make_rate_headers(remaining=3))
+
+    assert bucket.tokens == 1
+
+# handle_rate_limits feeds response headers into the limiter it is given
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+def test_handle_rate_limits_updates_limiter(mock_sleep):
+    bucket = rate_limit.TokenBucket()
+
+    def api_func():
+        return make_mock_response(200, {"ok": True}, make_rate_headers(remaining=7, burst=20, replenish=10))
+
+    assert rate_limit.handle_rate_limits(api_func, limiter=bucket) == {"ok": True}
+    assert bucket.capacity == 20
+    assert bucket.rate == 10
+    assert bucket.tokens == 7
+
+# handle_rate_limits gives up after max_retries rate limited attempts
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+def test_handle_rate_limits_gives_up(mock_sleep):
+    calls = [0]
+
+    def api_func():
+        calls[0] += 1
+        return make_mock_response(429)
+
+    assert rate_limit.handle_rate_limits(api_func, limiter=rate_limit.TokenBucket()) is None
+    assert calls[0] == rate_limit.max_retries
+
+# Two shared buckets on the same file (as in two processes) draw from one budget
+@patch("examples.rate_limiting.rate_limit.time.sleep", return_value=None)
+@patch("examples.rate_limiting.rate_limit.time.time", return_value=1000.0)
+def test_shared_token_bucket_single_budget(mock_time, mock_sleep, tmp_path):
+    path = str(tmp_path / "ratelimit.json")
+    first = rate_limit.SharedTokenBucket(path)
+    second = rate_limit.SharedTokenBucket(path)
+
+    # Only the first script has seen the headers so far
+    first.update_from_headers(make_rate_headers(remaining=3, burst=10, replenish=5))
+
+    assert first.acquire() == 0
+    assert second.acquire() == 0
+    assert first.acquire() == 0
+
+    # The budget is spent, so the second script has to wait for replenishment
+    def advance(seconds):
+        mock_time.return_value += seconds
+    mock_sleep.side_effect = advance
+
+    assert second.acquire() == pytest.approx(0.2)
+    assert first.tokens == pytest.approx(0)
+
+# A missing or corrupt state file is treated as an unseeded bucket
+def test_shared_token_bucket_corrupt_state(tmp_path):
+    path = tmp_path / "ratelimit.json"
+    path.write_text("not json")
+    bucket = rate_limit.SharedTokenBucket(str(path))
+
+    assert bucket.acquire() == 0
+
+# The async handler retries a 429 without blocking the event loop
+def test_handle_rate_limits_async_retries(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+
+    calls = [0]
+
+    async def api_func():
+        calls[0] += 1
+        if calls[0] == 1:
+            return make_mock_response(429)
+        return make_mock_response(200, {"done": True})
+
+    result = asyncio.run(rate_limit.handle_rate_limits_async(api_func, limiter=rate_limit.TokenBucket()))
+
+    assert result == {"done": True}
+    assert calls[0] == 2
+    assert len(sleeps) == 1
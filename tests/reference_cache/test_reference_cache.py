@@ -0,0 +1,149 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+import reference_cache
+
+ROLES = [{"id": "r1", "key": "customer:reporter"}, {"id": "r2", "key": "organization-admin"}]
+ORGS = [{"id": "o1", "name": "Acme"}]
+
+# Builds a fake session that serves `records` with an ETag and answers 304 when it matches
+def make_session(records, etag='"v1"'):
+    session = MagicMock()
+    state = {"records": records, "etag": etag}
+
+    def get(url, headers=None, params=None):
+        response = MagicMock()
+        response.headers = {"ETag": state["etag"]}
+        if headers and headers.get("If-None-Match") == state["etag"]:
+            response.status_code = 304
+            response.ok = True
+        else:
+            response.status_code = 200
+            response.ok = True
+            response.json.return_value = {"results": state["records"]}
+        return response
+
+    session.get.side_effect = get
+    session.state = state
+    return session
+
+# Builds a fake session that serves `records` in pages of `per_page`, each page with its own ETag
+def make_paged_session(records, per_page=2):
+    session = MagicMock()
+    state = {"records": records}
+
+    def get(url, headers=None, params=None):
+        page = params["page"]
+        chunk = state["records"][(page - 1) * per_page:page * per_page]
+        response = MagicMock()
+        response.headers = {"ETag": f'"{page}-{chunk}"'}
+        response.ok = True
+        if headers and headers.get("If-None-Match") == response.headers["ETag"]:
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            pages = -(-len(state["records"]) // per_page)
+            response.json.return_value = {"results": chunk, "pagination": {"page": page, "pages": pages}}
+        return response
+
+    session.get.side_effect = get
+    session.state = state
+    return session
+
+# Test that a fresh entry is served without any request
+def test_fresh_entry_makes_no_request():
+    cache = reference_cache.ReferenceCache(ttl=3600)
+    session = make_session(ROLES)
+
+    assert cache.roles(session=session) == ROLES
+    assert cache.roles(session=session) == ROLES
+    assert session.get.call_count == 1
+
+# Test that an expired entry is revalidated with its ETag and kept on 304
+def test_expired_entry_revalidated_with_etag():
+    cache = reference_cache.ReferenceCache(ttl=0)
+    session = make_session(ROLES)
+
+    cache.roles(session=session)
+    assert cache.roles(session=session) == ROLES
+
+    second = session.get.call_args_list[1]
+    assert second.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+# Test that changed data is downloaded again
+def test_changed_entry_is_replaced():
+    cache = reference_cache.ReferenceCache(ttl=0)
+    session = make_session(ROLES)
+    cache.roles(session=session)
+
+    session.state.update(records=ROLES[:1], etag='"v2"')
+
+    assert cache.roles(session=session) == ROLES[:1]
+
+# Test that every page is fetched once and revalidated on its own, so a change past page 1 is seen
+def test_multi_page_list_revalidated_per_page():
+    records = [{"id": f"o{i}"} for i in range(5)]
+    cache = reference_cache.ReferenceCache(ttl=0)
+    session = make_paged_session(records)
+
+    assert cache.organizations(session=session) == records
+    assert [call.kwargs["params"]["page"] for call in session.get.call_args_list] == [1, 2, 3]
+
+    changed = records[:3] + [{"id": "renamed"}, records[4]]
+    session.state["records"] = changed
+    session.get.reset_mock()
+
+    assert cache.organizations(session=session) == changed
+    conditional = [call.kwargs["headers"].get("If-None-Match") is not None for call in session.get.call_args_list]
+    assert conditional == [True, True, True]
+
+# Test that a page added after a full, unchanged last page is picked up
+def test_new_page_after_unchanged_pages_is_fetched():
+    records = [{"id": f"o{i}"} for i in range(4)]
+    cache = reference_cache.ReferenceCache(ttl=0)
+    session = make_paged_session(records)
+    cache.organizations(session=session)
+
+    session.state["records"] = records + [{"id": "o4"}]
+
+    assert cache.organizations(session=session) == records + [{"id": "o4"}]
+    # The list is unchanged now: pages 1-3 answer 304 and nothing else is requested
+    session.get.reset_mock()
+    assert cache.organizations(session=session) == records + [{"id": "o4"}]
+    assert [call.kwargs["params"]["page"] for call in session.get.call_args_list] == [1, 2, 3]
+
+# Test that the cache file carries entries to a new process and run
+def test_cache_file_persists_entries(tmp_path):
+    path = str(tmp_path / "reference.json")
+    reference_cache.ReferenceCache(path).organizations(session=make_session(ORGS))
+
+    session = make_session([])
+    assert reference_cache.ReferenceCache(path).organizations(session=session) == ORGS
+    session.get.assert_not_called()
+
+# Test that a failed refresh falls back to the cached copy, and raises without one
+def test_failed_refresh(caplog):
+    cache = reference_cache.ReferenceCache(ttl=0)
+    cache.organizations(session=make_session(ORGS))
+    failing = MagicMock()
+    failing.get.return_value = MagicMock(status_code=500, ok=False, headers={}, text="error")
+
+    assert cache.organizations(session=failing) == ORGS
+    cache.invalidate()
+    with pytest.raises(Exception):
+        cache.organizations(session=failing)
+
+# Test the typed lookups
+def test_typed_lookups():
+    cache = reference_cache.ReferenceCache()
+    session = make_session(ROLES)
+
+    assert cache.role_by_key("Reporter", "customer:reporter", session=session)["id"] == "r1"
+    assert cache.role_by_key("missing", session=session) is None
+    assert cache.org_by_name("acme", session=make_session(ORGS))["id"] == "o1"
@@ -16,7 +16,7 @@ def test_fetch_roles_function_exists():
 
 
 # Test that fetch_roles correctly handles a successful API call
-@patch("examples.roles.fetch_roles.requests.get")
+@patch("examples.roles.fetch_roles.session.get")
 def test_fetch_roles_success(mock_get, caplog):
 
     # Sample API response to simulate a successful call
@@ -37,6 +37,8 @@ def test_fetch_roles_success(mock_get, caplog):
     # Simulate HTTP 200 OK
     mock_response.status_code = 200
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     # Return sample JSON
     mock_response.json.return_value = sample_data 
     # Prevent exception
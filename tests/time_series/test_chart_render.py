@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import chart_render
+
+POINTS = [{"ts": 1700000600000, "avg": 0.9}, {"ts": 1700000000000, "avg": 0.5}]
+
+# Test that a chart is rendered as PNG bytes
+def test_render_png_returns_png():
+    png = chart_render.render_png(POINTS, "COVERAGE")
+    assert png.startswith(b"\x89PNG")
+
+# Test that a metric without points has no chart
+def test_render_png_no_data():
+    assert chart_render.render_png([], "COVERAGE") is None
+
+# Test that every job is rendered once, in process and with a worker pool
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_rendered_returns_every_chart(workers):
+    jobs = [(f"device-{i}", "COVERAGE", POINTS if i % 2 else []) for i in range(5)]
+
+    rendered = {key: png for key, metric, png in chart_render.iter_rendered(iter(jobs), workers=workers)}
+
+    assert sorted(rendered) == [f"device-{i}" for i in range(5)]
+    assert rendered["device-0"] is None
+    assert rendered["device-1"].startswith(b"\x89PNG")
+
+# Test that the SVG backend draws a polyline through every point without importing matplotlib
+def test_render_svg_returns_polyline():
+    svg = chart_render.render_svg(POINTS, "COVERAGE").decode("utf-8")
+
+    assert svg.startswith("<svg")
+    assert svg.endswith("</svg>")
+    assert "COVERAGE SLA %" in svg
+    # Sorted by time: 50% at the left edge, 90% at the right edge
+    assert 'points="50.0,145.0 585.0,53.0"' in svg
+    assert chart_render.render_svg([], "COVERAGE") is None
+
+# Test that the backend can be chosen per call and unknown backends are rejected
+def test_render_chart_backends():
+    assert chart_render.render_chart(POINTS, "COVERAGE", backend="svg").startswith(b"<svg")
+    assert chart_render.render_chart(POINTS, "COVERAGE", backend="matplotlib").startswith(b"\x89PNG")
+    with pytest.raises(ValueError):
+        chart_render.render_chart(POINTS, "COVERAGE", backend="ascii")
+
+# Test that a missing bucket splits the SVG line instead of joining across it
+def test_render_svg_leaves_gaps():
+    points = [{"ts": i * 600000, "avg": 0.5} for i in (0, 1, 3, 4)]
+
+    svg = chart_render.render_svg(points, "COVERAGE").decode("utf-8")
+
+    assert svg.count("<polyline") == 2
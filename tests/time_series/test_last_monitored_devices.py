@@ -0,0 +1,59 @@
+import pytest
+import sys
+import os
+import requests
+from unittest.mock import patch
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import last_monitored_devices
+
+def result(device_id):
+    return {"deviceId": device_id, "metricAggregates": [{"metric": "COVERAGE", "timeSeries": [{"ts": 1, "avg": 0.5}]}]}
+
+# Test that devices are requested in batches and the results are split per device
+@patch("examples.time_series.last_monitored_devices.fetch_time_series")
+def test_fetch_devices_time_series_batches(mock_fetch):
+    mock_fetch.side_effect = lambda token, ids, f, t: [result(i) for i in ids.split(",") if i != "d2"]
+
+    by_device = last_monitored_devices.fetch_devices_time_series("token", ["d1", "d2", "d3", "d4", "d5"], 0, 1, batch_size=2)
+
+    assert sorted(call.args[1] for call in mock_fetch.call_args_list) == ["d1,d2", "d3,d4", "d5"]
+    assert by_device["d1"] == [result("d1")]
+    assert by_device["d2"] == []
+    assert set(by_device) == {"d1", "d2", "d3", "d4", "d5"}
+
+# Test that a batch returning devices that were not asked for is fetched one device at a time
+@patch("examples.time_series.last_monitored_devices.fetch_time_series")
+def test_fetch_devices_time_series_falls_back_when_filter_ignored(mock_fetch):
+    mock_fetch.side_effect = lambda token, ids, f, t: [result(i) for i in ("d1", "d2", "other")] if "," in ids else [result(ids)]
+
+    by_device = last_monitored_devices.fetch_devices_time_series("token", ["d1", "d2"], 0, 1, batch_size=2)
+
+    assert by_device == {"d1": [result("d1")], "d2": [result("d2")]}
+    assert mock_fetch.call_count == 3
+
+# Test that a failed batch request falls back to per-device requests
+@patch("examples.time_series.last_monitored_devices.fetch_time_series")
+def test_fetch_devices_time_series_falls_back_on_error(mock_fetch):
+    def fetch(token, ids, f, t):
+        if "," in ids:
+            raise requests.exceptions.HTTPError("400 Bad Request")
+        return [result(ids)]
+    mock_fetch.side_effect = fetch
+
+    by_device = last_monitored_devices.fetch_devices_time_series("token", ["d1", "d2"], 0, 1, batch_size=2)
+
+    assert by_device == {"d1": [result("d1")], "d2": [result("d2")]}
+
+# Test that a batch read as one unknown deviceId (no result groups) falls back to per-device requests
+@patch("examples.time_series.last_monitored_devices.fetch_time_series")
+def test_fetch_devices_time_series_falls_back_on_empty_batch(mock_fetch):
+    mock_fetch.side_effect = lambda token, ids, f, t: [] if "," in ids else [result(ids)]
+
+    by_device = last_monitored_devices.fetch_devices_time_series("token", ["d1", "d2"], 0, 1, batch_size=2)
+
+    assert by_device == {"d1": [result("d1")], "d2": [result("d2")]}
+    assert mock_fetch.call_count == 3
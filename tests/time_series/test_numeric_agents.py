@@ -18,7 +18,7 @@ def test_log_numeric_summary_function_exists():
     assert hasattr(numeric_agents, "log_numeric_summary")
 
 # Test that fetch_numeric_metrics handles a successful API call
-@patch("examples.time_series.numeric_agents.requests.get")
+@patch("examples.time_series.numeric_agents.session.get")
 def test_fetch_numeric_metrics_success(mock_get, caplog):
     # Sample API response
     sample_data = {
@@ -43,6 +43,8 @@ def test_fetch_numeric_metrics_success(mock_get, caplog):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     mock_response.json.return_value = sample_data
     mock_response.raise_for_status = MagicMock()
     mock_get.return_value = mock_response
@@ -56,6 +58,8 @@ def test_fetch_numeric_metrics_success(mock_get, caplog):
 
     assert "Total Result Groups: 1" in caplog.text
     assert "LocationId: loc123" in caplog.text
+    # Bucket counts are requested so a chunked or cached window keeps a weighted avg
+    assert "COUNT" in mock_get.call_args.kwargs["params"]["aggregateFunctions"]
     assert "Metric: EXPERIENCE_SCORE | Avg: 95 | Threshold: 90" in caplog.text
     assert "Timestamp: 1700000000000 | Avg: 95" in caplog.text
 
@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import report_writer
+
+PNG = b"\x89PNG\r\n\x1a\nchart"
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"></svg>'
+
+# Test that a device section is on disk before the report is closed
+def test_sections_are_written_as_added(tmp_path):
+    path = str(tmp_path / "report.html")
+    report = report_writer.ReportWriter(path, "SLA", assets="inline")
+
+    report.add_device("laptop (1)", {"COVERAGE": PNG, "ROAMING": None})
+    partial = open(path).read()
+    report.close()
+
+    assert "<h2>laptop (1)</h2>" in partial
+    assert "data:image/png;base64," in partial
+    assert "ROAMING" not in partial
+    assert open(path).read().endswith("</body></html>")
+
+# Test that charts can be written as one file per chart
+def test_files_mode_writes_one_file_per_chart(tmp_path):
+    path = str(tmp_path / "report.html")
+    with report_writer.ReportWriter(path, "SLA", assets="files") as report:
+        report.add_device("laptop (1)", {"COVERAGE": PNG, "ROAMING": SVG})
+
+    assert sorted(os.listdir(tmp_path / "report_assets")) == ["laptop-1-COVERAGE.png", "laptop-1-ROAMING.svg"]
+    assert 'src="report_assets/laptop-1-COVERAGE.png"' in open(path).read()
+
+# Test that identical charts are stored once in hashed mode
+def test_hashed_mode_dedupes_identical_charts(tmp_path):
+    path = str(tmp_path / "report.html")
+    with report_writer.ReportWriter(path, "SLA", assets="hashed") as report:
+        report.add_device("a", {"COVERAGE": PNG, "ROAMING": PNG})
+        report.add_device("b", {"COVERAGE": PNG, "ROAMING": SVG})
+
+    assert len(os.listdir(tmp_path / "report_assets")) == 2
+    assert report.asset_bytes == len(PNG) + len(SVG)
+
+# Test that an unknown asset mode is rejected
+def test_unknown_asset_mode(tmp_path):
+    with pytest.raises(ValueError):
+        report_writer.ReportWriter(str(tmp_path / "report.html"), "SLA", assets="zip")
+
+# Test that inline SVG charts are written as markup rather than base64
+def test_inline_svg_is_embedded_as_markup(tmp_path):
+    path = str(tmp_path / "report.html")
+    with report_writer.ReportWriter(path, "SLA", assets="inline") as report:
+        report.add_device("a", {"COVERAGE": SVG})
+
+    content = open(path).read()
+    assert '<svg style="width:100%;height:auto" xmlns=' in content
+    assert "base64" not in content
@@ -0,0 +1,58 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series.series import MetricSeries
+
+TEN_MIN = 600000
+
+# Test that API points round-trip through the arrays, with null values dropped
+def test_from_points_and_back():
+    points = [{"ts": 2 * TEN_MIN, "avg": 0.5}, {"ts": 0, "avg": None}, {"ts": TEN_MIN, "avg": 0.75}]
+
+    series = MetricSeries.from_points(points)
+
+    assert series.ts.dtype == np.int64 and series.values.dtype == np.float64
+    assert np.isnan(series.values[1])
+    assert series.sorted().to_points() == [{"ts": TEN_MIN, "avg": 0.75}, {"ts": 2 * TEN_MIN, "avg": 0.5}]
+
+# Test that missing buckets are filled with NaN on a regular grid
+def test_fill_gaps():
+    series = MetricSeries([3 * TEN_MIN, 0, TEN_MIN], [0.3, 0.0, 0.1]).fill_gaps()
+
+    assert series.ts.tolist() == [0, TEN_MIN, 2 * TEN_MIN, 3 * TEN_MIN]
+    assert series.values[:2].tolist() == [0.0, 0.1]
+    assert np.isnan(series.values[2])
+    assert series.values[3] == 0.3
+
+# Test that resampling groups points into epoch-aligned buckets and ignores NaN
+def test_resample():
+    hour = 6 * TEN_MIN
+    series = MetricSeries([0, TEN_MIN, 2 * TEN_MIN, hour, hour + TEN_MIN], [0.2, 0.4, np.nan, 1.0, 0.5])
+
+    assert series.resample(hour).values.tolist() == [pytest.approx(0.3), 0.75]
+    assert series.resample(hour, "min").values.tolist() == [0.2, 0.5]
+    assert series.resample(hour, "count").values.tolist() == [2, 2]
+    assert series.resample(hour).ts.tolist() == [0, hour]
+    with pytest.raises(ValueError):
+        series.resample(hour, "median")
+
+# Test that rolling statistics skip NaN and pad the first window
+def test_rolling():
+    series = MetricSeries(range(5), [1.0, 2.0, np.nan, 4.0, 6.0])
+
+    rolled = series.rolling(2).values
+
+    assert np.isnan(rolled[0])
+    assert rolled[1:].tolist() == [1.5, 2.0, 4.0, 5.0]
+    assert series.rolling(2, "max").values[4] == 6.0
+
+# Test window statistics
+def test_stats():
+    assert MetricSeries([0, 1], [0.5, np.nan]).stats() == {"count": 1, "mean": 0.5, "min": 0.5, "max": 0.5}
+    assert MetricSeries([], []).stats()["count"] == 0
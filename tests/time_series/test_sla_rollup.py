@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import numpy as np
+from unittest.mock import patch
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import sla_rollup
+from examples.time_series.series import MetricSeries
+
+TEN_MIN = 600000
+DAY = sla_rollup.DAY_MS
+# Wednesday 2026-10-14 00:00 UTC
+WEDNESDAY = 1791936000000
+
+@pytest.fixture
+def store(tmp_path):
+    with sla_rollup.RollupStore(str(tmp_path / "rollups.db")) as store:
+        yield store
+
+# Test that timestamps map to the start of their day, ISO week and calendar month
+def test_period_starts():
+    ts = [WEDNESDAY + 5 * TEN_MIN]
+
+    assert sla_rollup.period_starts(ts, "day").tolist() == [WEDNESDAY]
+    assert sla_rollup.period_starts(ts, "week").tolist() == [WEDNESDAY - 2 * DAY]
+    assert sla_rollup.period_starts(ts, "month").tolist() == [WEDNESDAY - 13 * DAY]
+    with pytest.raises(ValueError):
+        sla_rollup.period_starts(ts, "year")
+
+# Test that the average is weighted by samples and min, max and percentiles are kept
+def test_weighted_rollup(store):
+    series = MetricSeries([WEDNESDAY, WEDNESDAY + TEN_MIN, WEDNESDAY + 2 * TEN_MIN], [1.0, 0.5, np.nan])
+
+    store.ingest("deviceId=1/COVERAGE", series, weights=[3, 1, 5])
+    row = store.rollups("deviceId=1/COVERAGE", "day")[0]
+
+    assert row["start"] == WEDNESDAY
+    assert row["avg"] == pytest.approx(0.875)
+    assert (row["min"], row["max"], row["samples"]) == (0.5, 1.0, 4)
+    assert row["p5"] == pytest.approx(0.5005)
+    assert row["p95"] == pytest.approx(0.9995)
+
+# Test that adding buckets in two runs gives the same rollups as one run, and nothing is counted twice
+def test_incremental_matches_full(store, tmp_path):
+    ts = np.arange(WEDNESDAY - 3 * DAY, WEDNESDAY + 3 * DAY, TEN_MIN)
+    values = (np.sin(ts / 1e7) + 1) / 2
+    series = MetricSeries(ts, values)
+    half = len(ts) // 2
+
+    store.ingest("s", MetricSeries(ts[:half], values[:half]))
+    # The second run overlaps the first; the overlap is skipped
+    added = store.ingest("s", series)
+
+    with sla_rollup.RollupStore(str(tmp_path / "full.db")) as full:
+        full.ingest("s", series)
+        for period in sla_rollup.PERIODS:
+            incremental, expected = store.rollups("s", period), full.rollups("s", period)
+            assert [r["samples"] for r in incremental] == [r["samples"] for r in expected]
+            for got, want in zip(incremental, expected):
+                assert got == pytest.approx(want)
+
+    assert added == len(ts) - half
+    assert len(store.rollups("s", "week")) == 2
+
+# Test that the bucket still filling is left for the next run
+def test_incomplete_bucket_is_skipped(store):
+    series = MetricSeries([WEDNESDAY, WEDNESDAY + TEN_MIN], [0.9, 0.1])
+
+    assert store.ingest("s", series, complete_until=WEDNESDAY + TEN_MIN) == 1
+    assert store.ingest("s", series) == 1
+    assert store.rollups("s", "day")[0]["samples"] == 2
+
+# Test that API results are keyed by group and metric and weighted by COUNT when present
+def test_ingest_results(store):
+    results = [{"locationId": "loc1", "metricAggregates": [{"metric": "COVERAGE", "timeSeries": [
+        {"ts": WEDNESDAY, "avg": 1.0, "count": 9}, {"ts": WEDNESDAY + TEN_MIN, "avg": 0.0},
+    ]}]}]
+
+    assert sla_rollup.ingest_results(store, results, "locationId") == 2
+    assert store.series() == ["locationId=loc1/COVERAGE"]
+    assert store.rollups("locationId=loc1/COVERAGE", "month")[0]["avg"] == pytest.approx(0.9)
+
+# Test that the rollup MIN and MAX come from the buckets' own MIN and MAX, not their averages
+def test_ingest_results_uses_bucket_min_max(store):
+    results = [{"locationId": "loc1", "metricAggregates": [{"metric": "COVERAGE", "timeSeries": [
+        {"ts": WEDNESDAY, "avg": 0.9, "count": 4, "min": 0.6, "max": 1.0},
+        {"ts": WEDNESDAY + TEN_MIN, "avg": 0.8, "count": 4},
+    ]}]}]
+
+    sla_rollup.ingest_results(store, results, "locationId")
+
+    row = store.rollups("locationId=loc1/COVERAGE", "day")[0]
+    # The second bucket has no MIN/MAX, so its average stands in
+    assert (row["min"], row["max"]) == (0.6, 1.0)
+
+# Test that a second update only fetches buckets completed since the first
+@patch("examples.time_series.sla_rollup.fetch_series")
+def test_update_rollups_fetches_only_new_buckets(mock_fetch, store):
+    mock_fetch.return_value = []
+    now = WEDNESDAY + 5 * TEN_MIN + 1234
+
+    sla_rollup.update_rollups(store, "deviceId", now=now)
+    sla_rollup.update_rollups(store, "deviceId", now=now + 2 * TEN_MIN)
+
+    first, second = mock_fetch.call_args_list
+    assert first.args[2:4] == (WEDNESDAY + 5 * TEN_MIN - sla_rollup.ROLLUP_DAYS * DAY, WEDNESDAY + 5 * TEN_MIN)
+    assert second.args[2:4] == (WEDNESDAY + 5 * TEN_MIN, WEDNESDAY + 7 * TEN_MIN)
+    # Counts, MIN and MAX are requested by default, so rollups describe the samples
+    assert first.args[1]["aggregateFunctions"] == "AVG,COUNT,MIN,MAX"
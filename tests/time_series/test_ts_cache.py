@@ -0,0 +1,133 @@
+import pytest
+import sys
+import os
+import time
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import ts_cache
+
+TEN_MIN = 10 * 60 * 1000
+HOUR = 6 * TEN_MIN
+PARAMS = {"timeBucket": "10_MIN", "metrics": "COVERAGE", "aggregateFunctions": "AVG", "deviceId": "d1"}
+
+# Builds a fake session answering the numeric endpoint with one point per bucket in [from, to)
+def make_series_session():
+    session = MagicMock()
+
+    def get(url, headers=None, params=None):
+        start, end = int(params["from"]), int(params["to"])
+        first = -(-start // TEN_MIN) * TEN_MIN
+        response = MagicMock()
+        response.status_code = 200
+        response.ok = True
+        response.headers = {}
+        response.json.return_value = {"results": [{"deviceId": "d1", "metricAggregates": [{
+            "metric": "COVERAGE", "threshold": 0.9,
+            "timeSeries": [{"ts": ts, "avg": 0.5} for ts in range(first, end, TEN_MIN)],
+        }]}]}
+        return response
+
+    session.get.side_effect = get
+    return session
+
+def requested_ranges(session):
+    return [(call.kwargs["params"]["from"], call.kwargs["params"]["to"]) for call in session.get.call_args_list]
+
+# Test the range helpers used for gap detection
+def test_range_helpers():
+    ranges = ts_cache.add_range([[0, 10]], 20, 30)
+    ranges = ts_cache.add_range(ranges, 10, 15)
+
+    assert ranges == [[0, 15], [20, 30]]
+    assert ts_cache.missing_ranges(ranges, 5, 40) == [(15, 20), (30, 40)]
+    assert ts_cache.missing_ranges(ranges, 0, 15) == []
+
+# Test that an overlapping query only fetches the part it has not seen
+def test_overlapping_query_fetches_only_the_gap(tmp_path):
+    cache = ts_cache.SeriesCache(str(tmp_path))
+    session = make_series_session()
+    day = 1000 * HOUR * 24
+
+    first = ts_cache.fetch_series("url", PARAMS, day, day + 8 * HOUR, "deviceId", session=session, cache=cache)
+    second = ts_cache.fetch_series("url", PARAMS, day + 4 * HOUR, day + 12 * HOUR, "deviceId", session=session, cache=cache)
+
+    assert requested_ranges(session) == [(day, day + 8 * HOUR), (day + 8 * HOUR, day + 12 * HOUR)]
+    assert len(first[0]["metricAggregates"][0]["timeSeries"]) == 48
+    points = second[0]["metricAggregates"][0]["timeSeries"]
+    assert [p["ts"] for p in points] == list(range(day + 4 * HOUR, day + 12 * HOUR, TEN_MIN))
+    assert second[0]["deviceId"] == "d1"
+    assert second[0]["metricAggregates"][0]["threshold"] == 0.9
+
+# Test that a cached query returns [from, to): the bucket starting at "to" is left out
+def test_cached_window_excludes_to_time(tmp_path):
+    cache = ts_cache.SeriesCache(str(tmp_path))
+    session = make_series_session()
+    day = 1000 * HOUR * 24
+
+    ts_cache.fetch_series("url", PARAMS, day, day + 8 * HOUR, "deviceId", session=session, cache=cache)
+    results = ts_cache.fetch_series("url", PARAMS, day, day + 4 * HOUR, "deviceId", session=session, cache=cache)
+
+    assert session.get.call_count == 1
+    points = results[0]["metricAggregates"][0]["timeSeries"]
+    assert [p["ts"] for p in points] == list(range(day, day + 4 * HOUR, TEN_MIN))
+
+# Test that the window avg read from the cache is weighted by the bucket counts
+def test_cached_window_avg_is_weighted(tmp_path):
+    cache = ts_cache.SeriesCache(str(tmp_path))
+    session = MagicMock()
+    response = session.get.return_value
+    response.status_code = 200
+    response.ok = True
+    response.headers = {}
+    response.json.return_value = {"results": [{"deviceId": "d1", "metricAggregates": [{
+        "metric": "COVERAGE", "timeSeries": [{"ts": 0, "avg": 0.5, "count": 1},
+                                             {"ts": TEN_MIN, "avg": 0.9, "count": 3}],
+    }]}]}
+    params = {**PARAMS, "aggregateFunctions": "AVG,COUNT"}
+
+    results = ts_cache.fetch_series("url", params, 0, 2 * TEN_MIN, "deviceId", session=session, cache=cache)
+
+    agg = results[0]["metricAggregates"][0]
+    assert agg["avg"] == pytest.approx((0.5 * 1 + 0.9 * 3) / 4)
+    assert agg["count"] == 4
+
+# Test that a bucket cut off by an unaligned "to" is not marked covered
+def test_unaligned_end_is_not_covered(tmp_path):
+    cache = ts_cache.SeriesCache(str(tmp_path))
+    session = make_series_session()
+    day = 1000 * HOUR * 24
+
+    ts_cache.fetch_series("url", PARAMS, day, day + HOUR + 5 * 60 * 1000, "deviceId", session=session, cache=cache)
+    ts_cache.fetch_series("url", PARAMS, day, day + 2 * HOUR, "deviceId", session=session, cache=cache)
+
+    assert requested_ranges(session)[1] == (day + HOUR, day + 2 * HOUR)
+
+# Test that a repeated query is answered from disk by a new cache instance
+def test_repeat_query_served_from_disk(tmp_path):
+    day = 1000 * HOUR * 24
+    ts_cache.fetch_series("url", PARAMS, day, day + HOUR, "deviceId",
+                          session=make_series_session(), cache=ts_cache.SeriesCache(str(tmp_path)))
+
+    session = make_series_session()
+    results = ts_cache.fetch_series("url", PARAMS, day, day + HOUR, "deviceId",
+                                    session=session, cache=ts_cache.SeriesCache(str(tmp_path)))
+
+    session.get.assert_not_called()
+    assert len(results[0]["metricAggregates"][0]["timeSeries"]) == 6
+
+# Test that the bucket still filling is fetched again on the next refresh
+def test_current_bucket_is_refetched(tmp_path):
+    cache = ts_cache.SeriesCache(str(tmp_path))
+    session = make_series_session()
+    now = int(time.time() * 1000)
+    current_bucket = now // TEN_MIN * TEN_MIN
+
+    ts_cache.fetch_series("url", PARAMS, now - 8 * HOUR, now, "deviceId", session=session, cache=cache)
+    first_calls = session.get.call_count
+    ts_cache.fetch_series("url", PARAMS, now - 8 * HOUR, now, "deviceId", session=session, cache=cache)
+
+    assert requested_ranges(session)[first_calls:] == [(current_bucket, now)]
@@ -0,0 +1,116 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.time_series import ts_fetch
+
+TEN_MIN = 10 * 60 * 1000
+DAY = 24 * 60 * 60 * 1000
+
+# Builds a fake session answering the numeric endpoint with one point per bucket in [from, to].
+# The point at "to" is included too, like an API that treats the range as inclusive.
+def make_series_session(devices=("d1",)):
+    session = MagicMock()
+
+    def get(url, headers=None, params=None):
+        start, end = int(params["from"]), int(params["to"])
+        first = -(-start // TEN_MIN) * TEN_MIN
+        response = MagicMock()
+        response.status_code = 200
+        response.ok = True
+        response.headers = {}
+        response.json.return_value = {"results": [
+            {"deviceId": device, "metricAggregates": [{
+                "metric": "COVERAGE",
+                "threshold": 0.9,
+                "timeSeries": [{"ts": ts, "avg": (ts // TEN_MIN % 10) / 10}
+                               for ts in range(first, end + 1, TEN_MIN)],
+            }]}
+            for device in devices
+        ]}
+        return response
+
+    session.get.side_effect = get
+    return session
+
+# Test that timeBucket names convert to milliseconds
+def test_bucket_ms():
+    assert ts_fetch.bucket_ms("10_MIN") == TEN_MIN
+    assert ts_fetch.bucket_ms("2_HOUR") == 2 * 60 * 60 * 1000
+    with pytest.raises(ValueError):
+        ts_fetch.bucket_ms("FORTNIGHT")
+
+# Test that chunks cover the window exactly and inner boundaries sit on the bucket grid
+def test_plan_chunks_aligned():
+    start = 5 * DAY + 7 * 60 * 1000
+    end = start + 3 * DAY
+
+    chunks = ts_fetch.plan_chunks(start, end, "10_MIN", chunk_buckets=144)
+
+    assert chunks[0][0] == start and chunks[-1][1] == end
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert all(edge % DAY == 0 for edge, _ in chunks[1:])
+    assert len(chunks) == 4
+
+# Test that a short window is a single request
+def test_plan_chunks_short_window():
+    assert ts_fetch.plan_chunks(0, 8 * 6 * TEN_MIN, "10_MIN") == [(0, 8 * 6 * TEN_MIN)]
+
+# Test that chunked fetching returns the same points as one request, in order and without duplicates
+def test_fetch_chunked_matches_single_request():
+    session = make_series_session(devices=("d1", "d2"))
+    start, end = 3 * DAY, 10 * DAY
+
+    single = ts_fetch.fetch_chunked("url", {"timeBucket": "10_MIN"}, start, end, session=session, chunk_buckets=10 ** 6)
+    chunked = ts_fetch.fetch_chunked("url", {"timeBucket": "10_MIN"}, start, end, session=session, chunk_buckets=144)
+
+    assert session.get.call_count == 1 + 7
+    for one, many in zip(single, chunked):
+        assert one["deviceId"] == many["deviceId"]
+        assert one["metricAggregates"][0]["timeSeries"] == many["metricAggregates"][0]["timeSeries"]
+    ts = [p["ts"] for p in chunked[0]["metricAggregates"][0]["timeSeries"]]
+    assert ts == sorted(set(ts))
+
+# Test that a failed chunk raises instead of returning a series with a hole
+def test_fetch_chunked_raises_on_failure():
+    session = make_series_session()
+    inner = session.get.side_effect
+
+    def get(url, headers=None, params=None):
+        if params["from"] == 4 * DAY:
+            return MagicMock(status_code=500, ok=False, headers={}, text="error")
+        return inner(url, headers=headers, params=params)
+    session.get.side_effect = get
+
+    with pytest.raises(Exception):
+        ts_fetch.fetch_chunked("url", {"timeBucket": "10_MIN"}, 3 * DAY, 6 * DAY, session=session)
+
+# Test that merged window aggregates come from all points, with avg weighted by the bucket counts
+def test_merge_results_recomputes_window_aggregates():
+    first = [{"deviceId": "d1", "metricAggregates": [{
+        "metric": "COVERAGE", "threshold": 0.9, "avg": 0.5, "min": 0.5, "max": 0.5, "count": 1,
+        "timeSeries": [{"ts": 0, "avg": 0.5, "min": 0.5, "max": 0.5, "count": 1}]}]}]
+    second = [{"deviceId": "d1", "metricAggregates": [{
+        "metric": "COVERAGE", "threshold": 0.9, "avg": 0.9, "min": 0.8, "max": 1.0, "count": 3,
+        "timeSeries": [{"ts": TEN_MIN, "avg": 0.9, "min": 0.8, "max": 1.0, "count": 3}]}]}]
+
+    agg = ts_fetch.merge_results([first, second])[0]["metricAggregates"][0]
+
+    assert agg["avg"] == pytest.approx((0.5 * 1 + 0.9 * 3) / 4)
+    assert (agg["min"], agg["max"], agg["count"], agg["threshold"]) == (0.5, 1.0, 4, 0.9)
+
+# Test that a window avg without bucket counts is dropped instead of guessed
+def test_merge_results_drops_unweighted_avg():
+    chunks = [[{"deviceId": "d1", "metricAggregates": [{
+        "metric": "COVERAGE", "avg": avg, "p95": avg, "timeSeries": [{"ts": ts, "avg": avg, "p95": avg}]}]}]
+        for ts, avg in ((0, 0.5), (TEN_MIN, 0.9))]
+
+    agg = ts_fetch.merge_results(chunks)[0]["metricAggregates"][0]
+
+    assert "avg" not in agg and "p95" not in agg
+    assert [p["avg"] for p in agg["timeSeries"]] == [0.5, 0.9]
@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add the root directory so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to be tested
+from examples.user_management import add_users_from_csv
+
+# Test that existing emails are read case-insensitively from every page of /users
+@patch("examples.user_management.add_users_from_csv.iter_results_parallel")
+def test_fetch_existing_emails(mock_iter):
+    mock_iter.return_value = iter([{"email": "Jane@Example.com"}, {"email": None}, {"email": "bob@example.com"}])
+
+    assert add_users_from_csv.fetch_existing_emails("fake-token") == {"jane@example.com", "bob@example.com"}
+
+# Test that a failure to read /users stops the run before any user is created
+@patch("examples.user_management.add_users_from_csv.create_user")
+@patch("examples.user_management.add_users_from_csv.fetch_existing_emails", return_value=None)
+@patch("examples.user_management.add_users_from_csv.fetch_organization_id", return_value="org-1")
+@patch("examples.user_management.add_users_from_csv.fetch_reporter_role_id", return_value="role-1")
+@patch("examples.user_management.add_users_from_csv.get_token", return_value=("fake-token", None))
+def test_main_stops_without_user_index(mock_token, mock_role, mock_org, mock_existing, mock_create,
+                                       tmp_path, monkeypatch):
+    csv_file = tmp_path / "users.csv"
+    csv_file.write_text("first_name,last_name,email\nJane,Doe,jane@example.com\n")
+    monkeypatch.setattr(sys, "argv", ["add_users_from_csv.py", str(csv_file)])
+
+    add_users_from_csv.main()
+
+    mock_create.assert_not_called()
+
+# Test that existing and duplicate users are skipped and the rest are created
+@patch("examples.user_management.add_users_from_csv.create_user", side_effect=lambda token, first, last, email, *ids: email != "bad@example.com")
+@patch("examples.user_management.add_users_from_csv.fetch_existing_emails", return_value={"jane@example.com"})
+@patch("examples.user_management.add_users_from_csv.fetch_organization_id", return_value="org-1")
+@patch("examples.user_management.add_users_from_csv.fetch_reporter_role_id", return_value="role-1")
+@patch("examples.user_management.add_users_from_csv.get_token", return_value=("fake-token", None))
+def test_main_skips_existing_users(mock_token, mock_role, mock_org, mock_existing, mock_create,
+                                   tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr("concurrency.get_session", lambda: MagicMock(hooks={"response": []}))
+    csv_file = tmp_path / "users.csv"
+    csv_file.write_text(
+        "first_name,last_name,email\n"
+        "Jane,Doe,JANE@example.com\n"
+        "Bob,Smith,bob@example.com\n"
+        "Bob,Smith,Bob@example.com\n"
+        "Bad,Row,bad@example.com\n"
+    )
+    monkeypatch.setattr(sys, "argv", ["add_users_from_csv.py", str(csv_file)])
+
+    with caplog.at_level("INFO"):
+        add_users_from_csv.main()
+
+    created = sorted(call.args[3] for call in mock_create.call_args_list)
+    # The last of the two Bob rows wins
+    assert created == ["Bob@example.com", "bad@example.com"]
+    assert "Summary: 1 created, 1 skipped (already exist), 1 failed" in caplog.text
+    assert "Request latency: p50" in caplog.text
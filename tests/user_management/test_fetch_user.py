@@ -13,7 +13,7 @@ def test_fetch_users_function_exists():
     assert hasattr(fetch_user, "fetch_users")
 
 # Test that fetch_users correctly processes a successful API response
-@patch("examples.user_management.fetch_user.requests.get")
+@patch("examples.user_management.fetch_user.session.get")
 def test_fetch_users_success(mock_get):
 
     # Mock a successful JSON response with sample users
@@ -40,6 +40,8 @@ def test_fetch_users_success(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.ok = True
+    # No rate limit headers
+    mock_response.headers = {}
     mock_response.json.return_value = sample_data
     mock_response.raise_for_status = MagicMock()
     mock_get.return_value = mock_response
@@ -50,6 +52,21 @@ def test_fetch_users_success(mock_get):
     # Call function under test which uses requests.get internally
     fetch_user.fetch_users(token)
 
+# Test that a failed /users page is logged instead of raising
+@patch("examples.user_management.fetch_user.session.get")
+def test_fetch_users_http_error(mock_get, caplog):
+    mock_response = MagicMock()
+    mock_response.status_code = 500
+    mock_response.ok = False
+    mock_response.headers = {}
+    mock_response.text = "Internal Server Error"
+    mock_get.return_value = mock_response
+
+    with caplog.at_level("ERROR"):
+        fetch_user.fetch_users("fake-token")
+
+    assert "HTTP error occurred" in caplog.text
+
 # Test that logging the user summary emits expected info log output
 def test_log_users_summary_runs(caplog):
 